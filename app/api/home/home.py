@@ -5,8 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
 from lqd_services import AvailableChainNodes
 
 from app.models import User
-from app.services import AuthService
+from app.services import AuthService, PermissionService
+from app.schemas.auth_scheme import Principal
 from app.schemas.user_scheme import AvailableChainNodesViewModel
+from app.utils.metrics import metrics
 
 
 router = APIRouter()
@@ -14,7 +16,7 @@ router = APIRouter()
 
 @router.get("/available_chains", response_model=AvailableChainNodesViewModel)
 async def get_available_chains(
-    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
 ) -> AvailableChainNodesViewModel:
     """
     Retrieve a list of available blockchain nodes for the authenticated user.
@@ -24,11 +26,24 @@ async def get_available_chains(
     to access this endpoint.
 
     Args:
-        current_user (User): The current authenticated user, retrieved using
-        the AuthService.
+        current_user (Principal): The current authenticated principal,
+        retrieved using the AuthService.
 
     Returns:
         AvailableChainNodesViewModel: A view model containing the list of
         available mainnet blockchain nodes.
     """
     return AvailableChainNodesViewModel(mainnet_list=AvailableChainNodes.keys())
+
+
+@router.get("/metrics")
+@PermissionService.superuser_required
+async def get_metrics(
+    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+) -> Any:
+    """
+    Retrieve in-process counters and timing summaries of this worker.
+
+    Only available to superusers.
+    """
+    return metrics.snapshot()
@@ -1,16 +1,35 @@
 import logging
 
 from typing import Annotated, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Body, Header
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Request,
+    Body,
+    Header,
+    Security,
+)
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from redis.exceptions import RedisError
 from sqlalchemy.exc import IntegrityError
 
+from app.core.cache import TokenVersions
+from app.core.revocation import RevocationStore
+from app.core.settings import settings
 from app.models import User
 from app.repositories import UserRepository
 from app.services import ActionService, AuthService
-from app.utils.security import create_access_token, create_refresh_token
+from app.services.auth import api_key_header
+from app.utils.security import (
+    create_access_token,
+    create_refresh_token,
+    create_session_id,
+)
 from app.schemas.user_scheme import UserViewModel, UserCreationModel, UserAuthModel
-from app.schemas.auth_scheme import Token
+from app.schemas.auth_scheme import Token, Principal
 
 router = APIRouter()
 
@@ -32,6 +51,8 @@ async def create_user(
     """
     try:
         user = await user_service.create(user)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(e)
         raise HTTPException(
@@ -59,15 +80,17 @@ async def login_for_access_token(
     user = await ActionService.authenticate_user(
         username=form_data.username,
         password=form_data.password,
+        user_service=user_service,
     )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect Username Or Password",
         )
-    data = {"sub": user.username}
+    data = {"sub": user.username, "sid": create_session_id()}
+    version = await TokenVersions.get(user.id)
     return Token(
-        access_token=create_access_token(data),
+        access_token=create_access_token(data, user=user, version=version),
         refresh_token=create_refresh_token(data),
     )
 
@@ -75,14 +98,56 @@ async def login_for_access_token(
 @router.post("/login/refresh", response_model=Token)
 async def get_refresh_token(
     current_user: Annotated[User, Depends(AuthService.get_access_by_refresh_token)],
+    refresh_token: str = Security(api_key_header),
 ) -> Token:
     """
     Refresh the access token using the refresh token.
 
+    The presented refresh token is consumed and a new one for the same
+    session is returned alongside the access token.
+
     Args:
         current_user (User): The current authenticated user, retrieved using the refresh token.
+        refresh_token (str): The refresh token being rotated.
 
     Returns:
-        Token: The new access token.
+        Token: The new access and refresh tokens.
+    """
+    session_id = jwt.get_unverified_claims(refresh_token)["sid"]
+    data = {"sub": current_user.username, "sid": session_id}
+    version = await TokenVersions.get(current_user.id)
+    return Token(
+        access_token=create_access_token(data, user=current_user, version=version),
+        refresh_token=create_refresh_token(data),
+    )
+
+
+@router.post("/logout", status_code=200)
+async def logout(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    token: str = Security(api_key_header),
+) -> Any:
+    """
+    Revoke the session of the presented access token and all its refresh tokens.
+
+    Args:
+        current_user (Principal): The current authenticated principal.
+        token (str): The access token of the session to revoke.
     """
-    return Token(access_token=create_access_token({"sub": current_user.username}))
+    session_id = jwt.get_unverified_claims(token).get("sid")
+    if session_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token Has No Session",
+        )
+    try:
+        await RevocationStore.revoke(
+            session_id, ttl=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+        )
+    except RedisError as e:
+        logging.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Log Out",
+        )
+    return status.HTTP_200_OK
@@ -29,7 +29,6 @@ router = APIRouter()
 @router.get("/", response_model=UserViewModel)
 async def get_profile(
     current_user: Annotated[User, Depends(AuthService.get_current_user)],
-    user_service: Annotated[UserRepository, Depends(UserRepository)],
 ) -> UserViewModel:
     """
     Retrieve the profile of the current authenticated user.
@@ -40,11 +39,12 @@ async def get_profile(
 @router.get("/wallets", response_model=UserWalletsViewModel)
 async def get_wallets(
     current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    user_service: Annotated[UserRepository, Depends(UserRepository.reader)],
 ) -> UserWalletsViewModel:
     """
     Retrieve the wallets of the current authenticated user.
     """
-    return current_user
+    return await user_service.get_single_with_wallets(id=current_user.id)
 
 
 @router.get("/chains", response_model=UserChainsViewModel)
@@ -100,11 +100,16 @@ async def remove_chain(
 
 
 @router.get("/verify/{token}", status_code=200)
-async def catch_verification_link(token: str) -> Any:
+async def catch_verification_link(
+    token: str,
+    user_service: Annotated[UserRepository, Depends(UserRepository)],
+) -> Any:
     """
     Verify the user's email using the provided token.
     """
-    verify_user = await ActionService.verify_email(token=token)
+    verify_user = await ActionService.verify_email(
+        token=token, user_service=user_service
+    )
     if not verify_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -139,13 +144,17 @@ async def send_verification_message(
 
 
 @router.patch("/reset_password", status_code=200)
-async def reset_password(token: str, user_data: UserResetPassword) -> Any:
+async def reset_password(
+    token: str,
+    user_data: UserResetPassword,
+    user_service: Annotated[UserRepository, Depends(UserRepository)],
+) -> Any:
     """
     Reset the user's password using the provided token.
     """
     try:
         confirm_user_password = await ActionService.confirm_reset_password(
-            token=token, user_instance=user_data
+            token=token, user_instance=user_data, user_service=user_service
         )
         if not confirm_user_password:
             raise HTTPException(
@@ -153,6 +162,8 @@ async def reset_password(token: str, user_data: UserResetPassword) -> Any:
                 detail="Invalid Token",
             )
         return status.HTTP_200_OK
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(e)
         raise HTTPException(
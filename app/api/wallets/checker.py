@@ -1,53 +1,200 @@
 import logging
-from typing import Annotated
-from fastapi import APIRouter, Depends
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.services import AuthService
+from app.core.database import async_session
+from app.core.settings import settings
+from app.services import AuthService, PortfolioService, TransactionSyncService
 from app.external_services import CheckerService
-from app.schemas.checker_scheme import CheckerParsedData
-from app.schemas.transactor_scheme import TransactorParsedData
-from app.models import User
+from app.repositories import TransactionRepository, UserRepository
+from app.schemas.checker_scheme import CheckerParsedData, PortfolioModel
+from app.schemas.transactor_scheme import ParsedDataItem, TransactorParsedData
+from app.schemas.auth_scheme import Principal
+from app.utils.streaming import accepts_gzip, ndjson_stream
 
 router = APIRouter()
 
+# The transactions endpoint picks its format by Accept and its coding by
+# Accept-Encoding, so caches must key on both.
+VARY = "Accept, Accept-Encoding"
+
+
+@router.get("/portfolio", response_model=PortfolioModel)
+async def get_portfolio(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    user_service: Annotated[UserRepository, Depends(UserRepository.reader)],
+) -> PortfolioModel:
+    """
+    Value all wallets of the current user on all of their chains.
+
+    Lookups run concurrently; ones that fail or miss their deadline are
+    listed with their status and left out of the totals.
+
+    Args:
+        current_user (Principal): The current authenticated principal, retrieved using AuthService.
+        user_service (UserRepository): Repository used to load the user's wallets and chains.
+
+    Returns:
+        PortfolioModel: Per wallet and chain balances with server-side totals.
+    """
+    user = await user_service.get_single_with_wallets(id=current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User Not Found",
+        )
+    return await PortfolioService.fetch(
+        addresses=[wallet.address for wallet in user.wallets],
+        chains=(user.mainnet_dict or {}).keys(),
+    )
+
 
 @router.get("/{address}/{chain}", response_model=CheckerParsedData)
 async def get_wallet_information_from_checker(
-    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    response: Response,
     address: str,
     chain: str,
 ) -> CheckerParsedData:
     """
     Retrieve wallet information from the checker service.
 
+    Balances are served from a short-lived cache; the `Age` header holds
+    the age of the data in seconds and `X-Cache` is HIT, STALE or MISS.
+
     Args:
-        current_user (User): The current authenticated user, retrieved using AuthService.
+        current_user (Principal): The current authenticated principal, retrieved using AuthService.
+        response (Response): The outgoing response, used to set cache headers.
         address (str): The wallet address to fetch information for.
         chain (str): The blockchain chain name.
 
     Returns:
         CheckerParsedData: Parsed data containing wallet balances and other details.
     """
-    return await CheckerService.fetch_balances(address=address, chain_name=chain)
+    data, age, cache_status = await CheckerService.fetch_balances_cached(
+        address=address, chain_name=chain
+    )
+    response.headers["Age"] = str(int(age))
+    response.headers["X-Cache"] = cache_status
+    return data
 
 
 @router.get(
     "/{address}/{chain}/transactions", response_model=TransactorParsedData
 )
 async def get_wallet_transactions(
-    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    transaction_service: Annotated[
+        TransactionRepository, Depends(TransactionRepository)
+    ],
+    request: Request,
+    response: Response,
     address: str,
     chain: str,
+    limit: Annotated[
+        int, Query(ge=1, le=settings.TRANSACTIONS_PAGE_MAX_SIZE)
+    ] = settings.TRANSACTIONS_PAGE_SIZE,
+    before: Optional[str] = None,
+    direction: Optional[Literal["in", "out"]] = None,
+    successful: Optional[bool] = None,
+    min_block_height: Optional[int] = None,
+    max_block_height: Optional[int] = None,
 ) -> TransactorParsedData:
     """
-    Retrieve wallet transactions from the checker service.
+    Retrieve wallet transactions from the local transaction store.
+
+    The first page re-syncs new blocks from the checker service when the
+    stored history is older than TRANSACTION_SYNC_MAX_AGE_SECONDS. Pages are
+    newest first; pass `next_cursor` of a page as `before` to get the next.
+
+    With `Accept: application/x-ndjson` the whole matching history is
+    streamed instead, one item per line and gzip-compressed when the client
+    accepts it; `limit` is ignored.
 
     Args:
-        current_user (User): The current authenticated user, retrieved using AuthService.
+        current_user (Principal): The current authenticated principal, retrieved using AuthService.
+        transaction_service (TransactionRepository): Repository of stored transactions.
+        request (Request): The incoming request, used for content negotiation.
+        response (Response): The outgoing response, used to set the Vary header.
         address (str): The wallet address to fetch transactions for.
         chain (str): The blockchain chain name.
+        limit (int): Page size.
+        before (str): Cursor returned as `next_cursor` by the previous page.
+        direction (str): Only incoming ("in") or outgoing ("out") transactions.
+        successful (bool): Only successful or failed transactions.
+        min_block_height (int): Lowest block height to include.
+        max_block_height (int): Highest block height to include.
 
     Returns:
         TransactorParsedData: Parsed data containing wallet transactions.
     """
-    return await CheckerService.fetch_transactions(address=address, chain_name=chain)
+    keyset = None
+    if before is not None:
+        try:
+            block_height, tx_hash = before.split(":", 1)
+            keyset = (int(block_height), tx_hash)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Invalid Cursor",
+            )
+
+    if keyset is None:
+        chain_id = await TransactionSyncService.sync(
+            transaction_service,
+            address,
+            chain,
+            max_age=settings.TRANSACTION_SYNC_MAX_AGE_SECONDS,
+        )
+        await transaction_service.touch_cursor(address, chain)
+    else:
+        cursor = await transaction_service.get_cursor(address, chain)
+        chain_id = cursor.chain_id if cursor is not None else None
+    if chain_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Fetch Transactions",
+        )
+
+    filters = {
+        "before": keyset,
+        "direction": direction,
+        "successful": successful,
+        "min_block_height": min_block_height,
+        "max_block_height": max_block_height,
+    }
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        # The request session is closed before a streaming body is sent.
+        async def stream_items():
+            async with async_session() as session:
+                async for transaction in TransactionRepository(session).stream(
+                    address, chain, **filters
+                ):
+                    yield ParsedDataItem.model_validate(transaction)
+
+        gzip = accepts_gzip(request.headers.get("accept-encoding", ""))
+        headers = {"Vary": VARY}
+        if gzip:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            ndjson_stream(stream_items(), gzip=gzip),
+            media_type="application/x-ndjson",
+            headers=headers,
+        )
+
+    response.headers["Vary"] = VARY
+
+    items = await transaction_service.get_page(address, chain, limit=limit, **filters)
+    next_cursor = None
+    if len(items) == limit:
+        next_cursor = f"{items[-1].block_height}:{items[-1].tx_hash}"
+
+    return TransactorParsedData(
+        address=address,
+        chain_name=chain,
+        chain_id=chain_id,
+        items=items,
+        next_cursor=next_cursor,
+    )
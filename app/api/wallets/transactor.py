@@ -1,17 +1,34 @@
 import logging
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from app.services import AuthService, PermissionService
-from app.external_services import TransactionService
+from celery_tasks.tasks import process_transfer
+
+from app.core.database import async_session, on_commit
+from app.core.settings import settings
+from app.services import (
+    AuthService,
+    BatchTransferService,
+    PermissionService,
+    TransferService,
+)
+from app.external_services import (
+    EvmTransactor,
+    TransactionService,
+    TransactorRegistry,
+)
 from app.schemas.transactor_scheme import (
+    BatchTransferCreateModel,
+    BatchTransferViewModel,
     TransactorParsedData,
     SendTransactionModel,
     SendTransactionNativeModel,
     TransactionStatusModel,
+    TransferCreateModel,
+    TransferViewModel,
 )
-from app.repositories import WalletRepository
-from app.models import User
+from app.repositories import TransferRepository, WalletRepository
+from app.schemas.auth_scheme import Principal
 
 router = APIRouter()
 
@@ -19,7 +36,7 @@ router = APIRouter()
 @router.put("/send_native_transaction", response_model=TransactionStatusModel)
 @PermissionService.verification_required
 async def send_native_transaction(
-    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
     wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
     form_data: SendTransactionNativeModel,
 ) -> TransactionStatusModel:
@@ -28,7 +45,7 @@ async def send_native_transaction(
     """
     try:
         wallet = await wallet_service.get_single_wallet(
-            address=form_data.from_address, user=current_user
+            address=form_data.from_address, user_id=current_user.id
         )
         status_data = await TransactionService.send_native(
             mainnet=form_data.mainnet,
@@ -49,7 +66,7 @@ async def send_native_transaction(
 @router.put("/send_transaction_erc20", response_model=TransactionStatusModel)
 @PermissionService.verification_required
 async def send_transaction_erc20(
-    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
     wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
     form_data: SendTransactionModel,
 ) -> TransactionStatusModel:
@@ -58,7 +75,7 @@ async def send_transaction_erc20(
     """
     try:
         wallet = await wallet_service.get_single_wallet(
-            address=form_data.from_address, user=current_user
+            address=form_data.from_address, user_id=current_user.id
         )
         status_data = await TransactionService.send_erc20(
             mainnet=form_data.mainnet,
@@ -80,7 +97,7 @@ async def send_transaction_erc20(
 @router.put("/send_transaction_bep20", response_model=TransactionStatusModel)
 @PermissionService.verification_required
 async def send_transaction_bep20(
-    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
     wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
     form_data: SendTransactionModel,
 ) -> TransactionStatusModel:
@@ -89,7 +106,7 @@ async def send_transaction_bep20(
     """
     try:
         wallet = await wallet_service.get_single_wallet(
-            address=form_data.from_address, user=current_user
+            address=form_data.from_address, user_id=current_user.id
         )
         status_data = await TransactionService.send_bep20(
             mainnet=form_data.mainnet,
@@ -106,3 +123,122 @@ async def send_transaction_bep20(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Unable To Make Transaction BEP20",
         )
+
+
+@router.post("/transfers", status_code=202, response_model=TransferViewModel)
+@PermissionService.verification_required
+async def create_transfer(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
+    transfer_service: Annotated[TransferRepository, Depends(TransferRepository)],
+    form_data: TransferCreateModel,
+) -> TransferViewModel:
+    """
+    Queue a transfer for signing and broadcast by a worker.
+
+    Returns at once with the pending transfer; follow its status with
+    GET /transactor/transfers/{id}.
+    """
+    wallet = await wallet_service.get_single_wallet(
+        address=form_data.from_address, user_id=current_user.id
+    )
+    if wallet is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="This Wallet Not Exists In Your Account",
+        )
+
+    try:
+        transfer = await transfer_service.create(
+            user_id=current_user.id, **form_data.model_dump()
+        )
+    except Exception as e:
+        logging.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Make Transaction",
+        )
+
+    async def enqueue():
+        process_transfer.delay(transfer.id)
+
+    on_commit(transfer_service.session, enqueue)
+    return transfer
+
+
+@router.get("/transfers/{transfer_id}", response_model=TransferViewModel)
+async def get_transfer(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    transfer_id: int,
+    wait: Annotated[float, Query(ge=0, le=settings.TRANSFER_LONG_POLL_MAX_SECONDS)] = 0,
+) -> TransferViewModel:
+    """
+    Get the status of a transfer.
+
+    With `wait` > 0 this long-polls: the response is held until the status
+    changes or `wait` seconds pass, whichever comes first.
+    """
+    transfer = await TransferService.wait(
+        transfer_id, user_id=current_user.id, timeout=wait
+    )
+    if transfer is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transfer Not Found",
+        )
+    return transfer
+
+
+@router.post("/batch", response_model=BatchTransferViewModel)
+@PermissionService.verification_required
+async def send_batch(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    form_data: BatchTransferCreateModel,
+) -> BatchTransferViewModel:
+    """
+    Send many transfers from one wallet, with a result per item.
+
+    Repeating the request with the same batch_id resumes the batch: items
+    already sent are left alone and the rest are retried. Items whose
+    broadcast got no answer are counted as unknown rather than failed: they
+    may have been paid, and a resume broadcasts the same transaction again.
+    """
+    # No request session: it would hold a pooled connection for the whole
+    # run, while the batch opens its own short sessions between RPC calls.
+    async with async_session() as session:
+        wallet = await WalletRepository(session).get_single_wallet(
+            address=form_data.from_address, user_id=current_user.id
+        )
+    if wallet is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="This Wallet Not Exists In Your Account",
+        )
+
+    transactor = TransactorRegistry.get(form_data.mainnet)
+    if not isinstance(transactor, EvmTransactor):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Batch Transfers Are Not Supported On This Mainnet",
+        )
+
+    try:
+        transfers = await BatchTransferService.run(
+            transactor, current_user.id, wallet.private_key, form_data
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Make Transaction",
+        )
+
+    return BatchTransferViewModel(
+        batch_id=form_data.batch_id,
+        sent=sum(transfer.status == "sent" for transfer in transfers),
+        failed=sum(transfer.status == "failed" for transfer in transfers),
+        unknown=sum(transfer.status == "unknown" for transfer in transfers),
+        items=transfers,
+    )
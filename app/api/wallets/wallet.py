@@ -1,7 +1,10 @@
 import logging
-from typing import Annotated, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
+from lqd_services import AvailableChainNodes
+
+from app.core.settings import settings
 from app.services import AuthService, PermissionService
 from app.schemas.transactor_scheme import (
     SendTransactionModel,
@@ -13,8 +16,11 @@ from app.schemas.wallet_scheme import (
     WalletUpdateModel,
     WalletSecuredViewModel,
     WalletRecoveryModel,
+    WalletBatchModel,
+    WalletBatchItemModel,
 )
 from app.repositories import WalletRepository
+from app.schemas.auth_scheme import Principal
 from app.models import User
 
 router = APIRouter()
@@ -40,6 +46,59 @@ async def create_wallet(
         )
 
 
+@router.post("/batch", status_code=201, response_model=WalletBatchModel)
+@PermissionService.verification_required
+async def create_wallets_batch(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
+    count: Annotated[int, Query(ge=1, le=settings.WALLET_BATCH_MAX_COUNT)],
+) -> WalletBatchModel:
+    """
+    Create `count` new wallets for the current user at once.
+    """
+    try:
+        results = await wallet_service.create_many_from_user(current_user, count)
+    except Exception as e:
+        logging.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Create Wallets",
+        )
+
+    items = [
+        WalletBatchItemModel(address=address, created=created)
+        for address, created in results
+    ]
+    created = sum(item.created for item in items)
+    return WalletBatchModel(
+        created=created, conflicts=len(items) - created, items=items
+    )
+
+
+@router.post("/derive", status_code=201, response_model=List[WalletSecuredViewModel])
+@PermissionService.verification_required
+async def derive_wallets(
+    current_user: Annotated[Principal, Depends(AuthService.get_current_principal)],
+    wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
+    count: Annotated[int, Query(ge=1, le=settings.HD_DERIVE_MAX_COUNT)] = 1,
+) -> List[WalletSecuredViewModel]:
+    """
+    Derive the next `count` addresses of the current user's HD account.
+    """
+    try:
+        wallets = await wallet_service.derive_from_user(current_user, count=count)
+    except Exception as e:
+        logging.error(e)
+        wallets = None
+
+    if wallets is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Derive Wallets",
+        )
+    return wallets
+
+
 @router.post("/recover", response_model=WalletViewModel)
 @PermissionService.verification_required
 async def recover_wallet(
@@ -62,10 +121,36 @@ async def recover_wallet(
         )
 
 
+@router.post("/recover/discover", response_model=List[WalletSecuredViewModel])
+@PermissionService.verification_required
+async def discover_wallets(
+    recover_data: WalletRecoveryModel,
+    current_user: Annotated[User, Depends(AuthService.get_current_user)],
+    wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
+) -> List[WalletSecuredViewModel]:
+    """
+    Recover every used address of an HD phrase for the current user.
+
+    Activity is probed on the user's chains, or on all available chains
+    when none are configured.
+    """
+    chains = (current_user.mainnet_dict or {}).keys() or AvailableChainNodes.keys()
+    try:
+        return await wallet_service.discover_wallets_from_mnemonics(
+            mnemonics=recover_data.mnemonics, user=current_user, chains=chains
+        )
+    except Exception as e:
+        logging.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable To Recover Wallets",
+        )
+
+
 @router.get("/{address}", response_model=WalletSecuredViewModel)
 async def get_wallet_information(
     current_user: Annotated[User, Depends(AuthService.get_current_user)],
-    wallet_service: Annotated[WalletRepository, Depends(WalletRepository)],
+    wallet_service: Annotated[WalletRepository, Depends(WalletRepository.reader)],
     address: str,
 ) -> WalletSecuredViewModel:
     """
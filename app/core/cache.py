@@ -0,0 +1,286 @@
+import json
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.models import User
+from app.utils.cache import TTLCache
+
+from .redis import redis_client
+from .settings import settings
+
+PRINCIPAL_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "is_active",
+    "is_verified",
+    "is_admin",
+    "mainnet_dict",
+)
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of authenticated users: a per-process LRU in front of Redis.
+
+    Entries are tied to the token version they were resolved for and never
+    outlive the access token that reads them. Only the plain columns in
+    PRINCIPAL_FIELDS are cached, so relationships such as `wallets` and the
+    password hash are not available on cached users.
+    """
+
+    _local = TTLCache(
+        maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+        ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    )
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"principal:{username}"
+
+    @staticmethod
+    def _to_user(data: dict) -> User:
+        user = User(**{field: data[field] for field in PRINCIPAL_FIELDS})
+        make_transient_to_detached(user)
+        return user
+
+    @staticmethod
+    def _ttl(expires_at: Optional[int]) -> int:
+        ttl = settings.PRINCIPAL_CACHE_TTL_SECONDS
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - time.time()))
+        return ttl
+
+    @classmethod
+    async def get(
+        cls,
+        username: str,
+        version: Optional[int] = None,
+        expires_at: Optional[int] = None,
+    ) -> Optional[User]:
+        """
+        Return a detached User for `username`, or None on a miss.
+
+        Entries resolved for another token version are misses.
+        """
+        data = cls._local.get(username)
+        if data is None:
+            key = cls._key(username)
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    raw, ttl = await pipe.get(key).ttl(key).execute()
+            except RedisError as e:
+                logging.warning(e)
+                return None
+
+            if raw is None or ttl <= 0:
+                return None
+
+            data = json.loads(raw)
+            cls._local.set(username, data, ttl=min(ttl, cls._ttl(expires_at)))
+
+        if data.get("version") != version:
+            return None
+
+        return cls._to_user(data)
+
+    @classmethod
+    async def set(
+        cls,
+        user: User,
+        version: Optional[int] = None,
+        expires_at: Optional[int] = None,
+    ) -> None:
+        """
+        Cache `user` for `version` until the TTL elapses or the token expires.
+        """
+        ttl = cls._ttl(expires_at)
+        if ttl <= 0:
+            return
+
+        data = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        if data["mainnet_dict"] is not None:
+            data["mainnet_dict"] = dict(data["mainnet_dict"])
+        data["version"] = version
+
+        cls._local.set(user.username, data, ttl=ttl)
+        try:
+            await redis_client.set(cls._key(user.username), json.dumps(data), ex=ttl)
+        except RedisError as e:
+            logging.warning(e)
+
+    @classmethod
+    async def invalidate(cls, *usernames: str) -> None:
+        """
+        Drop cached entries so the next request reloads them from the database.
+        """
+        usernames = [username for username in usernames if username]
+        if not usernames:
+            return
+
+        for username in usernames:
+            cls._local.pop(username)
+        try:
+            await redis_client.delete(*map(cls._key, usernames))
+        except RedisError as e:
+            logging.warning(e)
+
+
+class TokenVersions:
+    """
+    Per-user token version counters kept in Redis.
+
+    Access tokens embed the version current at issue time; bumping it
+    revokes every token issued before, without touching the database.
+    """
+
+    _local = TTLCache(
+        maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+        ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    )
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"token_version:{user_id}"
+
+    @classmethod
+    async def get(cls, user_id: int) -> Optional[int]:
+        """
+        Return the current version, or None when Redis is unreachable.
+        """
+        version = cls._local.get(user_id)
+        if version is not None:
+            return version
+
+        try:
+            raw = await redis_client.get(cls._key(user_id))
+        except RedisError as e:
+            logging.warning(e)
+            return None
+
+        version = int(raw or 0)
+        cls._local.set(user_id, version)
+        return version
+
+    @classmethod
+    async def bump(cls, *user_ids: int) -> None:
+        """
+        Invalidate all tokens issued so far for the given users.
+        """
+        for user_id in user_ids:
+            cls._local.pop(user_id)
+            try:
+                await redis_client.incr(cls._key(user_id))
+            except RedisError as e:
+                logging.warning(e)
+
+
+class BalanceCache:
+    """
+    Two-tier cache of balance lookups keyed by (chain, address).
+
+    Entries carry the time they were fetched; callers decide freshness
+    with `ttl(chain)`. Redis keeps them for the TTL plus the stale window.
+
+    Lookups that reach Redis also record the pair in a sorted set by time,
+    so background jobs can find the balances clients are watching.
+    """
+
+    WATCH_KEY = "balance:watch"
+
+    _local = TTLCache(
+        maxsize=settings.BALANCE_CACHE_MAXSIZE,
+        ttl=settings.BALANCE_CACHE_LOCAL_TTL_SECONDS,
+    )
+    _ttls = settings.build_balance_cache_ttls()
+
+    @staticmethod
+    def _key(chain: str, address: str) -> str:
+        return f"balance:{chain}:{address.lower()}"
+
+    @classmethod
+    def ttl(cls, chain: str) -> int:
+        return cls._ttls.get(chain, settings.BALANCE_CACHE_TTL_SECONDS)
+
+    @classmethod
+    async def get(
+        cls, chain: str, address: str, watch: bool = True
+    ) -> Optional[Tuple[dict, float]]:
+        """
+        Return (data, fetched_at timestamp), or None on a miss.
+        """
+        key = cls._key(chain, address)
+        entry = cls._local.get(key)
+        if entry is None:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    if watch:
+                        pipe.zadd(
+                            cls.WATCH_KEY, {f"{chain}|{address.lower()}": time.time()}
+                        )
+                    raw, *_ = await pipe.execute()
+            except RedisError as e:
+                logging.warning(e)
+                return None
+
+            if raw is None:
+                return None
+
+            entry = json.loads(raw)
+            cls._local.set(key, entry)
+
+        return entry["data"], entry["fetched_at"]
+
+    @classmethod
+    async def set(cls, chain: str, address: str, data: dict) -> None:
+        key = cls._key(chain, address)
+        entry = {"data": data, "fetched_at": time.time()}
+
+        cls._local.set(key, entry)
+        try:
+            await redis_client.set(
+                key,
+                json.dumps(entry),
+                ex=cls.ttl(chain) + settings.BALANCE_CACHE_STALE_SECONDS,
+            )
+        except RedisError as e:
+            logging.warning(e)
+
+    @classmethod
+    async def watched(cls, since: float) -> List[Tuple[str, str]]:
+        """
+        Return (chain, address) pairs looked up since `since`; drop older ones.
+        """
+        async with redis_client.pipeline(transaction=False) as pipe:
+            members, _ = await (
+                pipe.zrangebyscore(cls.WATCH_KEY, since, "+inf")
+                .zremrangebyscore(cls.WATCH_KEY, "-inf", f"({since}")
+                .execute()
+            )
+        return [tuple(member.split("|", 1)) for member in members]
+
+    @classmethod
+    async def claim_refresh(cls, chain: str, address: str) -> bool:
+        """
+        Return True if this worker should refresh the entry.
+
+        Only one worker gets the short refresh lock at a time; without
+        Redis every worker refreshes on its own.
+        """
+        try:
+            return bool(
+                await redis_client.set(
+                    f"{cls._key(chain, address)}:refresh",
+                    1,
+                    nx=True,
+                    ex=settings.BALANCE_CACHE_REFRESH_LOCK_SECONDS,
+                )
+            )
+        except RedisError as e:
+            logging.warning(e)
+            return True
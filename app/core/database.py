@@ -1,21 +1,179 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Annotated, AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import URL, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.models import Base
 
 from .settings import settings
 
 DATABASE_URL = settings.build_postgres_dsn()
 
-engine = create_async_engine(DATABASE_URL, echo=settings.DB_ECHO)
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+class QueryCounter:
+    """
+    Count the SQL statements executed by any engine in the current context.
+
+    Usage:
+        with QueryCounter() as counter:
+            ...
+        counter.count
+    """
+
+    _current: ContextVar[Optional["QueryCounter"]] = ContextVar(
+        "query_counter", default=None
+    )
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __enter__(self) -> "QueryCounter":
+        self._token = self._current.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._current.reset(self._token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = QueryCounter._current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def build_engine(url: URL) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+        connect_args={"statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE},
+    )
+
+
+class ReplicaRouter:
+    """
+    Pick a read replica engine by round-robin or least checked-out connections.
+
+    Replicas that fail the periodic health check, or lag the primary by
+    more than POSTGRES_REPLICA_MAX_LAG_SECONDS, are skipped until they
+    recover; with none left, reads fall back to the primary.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], strategy: str, max_lag: float):
+        self.engines = engines
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.healthy = list(engines)
+        self._counter = itertools.count()
+
+    def choose(self) -> Optional[AsyncEngine]:
+        healthy = self.healthy
+        if not healthy:
+            return None
+
+        if self.strategy == "least_connections":
+            return min(healthy, key=lambda replica: replica.pool.checkedout())
+
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check(self) -> None:
+        healthy = []
+        for replica in self.engines:
+            try:
+                async with replica.connect() as conn:
+                    lag = await conn.scalar(REPLICA_LAG_QUERY)
+            except Exception as e:
+                logging.warning(e)
+                continue
+
+            if lag <= self.max_lag:
+                healthy.append(replica)
+            else:
+                logging.warning(f"Replica {replica.url.host} lags by {lag}s")
+
+        self.healthy = healthy
+
+    async def monitor(self) -> None:
+        """
+        Re-check replica health for the lifetime of the application.
+        """
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.POSTGRES_REPLICA_CHECK_SECONDS)
+
+
+engine = build_engine(DATABASE_URL)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+replica_router = ReplicaRouter(
+    [build_engine(url) for url in settings.build_replica_dsns()],
+    strategy=settings.POSTGRES_REPLICA_ROUTING,
+    max_lag=settings.POSTGRES_REPLICA_MAX_LAG_SECONDS,
+)
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], Awaitable]) -> None:
+    """
+    Run `callback` once the unit of work owning `session` has committed.
+    """
+    session.info.setdefault("after_commit", []).append(callback)
 
-async def init_models():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
 
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    """
+    Open a session with a single transaction, committed once on success.
 
-async def get_session() -> AsyncSession:
+    Repositories only flush; callbacks registered with `on_commit` run
+    after the commit and are dropped on rollback.
+    """
     async with async_session() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+    for callback in session.info.pop("after_commit", []):
+        await callback()
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    async with unit_of_work() as session:
+        yield session
+
+
+async def get_read_session(
+    session: Annotated[AsyncSession, Depends(get_session)],
+) -> AsyncIterator[AsyncSession]:
+    """
+    Yield a session on a healthy read replica, or the request session if none.
+
+    Only use it for reads that tolerate replication lag.
+    """
+    replica = replica_router.choose()
+    if replica is None:
         yield session
+        return
+
+    async with async_session(bind=replica) as read_session:
+        yield read_session
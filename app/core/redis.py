@@ -0,0 +1,5 @@
+from redis import asyncio as aioredis
+
+from .settings import settings
+
+redis_client = aioredis.from_url(settings.build_redis_dsn(), decode_responses=True)
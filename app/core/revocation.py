@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.utils.bloom import BloomFilter
+
+from .redis import redis_client
+from .settings import settings
+
+
+class RevocationStore:
+    """
+    Revoked sessions and consumed refresh-token ids, kept in Redis with a TTL.
+
+    Each process keeps a Bloom filter of revoked ids, fed by a Redis
+    pub/sub channel, so the common "not revoked" check needs no round trip.
+    """
+
+    CHANNEL = "revocations"
+
+    _bloom = BloomFilter(
+        capacity=settings.REVOCATION_BLOOM_CAPACITY,
+        error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    )
+
+    @staticmethod
+    def _revoked_key(token_id: str) -> str:
+        return f"revoked:{token_id}"
+
+    @staticmethod
+    def _used_key(token_id: str) -> str:
+        return f"used:{token_id}"
+
+    @classmethod
+    async def revoke(cls, token_id: str, ttl: int) -> None:
+        """
+        Revoke `token_id` for `ttl` seconds, the lifetime of its longest token.
+        """
+        cls._bloom.add(token_id)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            await (
+                pipe.set(cls._revoked_key(token_id), 1, ex=ttl)
+                .publish(cls.CHANNEL, token_id)
+                .execute()
+            )
+
+    @classmethod
+    async def is_revoked(cls, token_id: Optional[str]) -> bool:
+        if token_id is None or token_id not in cls._bloom:
+            return False
+
+        try:
+            return bool(await redis_client.exists(cls._revoked_key(token_id)))
+        except RedisError as e:
+            logging.warning(e)
+            return True
+
+    @classmethod
+    async def consume(cls, token_id: str, ttl: int) -> bool:
+        """
+        Atomically mark a single-use token id as used.
+
+        Returns False if it had already been used.
+        """
+        return bool(await redis_client.set(cls._used_key(token_id), 1, nx=True, ex=ttl))
+
+    @classmethod
+    async def _reload(cls) -> None:
+        bloom = BloomFilter(
+            capacity=settings.REVOCATION_BLOOM_CAPACITY,
+            error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+        )
+        async for key in redis_client.scan_iter(match=cls._revoked_key("*")):
+            bloom.add(key.split(":", 1)[1])
+        cls._bloom = bloom
+
+    @classmethod
+    async def listen(cls) -> None:
+        """
+        Keep the local Bloom filter in sync with revocations from other workers.
+
+        Runs for the lifetime of the application.
+        """
+        while True:
+            try:
+                async with redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(cls.CHANNEL)
+                    await cls._reload()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        cls._bloom.add(message["data"])
+                        if cls._bloom.count > cls._bloom.capacity:
+                            await cls._reload()
+            except RedisError as e:
+                logging.warning(e)
+                await asyncio.sleep(settings.REVOCATION_RECONNECT_SECONDS)
@@ -1,5 +1,7 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings
-from sqlalchemy import URL
+from sqlalchemy import URL, make_url
 
 
 class Settings(BaseSettings):
@@ -15,6 +17,18 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int
     POSTGRES_DB: str
 
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: int = 30
+    POSTGRES_POOL_RECYCLE: int = 1_800
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+
+    POSTGRES_REPLICA_DSNS: str = ""
+    POSTGRES_REPLICA_ROUTING: str = "round_robin"
+    POSTGRES_REPLICA_MAX_LAG_SECONDS: float = 5
+    POSTGRES_REPLICA_CHECK_SECONDS: float = 10
+
     JWT_USER_SECRET_KEY: str
     JWT_VERIFY_SECRET_KEY: str
     JWT_RESET_PASSWORD_SECRET_KEY: str
@@ -26,6 +40,82 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_DATABASE: str
 
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS: int = 5
+    PRINCIPAL_CACHE_MAXSIZE: int = 10_000
+
+    PASSWORD_HASHING_WORKERS: int = 4
+    PASSWORD_HASHING_MAX_PENDING: int = 64
+
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_RECONNECT_SECONDS: int = 5
+
+    CRYPTO_ENGINE_WORKERS: int = 2
+    CRYPTO_ENGINE_BATCH_SIZE: int = 16
+    CRYPTO_ENGINE_BATCH_WINDOW_SECONDS: float = 0.005
+
+    WALLET_POOL_ENCRYPTION_KEY: str = ""
+    WALLET_POOL_LOW_WATER: int = 100
+    WALLET_POOL_HIGH_WATER: int = 500
+    WALLET_POOL_BATCH_SIZE: int = 50
+    WALLET_POOL_REFILL_SECONDS: int = 30
+
+    HD_ACCOUNT_CACHE_SIZE: int = 1024
+    HD_CHILD_CACHE_SIZE: int = 10_000
+    HD_DERIVE_MAX_COUNT: int = 100
+    WALLET_BATCH_MAX_COUNT: int = 500
+
+    DISCOVERY_GAP_LIMIT: int = 20
+    DISCOVERY_MAX_INDEX: int = 1000
+    DISCOVERY_CONCURRENCY: int = 16
+    DISCOVERY_PROBE_ATTEMPTS: int = 3
+
+    BALANCE_CACHE_TTL_SECONDS: int = 30
+    BALANCE_CACHE_CHAIN_TTLS: str = ""
+    BALANCE_CACHE_STALE_SECONDS: int = 300
+    BALANCE_CACHE_LOCAL_TTL_SECONDS: float = 2
+    BALANCE_CACHE_MAXSIZE: int = 10_000
+    BALANCE_CACHE_REFRESH_LOCK_SECONDS: int = 10
+
+    BALANCE_PREWARM_SECONDS: int = 20
+    BALANCE_PREWARM_ACTIVE_SECONDS: int = 900
+    BALANCE_PREWARM_CHUNK_SIZE: int = 20
+    BALANCE_PREWARM_RATE_PER_SECOND: float = 10
+
+    SINGLE_FLIGHT_LOCK_SECONDS: int = 10
+    SINGLE_FLIGHT_RESULT_SECONDS: int = 2
+    SINGLE_FLIGHT_POLL_SECONDS: float = 0.05
+
+    PORTFOLIO_PROVIDER_CONCURRENCY: int = 16
+    PORTFOLIO_CALL_TIMEOUT_SECONDS: float = 5
+
+    TRANSACTIONS_PAGE_SIZE: int = 50
+    TRANSACTIONS_PAGE_MAX_SIZE: int = 200
+    TRANSACTION_SYNC_MAX_AGE_SECONDS: int = 30
+    TRANSACTION_SYNC_SECONDS: int = 60
+    TRANSACTION_SYNC_BATCH_SIZE: int = 100
+    TRANSACTION_SYNC_ACTIVE_SECONDS: int = 604800
+    TRANSACTION_CONFIRMATION_DEPTH: int = 12
+    TRANSACTION_CONFIRMATION_DEPTHS: str = ""
+
+    TRANSACTOR_WARM_CHAINS: str = ""
+    TRANSFER_LONG_POLL_MAX_SECONDS: int = 30
+    TRANSFER_STALE_SECONDS: int = 300
+    TRANSFER_SWEEP_SECONDS: int = 60
+    TRANSFER_SWEEP_BATCH_SIZE: int = 500
+
+    CHAIN_RPC_URLS: str = ""
+    RPC_TIMEOUT_SECONDS: int = 10
+    RPC_POOL_SIZE: int = 20
+    RPC_BATCH_SIZE: int = 100
+    NONCE_BATCH_WINDOW_SECONDS: float = 0.002
+    NONCE_RESYNC_SECONDS: int = 30
+    NONCE_STALE_SECONDS: int = 120
+
+    TRANSFER_BATCH_MAX_ITEMS: int = 500
+    TRANSFER_BATCH_STALE_SECONDS: int = 300
+
     EMAIL_SERVER: str
     EMAIL_PORT: int
     EMAIL_PASSWORD: str
@@ -37,9 +127,50 @@ class Settings(BaseSettings):
             username=self.POSTGRES_USER,
             password=self.POSTGRES_PASSWORD,
             host=self.POSTGRES_HOST,
+            port=self.POSTGRES_PORT,
             database=self.POSTGRES_DB,
+            query={
+                "prepared_statement_cache_size": str(self.POSTGRES_STATEMENT_CACHE_SIZE)
+            },
         )
 
+    def build_replica_dsns(self) -> List[URL]:
+        return [
+            make_url(dsn.strip())
+            for dsn in self.POSTGRES_REPLICA_DSNS.split(",")
+            if dsn.strip()
+        ]
+
+    @staticmethod
+    def _parse_chain_values(value: str) -> Dict[str, int]:
+        values = {}
+        for item in value.split(","):
+            if item.strip():
+                chain, number = item.split("=")
+                values[chain.strip()] = int(number)
+        return values
+
+    def build_balance_cache_ttls(self) -> Dict[str, int]:
+        return self._parse_chain_values(self.BALANCE_CACHE_CHAIN_TTLS)
+
+    def build_confirmation_depths(self) -> Dict[str, int]:
+        return self._parse_chain_values(self.TRANSACTION_CONFIRMATION_DEPTHS)
+
+    def build_transactor_warm_chains(self) -> List[str]:
+        return [
+            chain.strip()
+            for chain in self.TRANSACTOR_WARM_CHAINS.split(",")
+            if chain.strip()
+        ]
+
+    def build_chain_rpc_urls(self) -> Dict[str, str]:
+        urls = {}
+        for item in self.CHAIN_RPC_URLS.split(","):
+            if item.strip():
+                chain, url = item.split("=", 1)
+                urls[chain.strip()] = url.strip()
+        return urls
+
     def build_redis_dsn(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DATABASE}"
 
@@ -1,3 +1,27 @@
-from .liquid import WalletGeneratorService, CheckerService, TransactionService
+from .liquid import (
+    WalletGeneratorService,
+    CheckerService,
+    TransactionService,
+    TransactorRegistry,
+)
+from .hd_wallet import HDWalletService
+from .discovery import AccountDiscoveryService
+from .crypto_engine import CryptoEngine
+from .evm import BroadcastUnknown, EvmTransactor, RpcClient, RpcError
+from .nonce import NonceManager, nonce_manager
 
-__all__ = ["WalletGeneratorService", "CheckerService", "TransactionService"]
+__all__ = [
+    "WalletGeneratorService",
+    "CheckerService",
+    "TransactionService",
+    "TransactorRegistry",
+    "HDWalletService",
+    "AccountDiscoveryService",
+    "CryptoEngine",
+    "BroadcastUnknown",
+    "EvmTransactor",
+    "RpcClient",
+    "RpcError",
+    "NonceManager",
+    "nonce_manager",
+]
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from lqd_services import WalletGenerator, MnemonicGenerator
+
+from app.core.settings import settings
+from app.utils.metrics import metrics
+
+from .evm import EvmTransactor
+from .hd_wallet import HDWalletService
+
+
+async def _generate() -> Tuple[str, Dict]:
+    mnemonics = await MnemonicGenerator.generate_bip39_phrase()
+    secrets = await WalletGenerator(depth=1).generate_secrets(mnemonics)
+    return mnemonics, secrets
+
+
+async def _recover(mnemonics: str) -> Dict:
+    return await WalletGenerator(depth=1).generate_secrets(mnemonics)
+
+
+async def _create_account() -> Tuple[str, str]:
+    mnemonics = await MnemonicGenerator.generate_bip39_phrase()
+    return mnemonics, HDWalletService.account_key(mnemonics)
+
+
+async def _account_key(mnemonics: str) -> str:
+    return HDWalletService.account_key(mnemonics)
+
+
+async def _sign(argument: Tuple[str, List[dict]]) -> List[Tuple[str, str]]:
+    private_key, transactions = argument
+    return [
+        EvmTransactor.sign(private_key, transaction) for transaction in transactions
+    ]
+
+
+JOBS = {
+    "generate": lambda _: _generate(),
+    "recover": _recover,
+    "account": lambda _: _create_account(),
+    "account_key": _account_key,
+    "sign": _sign,
+}
+
+
+def _warm_up() -> None:
+    """
+    Worker initializer: pay module import costs before the first job arrives.
+
+    Also submitted once per worker at start, which makes the pool spawn
+    all of its processes up front.
+    """
+    import lqd_services  # noqa: F401
+
+
+def _run_batch(jobs: List[Tuple[str, Any]]) -> List[Tuple[bool, Any, float]]:
+    """
+    Run several derivation jobs in one worker round trip.
+
+    Returns (ok, result or error message, seconds) per job.
+    """
+
+    async def run_all():
+        results = []
+        for kind, argument in jobs:
+            started_at = time.perf_counter()
+            try:
+                result = await JOBS[kind](argument)
+                results.append((True, result, time.perf_counter() - started_at))
+            except Exception as e:
+                results.append((False, repr(e), time.perf_counter() - started_at))
+        return results
+
+    return asyncio.run(run_all())
+
+
+class CryptoEngine:
+    """
+    Runs mnemonic generation and seed/key derivation on a process pool.
+
+    Jobs submitted within BATCH_WINDOW of each other are sent to a worker
+    together, up to BATCH_SIZE per round trip. With zero workers, jobs run
+    inline on the event loop.
+    """
+
+    def __init__(self, workers: int, batch_size: int, batch_window: float) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[str, Any, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._dispatching: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._executor is not None or self.workers <= 0:
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def generate(self) -> Tuple[str, Dict]:
+        """
+        Generate a fresh BIP39 phrase and derive its secrets.
+        """
+        return await self._submit("generate", None)
+
+    async def generate_many(self, count: int) -> List[Tuple[str, Dict]]:
+        return await asyncio.gather(*(self.generate() for _ in range(count)))
+
+    async def recover(self, mnemonics: str) -> Dict:
+        return await self._submit("recover", mnemonics)
+
+    async def create_account(self) -> Tuple[str, str]:
+        """
+        Generate a fresh BIP39 phrase and its account-level extended key.
+        """
+        return await self._submit("account", None)
+
+    async def account_key(self, mnemonics: str) -> str:
+        return await self._submit("account_key", mnemonics)
+
+    async def sign_many(
+        self, private_key: str, transactions: List[dict]
+    ) -> List[Tuple[str, str]]:
+        """
+        Sign transactions in parallel; returns (raw, hash) per transaction.
+
+        The transactions are split evenly across the workers and each part
+        goes straight to the pool: the batcher would pack the parts into a
+        single worker round trip and sign them one after another.
+        """
+        if self.workers <= 0 or not transactions:
+            return await _sign((private_key, transactions))
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        size = -(-len(transactions) // self.workers)
+        started_at = time.perf_counter()
+        parts = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._executor,
+                    _run_batch,
+                    [("sign", (private_key, transactions[start : start + size]))],
+                )
+                for start in range(0, len(transactions), size)
+            )
+        )
+        metrics.observe("crypto.sign.run", time.perf_counter() - started_at)
+
+        signatures = []
+        for ((ok, result, _),) in parts:
+            if not ok:
+                raise RuntimeError(result)
+            signatures.extend(result)
+        return signatures
+
+    async def _submit(self, kind: str, argument: Any) -> Any:
+        if self.workers <= 0:
+            started_at = time.perf_counter()
+            try:
+                return await JOBS[kind](argument)
+            finally:
+                metrics.observe(f"crypto.{kind}.run", time.perf_counter() - started_at)
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((kind, argument, future, time.perf_counter()))
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, Any, asyncio.Future, float]]):
+        loop = asyncio.get_running_loop()
+        dispatched_at = time.perf_counter()
+        metrics.increment("crypto.batches")
+        metrics.increment("crypto.jobs", len(batch))
+
+        try:
+            results = await loop.run_in_executor(
+                self._executor,
+                _run_batch,
+                [(kind, argument) for kind, argument, _, _ in batch],
+            )
+        except Exception as e:
+            logging.error(e)
+            for *_, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        round_trip = time.perf_counter() - dispatched_at
+        metrics.observe("crypto.batch.round_trip", round_trip)
+
+        for (kind, _, future, queued_at), (ok, result, seconds) in zip(batch, results):
+            metrics.observe(f"crypto.{kind}.wait", dispatched_at - queued_at)
+            metrics.observe(f"crypto.{kind}.run", seconds)
+            if future.done():
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+
+crypto_engine = CryptoEngine(
+    workers=settings.CRYPTO_ENGINE_WORKERS,
+    batch_size=settings.CRYPTO_ENGINE_BATCH_SIZE,
+    batch_window=settings.CRYPTO_ENGINE_BATCH_WINDOW_SECONDS,
+)
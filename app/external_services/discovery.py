@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Iterable, List, Tuple
+
+from app.core.settings import settings
+from app.schemas.transactor_scheme import TransactorParsedData
+
+from .hd_wallet import HDWalletService
+from .liquid import CheckerService
+
+
+class AccountDiscoveryService:
+    """
+    BIP44 account discovery: find the used addresses of an HD account.
+
+    Candidate addresses are probed a gap-limit sized batch at a time, every
+    (address, chain) pair of a batch concurrently, and the scan stops once
+    DISCOVERY_GAP_LIMIT addresses in a row have no history on any chain.
+    Addresses whose probes keep failing stop the scan with an error instead
+    of counting as unused.
+    """
+
+    @staticmethod
+    async def _probe(address: str, chain: str, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            history = await CheckerService.fetch_transactions(
+                address=address, chain_name=chain
+            )
+        return bool(TransactorParsedData.model_validate(history).items)
+
+    @classmethod
+    async def _are_used(
+        cls, addresses: List[str], chains: List[str], semaphore: asyncio.Semaphore
+    ) -> List[bool]:
+        """
+        Whether each address has history on any of `chains`.
+
+        A failed probe leaves its address unknown rather than unused, and is
+        retried up to DISCOVERY_PROBE_ATTEMPTS times in all.
+        """
+        used = set()
+        pending = [(address, chain) for address in addresses for chain in chains]
+        for _ in range(settings.DISCOVERY_PROBE_ATTEMPTS):
+            results = await asyncio.gather(
+                *(cls._probe(address, chain, semaphore) for address, chain in pending),
+                return_exceptions=True,
+            )
+            failed = []
+            for (address, chain), result in zip(pending, results):
+                if isinstance(result, Exception):
+                    logging.warning(result)
+                    failed.append((address, chain))
+                elif result:
+                    used.add(address)
+            pending = [
+                (address, chain) for address, chain in failed if address not in used
+            ]
+            if not pending:
+                return [address in used for address in addresses]
+
+        raise RuntimeError(f"Unable To Probe {len(pending)} Addresses")
+
+    @classmethod
+    async def discover(
+        cls, extended_key: str, chains: Iterable[str]
+    ) -> List[Tuple[int, str, str]]:
+        """
+        Return (index, address, private_key) of every used address.
+        """
+        chains = list(chains)
+        gap_limit = settings.DISCOVERY_GAP_LIMIT
+        semaphore = asyncio.Semaphore(settings.DISCOVERY_CONCURRENCY)
+
+        used = []
+        start, last_used = 0, -1
+        while start - last_used <= gap_limit and start < settings.DISCOVERY_MAX_INDEX:
+            candidates = HDWalletService.derive_range(extended_key, start, gap_limit)
+            flags = await cls._are_used(
+                [address for address, _ in candidates], chains, semaphore
+            )
+            for offset, ((address, private_key), is_used) in enumerate(
+                zip(candidates, flags)
+            ):
+                if is_used:
+                    used.append((start + offset, address, private_key))
+                    last_used = start + offset
+            start += gap_limit
+
+        return used
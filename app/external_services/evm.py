@@ -0,0 +1,302 @@
+import itertools
+from typing import Any, List, Optional, Sequence, Tuple
+
+import httpx
+from eth_account import Account
+
+from app.core.settings import settings
+
+from .nonce import nonce_manager
+
+# transfer(address,uint256)
+TRANSFER_SELECTOR = "a9059cbb"
+NATIVE_TRANSFER_GAS = 21_000
+# Head room over eth_estimateGas for token transfers, in percent.
+GAS_LIMIT_MARGIN = 20
+
+
+class RpcError(Exception):
+    """
+    An error object returned by the node for one JSON-RPC call.
+    """
+
+    def __init__(self, error: dict) -> None:
+        self.code = error.get("code")
+        self.message = str(error.get("message", ""))
+        super().__init__(self.message)
+
+    @property
+    def unanswered(self) -> bool:
+        """
+        True when the node sent no response for the call at all.
+        """
+        return self.code is None
+
+    @property
+    def nonce_too_low(self) -> bool:
+        return "nonce too low" in self.message.lower()
+
+    @property
+    def already_known(self) -> bool:
+        message = self.message.lower()
+        return "already known" in message or "known transaction" in message
+
+
+class BroadcastUnknown(Exception):
+    """
+    A broadcast got no answer: the node may or may not have the transaction.
+
+    Its nonce stays reserved, so no other transfer can replace it.
+    """
+
+    def __init__(self, tx_hash: str, nonce: int) -> None:
+        self.tx_hash = tx_hash
+        self.nonce = nonce
+        super().__init__("Broadcast Outcome Unknown")
+
+
+class RpcClient:
+    """
+    JSON-RPC over one keep-alive connection pool per node.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._ids = itertools.count(1)
+        self._client = httpx.AsyncClient(
+            timeout=settings.RPC_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.RPC_POOL_SIZE,
+                max_keepalive_connections=settings.RPC_POOL_SIZE,
+            ),
+        )
+
+    async def call(self, method: str, *params: Any) -> Any:
+        (result,) = await self.batch([(method, list(params))])
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    async def batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """
+        Send `calls` as JSON-RPC batches of up to RPC_BATCH_SIZE.
+
+        Returns a result or an RpcError per call, in order.
+        """
+        results = []
+        for start in range(0, len(calls), settings.RPC_BATCH_SIZE):
+            results.extend(
+                await self._post(calls[start : start + settings.RPC_BATCH_SIZE])
+            )
+        return results
+
+    async def _post(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        requests = [
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": p}
+            for method, p in calls
+        ]
+        response = await self._client.post(
+            self.url, json=requests if len(requests) > 1 else requests[0]
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if isinstance(payload, dict):
+            payload = [payload]
+
+        responses = {item.get("id"): item for item in payload}
+        results = []
+        for request in requests:
+            item = responses.get(request["id"])
+            if item is None:
+                results.append(RpcError({"message": "Missing Response"}))
+            elif "error" in item:
+                results.append(RpcError(item["error"]))
+            else:
+                results.append(item.get("result"))
+        return results
+
+
+class EvmTransactor:
+    """
+    Signs EVM transfers locally and broadcasts them through the chain's node.
+
+    Used instead of the Transactor for chains with an RPC URL in
+    CHAIN_RPC_URLS, because it takes its nonces from the nonce manager:
+    parallel sends from one wallet are pipelined rather than colliding.
+    """
+
+    def __init__(self, chain_name: str, url: str) -> None:
+        self.chain_name = chain_name
+        self.rpc = RpcClient(url)
+        self._chain_id: Optional[int] = None
+
+    async def warm_up(self) -> None:
+        await self.chain_id()
+
+    async def chain_id(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = int(await self.rpc.call("eth_chainId"), 16)
+        return self._chain_id
+
+    async def pending_nonce(self, address: str) -> int:
+        return int(
+            await self.rpc.call("eth_getTransactionCount", address, "pending"), 16
+        )
+
+    async def gas_price(self) -> int:
+        return int(await self.rpc.call("eth_gasPrice"), 16)
+
+    async def recover(self, raw: str) -> bool:
+        """
+        Broadcast a signed transaction again whose nonce the chain is stuck on.
+
+        Returns False only when the node rejects it, so the nonce can go to
+        another transfer. If the node takes it, already has it, has another
+        transaction on its nonce or does not answer, the nonce stays with it.
+        """
+        try:
+            await self.rpc.call("eth_sendRawTransaction", raw)
+        except httpx.HTTPError:
+            return True
+        except RpcError as e:
+            return (
+                e.unanswered
+                or e.already_known
+                or e.nonce_too_low
+                or "replacement" in e.message.lower()
+            )
+        return True
+
+    @staticmethod
+    def transfer_data(to_address: str, amount: int) -> str:
+        return f"0x{TRANSFER_SELECTOR}{to_address[2:].lower():0>64}{amount:064x}"
+
+    @staticmethod
+    def sign(private_key: str, transaction: dict) -> Tuple[str, str]:
+        """
+        Return (raw transaction, transaction hash), both 0x-prefixed hex.
+        """
+        signed = Account.sign_transaction(transaction, private_key)
+        return signed.rawTransaction.hex(), signed.hash.hex()
+
+    @classmethod
+    def estimate_call(
+        cls, from_address: str, to_address: str, amount: int, contract_address: str
+    ) -> Tuple[str, list]:
+        """
+        The eth_estimateGas call of a token transfer, for RpcClient.batch.
+        """
+        data = cls.transfer_data(to_address, amount)
+        return (
+            "eth_estimateGas",
+            [{"from": from_address, "to": contract_address, "data": data}],
+        )
+
+    @staticmethod
+    def gas_limit(estimate: str) -> int:
+        return int(estimate, 16) * (100 + GAS_LIMIT_MARGIN) // 100
+
+    @classmethod
+    def transaction(
+        cls,
+        chain_id: int,
+        gas_price: int,
+        to_address: str,
+        amount: int,
+        contract_address: Optional[str] = None,
+        gas: int = NATIVE_TRANSFER_GAS,
+    ) -> dict:
+        """
+        Build an unsigned transfer, without its nonce.
+        """
+        transaction = {"chainId": chain_id, "gasPrice": gas_price, "gas": gas}
+        if contract_address is None:
+            return {**transaction, "to": to_address, "value": amount}
+        return {
+            **transaction,
+            "to": contract_address,
+            "value": 0,
+            "data": cls.transfer_data(to_address, amount),
+        }
+
+    async def send(
+        self,
+        from_private_key: str,
+        from_address: str,
+        to_address: str,
+        amount: int,
+        contract_address: Optional[str] = None,
+    ) -> str:
+        """
+        Sign and broadcast a transfer; returns its transaction hash.
+        """
+        gas = NATIVE_TRANSFER_GAS
+        if contract_address is not None:
+            method, params = self.estimate_call(
+                from_address, to_address, amount, contract_address
+            )
+            gas = self.gas_limit(await self.rpc.call(method, *params))
+        transaction = self.transaction(
+            await self.chain_id(),
+            await self.gas_price(),
+            to_address,
+            amount,
+            contract_address,
+            gas,
+        )
+
+        async def chain_nonce() -> int:
+            return await self.pending_nonce(from_address)
+
+        # Without an answer the node may have taken the transaction, so its
+        # nonce stays reserved; only a definite rejection releases it. If the
+        # node did not take it, the chain gets stuck on the nonce and after
+        # NONCE_STALE_SECONDS a resync broadcasts it again through `recover`.
+        for attempt in range(2):
+            nonce = await nonce_manager.reserve(
+                self.chain_name, from_address, chain_nonce, self.recover
+            )
+            raw, tx_hash = self.sign(from_private_key, {**transaction, "nonce": nonce})
+            await nonce_manager.record(self.chain_name, from_address, {nonce: raw})
+            try:
+                await self.rpc.call("eth_sendRawTransaction", raw)
+                return tx_hash
+            except httpx.HTTPError as e:
+                raise BroadcastUnknown(tx_hash, nonce) from e
+            except RpcError as e:
+                if e.already_known:
+                    return tx_hash
+                if e.unanswered:
+                    raise BroadcastUnknown(tx_hash, nonce) from e
+                if e.nonce_too_low and attempt == 0:
+                    await nonce_manager.resync(
+                        self.chain_name,
+                        from_address,
+                        await chain_nonce(),
+                        self.recover,
+                    )
+                    continue
+                if not e.nonce_too_low:
+                    await nonce_manager.release(self.chain_name, from_address, nonce)
+                raise
+
+    async def send_native(
+        self, from_private_key: str, from_address: str, to_address: str, amount: int
+    ) -> bool:
+        await self.send(from_private_key, from_address, to_address, amount)
+        return True
+
+    async def send_erc20(
+        self,
+        contract_address: str,
+        from_private_key: str,
+        from_address: str,
+        to_address: str,
+        amount: int,
+    ) -> bool:
+        await self.send(
+            from_private_key, from_address, to_address, amount, contract_address
+        )
+        return True
+
+    send_bep20 = send_erc20
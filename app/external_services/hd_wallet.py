@@ -0,0 +1,77 @@
+import hashlib
+import hmac
+import struct
+from functools import lru_cache
+from typing import List, Tuple
+
+from bip32utils import BIP32Key, BIP32_HARDEN
+from eth_keys import keys
+from mnemonic import Mnemonic
+
+from app.core.settings import settings
+
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+# m/44'/60'/0'/0, the external chain of the first Ethereum account.
+ACCOUNT_PATH = (44 + BIP32_HARDEN, 60 + BIP32_HARDEN, 0 + BIP32_HARDEN, 0)
+
+
+@lru_cache(maxsize=settings.HD_ACCOUNT_CACHE_SIZE)
+def _account(extended_key: str) -> Tuple[int, bytes, bytes]:
+    key = BIP32Key.fromExtendedKey(extended_key)
+    private_key = key.PrivateKey()
+    public_key = keys.PrivateKey(private_key).public_key.to_compressed_bytes()
+    return int.from_bytes(private_key, "big"), key.ChainCode(), public_key
+
+
+@lru_cache(maxsize=settings.HD_CHILD_CACHE_SIZE)
+def _child(extended_key: str, index: int) -> Tuple[str, str]:
+    parent_key, chain_code, parent_public_key = _account(extended_key)
+    digest = hmac.new(
+        chain_code, parent_public_key + struct.pack(">L", index), hashlib.sha512
+    ).digest()
+
+    tweak = int.from_bytes(digest[:32], "big")
+    child_key = (tweak + parent_key) % SECP256K1_ORDER
+    if tweak >= SECP256K1_ORDER or child_key == 0:
+        raise ValueError(f"Invalid Child Key At Index {index}")
+
+    private_key = keys.PrivateKey(child_key.to_bytes(32, "big"))
+    return private_key.public_key.to_checksum_address(), private_key.to_hex()
+
+
+class HDWalletService:
+    """
+    BIP44 address derivation from an account-level extended key.
+
+    Deriving the account key from a mnemonic (PBKDF2 plus the hardened
+    steps) is done once per user; each address after that costs one
+    HMAC-SHA512 and one scalar multiplication, and is memoized.
+    """
+
+    @staticmethod
+    def account_key(mnemonics: str) -> str:
+        """
+        Return the extended private key at ACCOUNT_PATH for `mnemonics`.
+        """
+        key = BIP32Key.fromEntropy(Mnemonic.to_seed(mnemonics))
+        for index in ACCOUNT_PATH:
+            key = key.ChildKey(index)
+        return key.ExtendedKey()
+
+    @staticmethod
+    def derive(extended_key: str, index: int) -> Tuple[str, str]:
+        """
+        Return (address, private_key) of the non-hardened child at `index`.
+        """
+        if not 0 <= index < BIP32_HARDEN:
+            raise ValueError(f"Invalid Child Index {index}")
+        return _child(extended_key, index)
+
+    @classmethod
+    def derive_range(
+        cls, extended_key: str, start: int, count: int
+    ) -> List[Tuple[str, str]]:
+        return [
+            cls.derive(extended_key, index) for index in range(start, start + count)
+        ]
@@ -1,31 +1,182 @@
-from lqd_services import WalletGenerator, MnemonicGenerator, Checker, Transactor
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Set, Tuple, Union
+
+from lqd_services import AvailableChainNodes, WalletGenerator, Checker, Transactor
+
+from app.core.cache import BalanceCache
+from app.core.settings import settings
+from app.schemas.checker_scheme import CheckerParsedData
+from app.utils.metrics import metrics
+
+from .crypto_engine import crypto_engine
+from .evm import EvmTransactor
+from .single_flight import SingleFlight
 
 
 class WalletGeneratorService:
+    """
+    Wallet secret generation, delegated to the process-pool crypto engine.
+    """
 
     @classmethod
     async def generate(cls) -> WalletGenerator:
         self = cls()
-        self.wallet_generator = WalletGenerator(depth=1)
-        self.mnemonics = await MnemonicGenerator.generate_bip39_phrase()
-        self.secrets = await self.wallet_generator.generate_secrets(self.mnemonics)
+        self.mnemonics, self.secrets = await crypto_engine.generate()
 
         return self
 
+    @classmethod
+    async def generate_many(cls, count: int) -> list:
+        generated = []
+        for mnemonics, secrets in await crypto_engine.generate_many(count):
+            self = cls()
+            self.mnemonics, self.secrets = mnemonics, secrets
+            generated.append(self)
+
+        return generated
+
     @staticmethod
     async def recover(mnemonics: str) -> WalletGenerator:
-        return await WalletGenerator(depth=1).generate_secrets(mnemonics)
+        return await crypto_engine.recover(mnemonics)
+
+    @staticmethod
+    async def create_account() -> Tuple[str, str]:
+        """
+        Return (mnemonics, account extended key) for a new HD account.
+        """
+        return await crypto_engine.create_account()
+
+    @staticmethod
+    async def account_key(mnemonics: str) -> str:
+        """
+        Return the account extended key of an existing phrase.
+        """
+        return await crypto_engine.account_key(mnemonics)
 
 
 class CheckerService:
+    _balances_flight = SingleFlight("balances")
+    _transactions_flight = SingleFlight("transactions")
+    _refreshing: Set[Tuple[str, str]] = set()
+    _refresh_tasks: Set[asyncio.Task] = set()
 
-    @staticmethod
-    async def fetch_balances(address: str, chain_name: str) -> Checker:
-        return await Checker.fetch_balances(address=address, chain_name=chain_name)
+    @classmethod
+    async def fetch_balances(cls, address: str, chain_name: str) -> dict:
+        return await cls._balances_flight.do(
+            f"{chain_name}:{address.lower()}",
+            lambda: Checker.fetch_balances(address=address, chain_name=chain_name),
+        )
 
-    @staticmethod
-    async def fetch_transactions(address: str, chain_name: str) -> Checker:
-        return await Checker.fetch_transactions(address=address, chain_name=chain_name)
+    @classmethod
+    async def fetch_balances_cached(
+        cls, address: str, chain_name: str
+    ) -> Tuple[dict, float, str]:
+        """
+        Return (balances, age in seconds, cache status) with stale-while-revalidate.
+
+        Fresh entries are served as is; stale ones are served immediately
+        while a single background refresh runs; misses fetch inline.
+        """
+        cached = await BalanceCache.get(chain_name, address)
+        if cached is None:
+            metrics.increment("balance_cache.miss")
+            return await cls.refresh_balances(address, chain_name), 0.0, "MISS"
+
+        data, fetched_at = cached
+        age = max(0.0, time.time() - fetched_at)
+        if age < BalanceCache.ttl(chain_name):
+            metrics.increment("balance_cache.hit")
+            return data, age, "HIT"
+
+        metrics.increment("balance_cache.stale")
+        cls._refresh_in_background(address, chain_name)
+        return data, age, "STALE"
+
+    @classmethod
+    async def refresh_balances(cls, address: str, chain_name: str) -> dict:
+        """
+        Fetch balances from the provider and store them in the cache.
+        """
+        balances = await cls.fetch_balances(address=address, chain_name=chain_name)
+        data = CheckerParsedData.model_validate(balances).model_dump(mode="json")
+        await BalanceCache.set(chain_name, address, data)
+        return data
+
+    @classmethod
+    def _refresh_in_background(cls, address: str, chain_name: str) -> None:
+        key = (chain_name, address)
+        if key in cls._refreshing:
+            return
+
+        cls._refreshing.add(key)
+        task = asyncio.create_task(cls._refresh_once(address, chain_name))
+        cls._refresh_tasks.add(task)
+        task.add_done_callback(cls._refresh_tasks.discard)
+
+    @classmethod
+    async def _refresh_once(cls, address: str, chain_name: str) -> None:
+        try:
+            if await BalanceCache.claim_refresh(chain_name, address):
+                await cls.refresh_balances(address, chain_name)
+        except Exception as e:
+            logging.warning(e)
+        finally:
+            cls._refreshing.discard((chain_name, address))
+
+    @classmethod
+    async def fetch_transactions(cls, address: str, chain_name: str) -> dict:
+        return await cls._transactions_flight.do(
+            f"{chain_name}:{address.lower()}",
+            lambda: Checker.fetch_transactions(address=address, chain_name=chain_name),
+        )
+
+
+class TransactorRegistry:
+    """
+    One long-lived Transactor per chain for the life of the process.
+
+    Chains with an RPC URL in CHAIN_RPC_URLS get an EvmTransactor, which
+    reserves nonces through the nonce manager, keeps one connection pool to
+    the node and caches the chain id; warming it fetches the chain id.
+    Other chains get the library's Transactor. It offers no call to
+    prefetch with, so for those chains the registry only saves rebuilding
+    the object per send, plus whatever the library caches on it itself.
+
+    Only chains in AvailableChainNodes or CHAIN_RPC_URLS get a client, so
+    caller-supplied names cannot grow the registry.
+    """
+
+    _clients: Dict[str, Union[Transactor, EvmTransactor]] = {}
+
+    @classmethod
+    def get(cls, chain_name: str) -> Union[Transactor, EvmTransactor]:
+        transactor = cls._clients.get(chain_name)
+        if transactor is None:
+            url = settings.build_chain_rpc_urls().get(chain_name)
+            if url is None and chain_name not in AvailableChainNodes:
+                raise ValueError(f"Unavailable Chain {chain_name}")
+            if url is None:
+                transactor = Transactor(chain_name=chain_name)
+            else:
+                transactor = EvmTransactor(chain_name, url)
+            cls._clients[chain_name] = transactor
+        return transactor
+
+    @classmethod
+    async def warm_up(cls, chain_names: Iterable[str]) -> None:
+        """
+        Build the clients of `chain_names` ahead of the first send; only
+        EvmTransactors also talk to their node.
+        """
+        for chain_name in chain_names:
+            try:
+                transactor = cls.get(chain_name)
+                if isinstance(transactor, EvmTransactor):
+                    await transactor.warm_up()
+            except Exception as e:
+                logging.warning(e)
 
 
 class TransactionService:
@@ -38,7 +189,7 @@ class TransactionService:
         to_address: str,
         amount: int,
     ) -> bool:
-        transactor = Transactor(chain_name=mainnet)
+        transactor = TransactorRegistry.get(mainnet)
         return await transactor.send_native(
             from_private_key=from_private_key,
             from_address=from_address,
@@ -55,7 +206,7 @@ class TransactionService:
         to_address: str,
         amount: int,
     ) -> bool:
-        transactor = Transactor(chain_name=mainnet)
+        transactor = TransactorRegistry.get(mainnet)
         return await transactor.send_erc20(
             contract_address=contract_address,
             from_private_key=from_private_key,
@@ -73,7 +224,7 @@ class TransactionService:
         to_address: str,
         amount: int,
     ) -> bool:
-        transactor = Transactor(chain_name=mainnet)
+        transactor = TransactorRegistry.get(mainnet)
         return await transactor.send_bep20(
             contract_address=contract_address,
             from_private_key=from_private_key,
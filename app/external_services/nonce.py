@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.redis import redis_client
+from app.core.settings import settings
+from app.utils.metrics import metrics
+
+# KEYS: next nonce, holes, nonces in flight. ARGV: count, now.
+# Hands out the lowest holes first, then fresh nonces from the counter, and
+# records when each was reserved. Returns false when the counter was never
+# seeded from the chain.
+_RESERVE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local nonces = {}
+local holes = redis.call('ZPOPMIN', KEYS[2], ARGV[1])
+for i = 1, #holes, 2 do
+    nonces[#nonces + 1] = tonumber(holes[i])
+end
+local fresh = tonumber(ARGV[1]) - #nonces
+if fresh > 0 then
+    local last = redis.call('INCRBY', KEYS[1], fresh)
+    for nonce = last - fresh, last - 1 do
+        nonces[#nonces + 1] = nonce
+    end
+end
+for _, nonce in ipairs(nonces) do
+    redis.call('HSET', KEYS[3], nonce, ARGV[2])
+end
+return nonces
+"""
+
+# KEYS: next nonce, holes, nonces in flight, signed transactions.
+# ARGV: pending nonce on the chain, now, stale seconds.
+# Forgets everything below the chain's nonce and never lets the counter
+# fall behind it. The chain's nonce is the one every later transaction
+# waits on: once it has been in flight for longer than the stale time
+# without the chain moving past it, its transaction may have been lost.
+# If it was signed, the signed transaction is returned so the caller can
+# re-broadcast it, and the nonce counts as freshly reserved meanwhile;
+# otherwise it becomes a hole. Nonces above it may be queued on the node
+# and are never handed out again.
+_RESYNC = """
+local chain_nonce = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. chain_nonce)
+for _, key in ipairs({KEYS[3], KEYS[4]}) do
+    for _, nonce in ipairs(redis.call('HKEYS', key)) do
+        if tonumber(nonce) < chain_nonce then
+            redis.call('HDEL', key, nonce)
+        end
+    end
+end
+local next_nonce = tonumber(redis.call('GET', KEYS[1]))
+if next_nonce == nil or next_nonce <= chain_nonce then
+    redis.call('SET', KEYS[1], chain_nonce)
+    redis.call('DEL', KEYS[2], KEYS[3], KEYS[4])
+    return 0
+end
+if redis.call('ZSCORE', KEYS[2], chain_nonce) then
+    return 0
+end
+local reserved_at = redis.call('HGET', KEYS[3], chain_nonce)
+if not reserved_at then
+    redis.call('HSET', KEYS[3], chain_nonce, ARGV[2])
+    return 0
+end
+if tonumber(ARGV[2]) - tonumber(reserved_at) < tonumber(ARGV[3]) then
+    return 0
+end
+local raw = redis.call('HGET', KEYS[4], chain_nonce)
+if raw then
+    redis.call('HSET', KEYS[3], chain_nonce, ARGV[2])
+    return raw
+end
+redis.call('HDEL', KEYS[3], chain_nonce)
+redis.call('ZADD', KEYS[2], chain_nonce, chain_nonce)
+return 1
+"""
+
+Key = Tuple[str, str]
+ChainNonce = Callable[[], Awaitable[int]]
+Recover = Optional[Callable[[str], Awaitable[bool]]]
+
+
+class NonceManager:
+    """
+    Atomic per-(chain, address) nonce reservation shared by all workers.
+
+    The next nonce lives in Redis and is handed out by a Lua script, so
+    parallel sends from one wallet never pick the same nonce. Reservations
+    made within NONCE_BATCH_WINDOW in a process share one Redis round trip.
+
+    Nonces whose send failed are released as holes and handed out first,
+    which keeps the sequence gapless. The counter is checked against the
+    chain's pending nonce every NONCE_RESYNC_SECONDS and after a "nonce too
+    low" error. When the chain's nonce has been in flight for longer than
+    NONCE_STALE_SECONDS, its transaction may have been lost (a dropped or
+    never delivered broadcast). Signed transactions are recorded per nonce,
+    and such a transaction is handed to `recover` to be broadcast again;
+    only if the node turns it down, or it was never signed, is the nonce
+    reused, so the next send replaces it and unblocks the transactions
+    queued behind it.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[Key, List[asyncio.Future]] = {}
+        self._flushing: Set[asyncio.Task] = set()
+        self._synced_at: Dict[Key, float] = {}
+
+    @staticmethod
+    def _keys(key: Key) -> List[str]:
+        prefix = f"nonce:{key[0]}:{key[1]}"
+        return [prefix, f"{prefix}:holes", f"{prefix}:inflight", f"{prefix}:raw"]
+
+    async def reserve(
+        self,
+        chain_name: str,
+        address: str,
+        chain_nonce: ChainNonce,
+        recover: Recover = None,
+    ) -> int:
+        """
+        Reserve the next nonce of `address`.
+
+        `chain_nonce` returns the address's pending nonce on the chain, and
+        is only called to seed or resync the counter. `recover` re-broadcasts
+        the signed transaction of a stuck nonce and returns False if the node
+        rejects it; see `resync`.
+        """
+        key = (chain_name, address.lower())
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._pending.get(key)
+        if waiters is None:
+            self._pending[key] = [future]
+            task = asyncio.create_task(self._flush(key, chain_nonce, recover))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+        else:
+            waiters.append(future)
+        return await future
+
+    async def reserve_many(
+        self,
+        chain_name: str,
+        address: str,
+        count: int,
+        chain_nonce: ChainNonce,
+        recover: Recover = None,
+    ) -> List[int]:
+        """
+        Reserve `count` nonces of `address` at once, lowest first.
+        """
+        return await self._reserve(
+            (chain_name, address.lower()), count, chain_nonce, recover
+        )
+
+    async def record(self, chain_name: str, address: str, raws: Dict[int, str]):
+        """
+        Remember the signed transactions of reserved nonces, by nonce.
+        """
+        *_, raw_key = self._keys((chain_name, address.lower()))
+        try:
+            await redis_client.hset(raw_key, mapping=raws)
+        except RedisError as e:
+            logging.warning(e)
+
+    async def release(self, chain_name: str, address: str, nonce: int) -> None:
+        """
+        Return a reserved nonce whose transaction never reached the chain.
+        """
+        _, holes_key, inflight_key, raw_key = self._keys((chain_name, address.lower()))
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                await pipe.zadd(holes_key, {nonce: nonce}).hdel(
+                    inflight_key, nonce
+                ).hdel(raw_key, nonce).execute()
+            metrics.increment("nonce.released")
+        except RedisError as e:
+            logging.warning(e)
+
+    async def resync(
+        self,
+        chain_name: str,
+        address: str,
+        chain_nonce: int,
+        recover: Recover = None,
+    ) -> int:
+        """
+        Realign the counter with the chain; returns 1 if a lost nonce is reused.
+
+        A stuck nonce that was signed for is only reused when `recover`
+        returns False for its transaction. Without `recover` it is kept.
+        """
+        key = (chain_name, address.lower())
+        reused = await redis_client.eval(
+            _RESYNC,
+            4,
+            *self._keys(key),
+            chain_nonce,
+            int(time.time()),
+            settings.NONCE_STALE_SECONDS,
+        )
+        self._synced_at[key] = time.monotonic()
+        if isinstance(reused, str):
+            metrics.increment("nonce.rebroadcast")
+            reused = int(recover is not None and not await recover(reused))
+            if reused:
+                await self.release(*key, chain_nonce)
+        if reused:
+            logging.warning(f"Reusing lost nonce {chain_nonce} of {key[1]} on {key[0]}")
+            metrics.increment("nonce.dropped")
+        return reused
+
+    async def _flush(self, key: Key, chain_nonce: ChainNonce, recover: Recover):
+        await asyncio.sleep(settings.NONCE_BATCH_WINDOW_SECONDS)
+        waiters = self._pending.pop(key)
+        try:
+            nonces = await self._reserve(key, len(waiters), chain_nonce, recover)
+        except Exception as e:
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, nonce in zip(waiters, nonces):
+            if future.done():
+                await self.release(*key, nonce)
+            else:
+                future.set_result(nonce)
+
+    async def _reserve(
+        self, key: Key, count: int, chain_nonce: ChainNonce, recover: Recover
+    ) -> List[int]:
+        metrics.increment("nonce.round_trips")
+        metrics.increment("nonce.reserved", count)
+        try:
+            synced_at: Optional[float] = self._synced_at.get(key)
+            if (
+                synced_at is None
+                or time.monotonic() - synced_at > settings.NONCE_RESYNC_SECONDS
+            ):
+                await self.resync(*key, await chain_nonce(), recover)
+
+            args = (_RESERVE, 3, *self._keys(key)[:3], count, int(time.time()))
+            nonces = await redis_client.eval(*args)
+            if nonces is None:
+                await self.resync(*key, await chain_nonce(), recover)
+                nonces = await redis_client.eval(*args)
+            return sorted(int(nonce) for nonce in nonces)
+        except RedisError as e:
+            # Without Redis, fall back to what the chain reports, as before.
+            logging.warning(e)
+            start = await chain_nonce()
+            return list(range(start, start + count))
+
+
+nonce_manager = NonceManager()
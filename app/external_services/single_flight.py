@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+
+from app.core.redis import redis_client
+from app.core.settings import settings
+from app.utils.metrics import metrics
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical upstream calls into one request.
+
+    Within a process, callers with the same key await one shared task.
+    Across workers, the first to take a short Redis lock makes the call and
+    publishes its result for a moment; the others wait for it instead.
+    Results are always returned in their JSON form, so callers see the same
+    shape whichever worker made the call.
+
+    Metrics, per namespace: `calls` and `upstream` counters (their ratio is
+    the overall fan-in) and a `fan_in` summary of callers per flight.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._callers: Dict[str, int] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        metrics.increment(f"single_flight.{self.namespace}.calls")
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._lead(key, call))
+            self._inflight[key] = task
+            self._callers[key] = 0
+            task.add_done_callback(lambda _: self._land(key))
+
+        self._callers[key] += 1
+        return await asyncio.shield(task)
+
+    def _land(self, key: str) -> None:
+        self._inflight.pop(key, None)
+        metrics.observe(
+            f"single_flight.{self.namespace}.fan_in", self._callers.pop(key, 0)
+        )
+
+    def _redis_key(self, key: str) -> str:
+        return f"single_flight:{self.namespace}:{key}"
+
+    async def _lead(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = f"{self._redis_key(key)}:lock"
+        result_key = f"{self._redis_key(key)}:result"
+
+        try:
+            locked = await redis_client.set(
+                lock_key, 1, nx=True, ex=settings.SINGLE_FLIGHT_LOCK_SECONDS
+            )
+        except RedisError as e:
+            logging.warning(e)
+            return await self._call(call)
+
+        if not locked:
+            result = await self._wait(lock_key, result_key)
+            if result is not _MISSING:
+                metrics.increment(f"single_flight.{self.namespace}.shared")
+                return result
+
+        try:
+            result = await self._call(call)
+        except Exception:
+            if locked:
+                await self._release(lock_key)
+            raise
+
+        if locked:
+            await self._publish(lock_key, result_key, result)
+        return result
+
+    async def _call(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        metrics.increment(f"single_flight.{self.namespace}.upstream")
+        # Every caller gets the JSON form, as read back by other workers.
+        return json.loads(json.dumps(jsonable_encoder(await call())))
+
+    async def _wait(self, lock_key: str, result_key: str) -> Any:
+        """
+        Wait for another worker's result; _MISSING if it gave up or failed.
+        """
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_LOCK_SECONDS
+        try:
+            while time.monotonic() < deadline:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    raw, locked = await pipe.get(result_key).exists(lock_key).execute()
+                if raw is not None:
+                    return json.loads(raw)
+                if not locked:
+                    break
+                await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_SECONDS)
+        except RedisError as e:
+            logging.warning(e)
+        return _MISSING
+
+    async def _publish(self, lock_key: str, result_key: str, result: Any) -> None:
+        try:
+            raw = json.dumps(result)
+            async with redis_client.pipeline(transaction=True) as pipe:
+                await pipe.set(
+                    result_key, raw, ex=settings.SINGLE_FLIGHT_RESULT_SECONDS
+                ).delete(lock_key).execute()
+        except RedisError as e:
+            logging.warning(e)
+            await self._release(lock_key)
+
+    async def _release(self, lock_key: str) -> None:
+        try:
+            await redis_client.delete(lock_key)
+        except RedisError as e:
+            logging.warning(e)
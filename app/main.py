@@ -1,11 +1,15 @@
 import uvicorn
 import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.settings import settings
-from app.core.database import init_models
+from app.core.database import replica_router
+from app.core.revocation import RevocationStore
+from app.external_services import TransactorRegistry
+from app.external_services.crypto_engine import crypto_engine
 from app.api import v1
 
 tags_metadata = [
@@ -36,8 +40,22 @@ tags_metadata = [
 ]
 
 
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    crypto_engine.start()
+    await TransactorRegistry.warm_up(settings.build_transactor_warm_chains())
+    background_tasks = [asyncio.create_task(RevocationStore.listen())]
+    if replica_router.engines:
+        background_tasks.append(asyncio.create_task(replica_router.monitor()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    crypto_engine.shutdown()
+
+
 def get_application() -> FastAPI:
     application = FastAPI(
+        lifespan=lifespan,
         openapi_tags=tags_metadata,
         title=settings.PROJECT_NAME,
         debug=settings.DEBUG,
@@ -60,5 +78,4 @@ def get_application() -> FastAPI:
 app = get_application()
 
 if __name__ == "__main__":
-    asyncio.run(init_models())
     uvicorn.run("app.main:app", host="127.0.0.1", reload=True)
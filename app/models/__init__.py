@@ -1,5 +1,19 @@
 from .base import Base
 from .user import User
 from .wallet import Wallet
+from .wallet_pool import PooledWallet
+from .hd_account import HDAccount
+from .transaction import Transaction, TransactionAddress, TransactionSync
+from .transfer import Transfer
 
-__all__ = ["Base", "User", "Wallet"]
+__all__ = [
+    "Base",
+    "User",
+    "Wallet",
+    "PooledWallet",
+    "HDAccount",
+    "Transaction",
+    "TransactionAddress",
+    "TransactionSync",
+    "Transfer",
+]
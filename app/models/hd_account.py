@@ -0,0 +1,15 @@
+from .base import Base
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, String
+
+
+class HDAccount(Base):
+    __tablename__ = "hd_accounts"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), unique=True
+    )
+    mnemonics: Mapped[str] = mapped_column(String(128), unique=True)
+    extended_key: Mapped[str] = mapped_column(String(128), unique=True)
+    next_index: Mapped[int] = mapped_column(default=0)
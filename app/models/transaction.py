@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Dict, List
+
+from .base import Base
+
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, Index, String, UniqueConstraint, func
+
+
+class Transaction(Base):
+    __table_args__ = (
+        UniqueConstraint("chain_name", "tx_hash"),
+        Index(
+            "ix_transactions_chain_from_block",
+            "chain_name",
+            "from_address",
+            "block_height",
+        ),
+        Index(
+            "ix_transactions_chain_to_block",
+            "chain_name",
+            "to_address",
+            "block_height",
+        ),
+    )
+
+    chain_name: Mapped[str] = mapped_column(String(64))
+    tx_hash: Mapped[str] = mapped_column(String(128))
+    block_height: Mapped[int] = mapped_column(BigInteger, index=True)
+    successful: Mapped[bool]
+    from_address: Mapped[str] = mapped_column(String(128))
+    to_address: Mapped[str] = mapped_column(String(128))
+    value: Mapped[str] = mapped_column(String(128))
+    pretty_value_quote: Mapped[str] = mapped_column(String(64))
+    log_events: Mapped[List[Dict]] = mapped_column(JSONB, default=list)
+
+
+class TransactionAddress(Base):
+    __tablename__ = "transaction_addresses"
+    __table_args__ = (
+        UniqueConstraint("address", "chain_name", "tx_hash"),
+        Index(
+            "ix_transaction_addresses_address_chain_block",
+            "address",
+            "chain_name",
+            "block_height",
+        ),
+    )
+
+    address: Mapped[str] = mapped_column(String(128))
+    chain_name: Mapped[str] = mapped_column(String(64))
+    tx_hash: Mapped[str] = mapped_column(String(128))
+    block_height: Mapped[int] = mapped_column(BigInteger)
+
+
+class TransactionSync(Base):
+    __tablename__ = "transaction_sync"
+    __table_args__ = (UniqueConstraint("address", "chain_name"),)
+
+    address: Mapped[str] = mapped_column(String(128))
+    chain_name: Mapped[str] = mapped_column(String(64))
+    chain_id: Mapped[int] = mapped_column(BigInteger)
+    block_height: Mapped[int] = mapped_column(BigInteger)
+    synced_at: Mapped[datetime]
+    requested_at: Mapped[datetime] = mapped_column(default=func.now(), index=True)
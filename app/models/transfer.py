@@ -0,0 +1,28 @@
+from decimal import Decimal
+from typing import Optional
+
+from .base import Base
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Numeric, String, Text, UniqueConstraint
+
+
+class Transfer(Base):
+    __table_args__ = (UniqueConstraint("user_id", "batch_id", "batch_index"),)
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    kind: Mapped[str] = mapped_column(String(16))
+    mainnet: Mapped[str] = mapped_column(String(64))
+    contract_address: Mapped[Optional[str]] = mapped_column(String(128))
+    from_address: Mapped[str] = mapped_column(String(128))
+    to_address: Mapped[str] = mapped_column(String(128))
+    amount: Mapped[Decimal] = mapped_column(Numeric(78, 0))
+    status: Mapped[str] = mapped_column(String(16), default="pending")
+    error: Mapped[Optional[str]] = mapped_column(String(256))
+    batch_id: Mapped[Optional[str]] = mapped_column(String(64))
+    batch_index: Mapped[Optional[int]]
+    nonce: Mapped[Optional[int]]
+    tx_hash: Mapped[Optional[str]] = mapped_column(String(66))
+    raw_transaction: Mapped[Optional[str]] = mapped_column(Text)
@@ -1,14 +1,17 @@
-from typing import List
+from typing import List, Optional
 from .base import Base
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Table, Column, ForeignKey, func
+from sqlalchemy import String, Table, Column, ForeignKey, Index, func
 
 
 class Wallet(Base):
+    __table_args__ = (Index("ix_wallets_user_id_address", "user_id", "address"),)
+
     address: Mapped[str] = mapped_column(String(128), unique=True)
     private_key: Mapped[str] = mapped_column(String(128), unique=True)
-    mnemonics: Mapped[str] = mapped_column(String(128), unique=True)
+    mnemonics: Mapped[Optional[str]] = mapped_column(String(128), unique=True)
+    derivation_index: Mapped[Optional[int]]
     is_secure: Mapped[bool] = mapped_column(default=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
-    user: Mapped["User"] = relationship(back_populates="wallets")
+    user: Mapped["User"] = relationship(lazy="raise", back_populates="wallets")
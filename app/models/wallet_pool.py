@@ -0,0 +1,11 @@
+from .base import Base
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import LargeBinary, String
+
+
+class PooledWallet(Base):
+    __tablename__ = "wallet_pool"
+
+    address: Mapped[str] = mapped_column(String(128), unique=True)
+    encrypted_secrets: Mapped[bytes] = mapped_column(LargeBinary)
@@ -1,4 +1,13 @@
 from .user import UserRepository
 from .wallet import WalletRepository
+from .wallet_pool import WalletPoolRepository
+from .transaction import TransactionRepository
+from .transfer import TransferRepository
 
-__all__ = ["UserRepository", "WalletRepository"]
+__all__ = [
+    "UserRepository",
+    "WalletRepository",
+    "WalletPoolRepository",
+    "TransactionRepository",
+    "TransferRepository",
+]
@@ -26,6 +26,10 @@ class AbsWalletRepository(ABC):
     async def create_from_user(self, **kwargs):
         raise NotImplementedError
 
+    @abstractmethod
+    async def derive_from_user(self, **kwargs):
+        raise NotImplementedError
+
     @abstractmethod
     async def recover_wallet_from_mnemonics(self, **kwargs):
         raise NotImplementedError
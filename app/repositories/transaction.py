@@ -0,0 +1,327 @@
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Iterable, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import (
+    Select,
+    String,
+    all_,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Transaction, TransactionAddress, TransactionSync
+from app.core.database import get_read_session, get_session
+from app.schemas.transactor_scheme import ParsedDataItem
+
+# Keeps multi-row INSERTs well under the 32767 bind parameter limit.
+INSERT_CHUNK_SIZE = 1000
+# Rows fetched per round trip when streaming a history.
+STREAM_BATCH_SIZE = 500
+
+
+class TransactionRepository:
+    """
+    Repository for the local transaction history and its sync cursors.
+
+    An address's history is the set of transactions the provider listed for
+    it, kept in transaction_addresses: this includes transactions where the
+    address only appears in log events, such as incoming token transfers.
+    """
+
+    def __init__(self, session: Annotated[AsyncSession, Depends(get_session)]):
+        self.session = session
+
+    @classmethod
+    def reader(
+        cls, session: Annotated[AsyncSession, Depends(get_read_session)]
+    ) -> "TransactionRepository":
+        """
+        Build the repository on a read replica, for read-only endpoints.
+        """
+        return cls(session)
+
+    async def get_cursor(
+        self, address: str, chain_name: str
+    ) -> Optional[TransactionSync]:
+        row = await self.session.execute(self._cursor_query(address, chain_name))
+        return row.scalar_one_or_none()
+
+    async def set_cursor(
+        self, address: str, chain_name: str, chain_id: int, block_height: int
+    ) -> None:
+        values = {
+            "chain_id": chain_id,
+            "block_height": block_height,
+            "synced_at": datetime.utcnow(),
+        }
+        await self.session.execute(
+            pg_insert(TransactionSync)
+            .values(address=address.lower(), chain_name=chain_name, **values)
+            .on_conflict_do_update(
+                index_elements=[TransactionSync.address, TransactionSync.chain_name],
+                set_=values,
+            )
+        )
+
+    async def touch_cursor(self, address: str, chain_name: str) -> None:
+        """
+        Record that a client asked for an address's history.
+        """
+        await self.session.execute(
+            update(TransactionSync)
+            .filter_by(address=address.lower(), chain_name=chain_name)
+            .values(requested_at=func.now())
+        )
+
+    async def list_stale_cursors(
+        self, synced_before: datetime, requested_after: datetime, limit: int
+    ) -> List[Tuple[str, str]]:
+        """
+        Return (address, chain_name) pairs last synced before `synced_before`
+        whose history was requested after `requested_after`.
+        """
+        result = await self.session.execute(
+            select(TransactionSync.address, TransactionSync.chain_name)
+            .where(
+                TransactionSync.synced_at < synced_before,
+                TransactionSync.requested_at > requested_after,
+            )
+            .order_by(TransactionSync.synced_at)
+            .limit(limit)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def expire_cursors(self, requested_before: datetime, limit: int) -> int:
+        """
+        Stop tracking addresses whose history nobody requested since
+        `requested_before`, dropping their stored history; returns how many.
+        """
+        expired = await self.session.execute(
+            delete(TransactionSync)
+            .where(
+                TransactionSync.id.in_(
+                    select(TransactionSync.id)
+                    .where(TransactionSync.requested_at < requested_before)
+                    .limit(limit)
+                    .scalar_subquery()
+                )
+            )
+            .returning(TransactionSync.address, TransactionSync.chain_name)
+        )
+        expired = expired.all()
+        for address, chain_name in expired:
+            tx_hashes = await self.session.scalars(
+                delete(TransactionAddress)
+                .filter_by(address=address, chain_name=chain_name)
+                .returning(TransactionAddress.tx_hash)
+            )
+            await self._delete_unlisted(chain_name, tx_hashes.all())
+        return len(expired)
+
+    async def upsert_many(
+        self, address: str, chain_name: str, items: Iterable[ParsedDataItem]
+    ) -> None:
+        """
+        Store transactions of an address's history, overwriting stored copies
+        of the same ones.
+
+        Only used for items that are not final yet, whose status and
+        events may still change.
+        """
+        items = list(items)
+        rows = [
+            {
+                **item.model_dump(exclude={"log_events"}),
+                "from_address": item.from_address.lower(),
+                "to_address": item.to_address.lower(),
+                "log_events": [event.model_dump() for event in item.log_events],
+                "chain_name": chain_name,
+            }
+            for item in items
+        ]
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            query = pg_insert(Transaction).values(
+                rows[start : start + INSERT_CHUNK_SIZE]
+            )
+            await self.session.execute(
+                query.on_conflict_do_update(
+                    index_elements=[Transaction.chain_name, Transaction.tx_hash],
+                    set_={
+                        "updated_at": func.now(),
+                        **{
+                            column: query.excluded[column]
+                            for column in (
+                                "block_height",
+                                "successful",
+                                "from_address",
+                                "to_address",
+                                "value",
+                                "pretty_value_quote",
+                                "log_events",
+                            )
+                        },
+                    },
+                )
+            )
+
+        listed = [
+            {
+                "address": address.lower(),
+                "chain_name": chain_name,
+                "tx_hash": item.tx_hash,
+                "block_height": item.block_height,
+            }
+            for item in items
+        ]
+        for start in range(0, len(listed), INSERT_CHUNK_SIZE):
+            query = pg_insert(TransactionAddress).values(
+                listed[start : start + INSERT_CHUNK_SIZE]
+            )
+            await self.session.execute(
+                query.on_conflict_do_update(
+                    index_elements=[
+                        TransactionAddress.address,
+                        TransactionAddress.chain_name,
+                        TransactionAddress.tx_hash,
+                    ],
+                    set_={
+                        "updated_at": func.now(),
+                        "block_height": query.excluded.block_height,
+                    },
+                )
+            )
+
+    async def delete_dropped(
+        self, address: str, chain_name: str, above: int, keep: List[str]
+    ) -> None:
+        """
+        Delete an address's transactions above block `above` not in `keep`.
+
+        Removes not-yet-final transactions that a reorg dropped. They stay
+        stored while the history of another address still lists them.
+        """
+        tx_hashes = await self.session.scalars(
+            delete(TransactionAddress)
+            .where(
+                TransactionAddress.address == address.lower(),
+                TransactionAddress.chain_name == chain_name,
+                TransactionAddress.block_height > above,
+                TransactionAddress.tx_hash
+                != all_(bindparam("keep", keep, type_=ARRAY(String))),
+            )
+            .returning(TransactionAddress.tx_hash)
+        )
+        await self._delete_unlisted(chain_name, tx_hashes.all())
+
+    async def _delete_unlisted(self, chain_name: str, tx_hashes: List[str]) -> None:
+        """
+        Delete the given transactions unless some address's history lists them.
+        """
+        if not tx_hashes:
+            return
+        await self.session.execute(
+            delete(Transaction).where(
+                Transaction.chain_name == chain_name,
+                Transaction.tx_hash
+                == any_(bindparam("tx_hashes", tx_hashes, type_=ARRAY(String))),
+                ~exists().where(
+                    TransactionAddress.chain_name == Transaction.chain_name,
+                    TransactionAddress.tx_hash == Transaction.tx_hash,
+                ),
+            )
+        )
+
+    async def get_page(
+        self, address: str, chain_name: str, limit: int, **filters
+    ) -> List[Transaction]:
+        """
+        Newest-first page of an address's transactions on a chain.
+
+        `before` is the (block_height, tx_hash) of the last row of the
+        previous page; pages are read by keyset, never by offset.
+        """
+        result = await self.session.scalars(
+            self._history_query(address, chain_name, **filters).limit(limit)
+        )
+        return result.all()
+
+    async def stream(
+        self, address: str, chain_name: str, **filters
+    ) -> AsyncIterator[Transaction]:
+        """
+        Iterate the whole matching history through a server-side cursor.
+        """
+        result = await self.session.stream_scalars(
+            self._history_query(address, chain_name, **filters).execution_options(
+                yield_per=STREAM_BATCH_SIZE
+            )
+        )
+        async for transaction in result:
+            yield transaction
+
+    @staticmethod
+    def _cursor_query(address: str, chain_name: str) -> Select:
+        return select(TransactionSync).filter_by(
+            address=address.lower(), chain_name=chain_name
+        )
+
+    @staticmethod
+    def _history_query(
+        address: str,
+        chain_name: str,
+        before: Optional[Tuple[int, str]] = None,
+        direction: Optional[str] = None,
+        successful: Optional[bool] = None,
+        min_block_height: Optional[int] = None,
+        max_block_height: Optional[int] = None,
+    ) -> Select:
+        """
+        An address's history; "out" is what the address sent, "in" the rest,
+        including token transfers it only appears in as a log event.
+        """
+        address = address.lower()
+        filters = [
+            TransactionAddress.address == address,
+            TransactionAddress.chain_name == chain_name,
+        ]
+        if direction == "in":
+            filters.append(Transaction.from_address != address)
+        elif direction == "out":
+            filters.append(Transaction.from_address == address)
+        if before is not None:
+            filters.append(
+                tuple_(TransactionAddress.block_height, TransactionAddress.tx_hash)
+                < tuple_(*before)
+            )
+        if successful is not None:
+            filters.append(Transaction.successful == successful)
+        if min_block_height is not None:
+            filters.append(TransactionAddress.block_height >= min_block_height)
+        if max_block_height is not None:
+            filters.append(TransactionAddress.block_height <= max_block_height)
+
+        return (
+            select(Transaction)
+            .join(
+                TransactionAddress,
+                and_(
+                    TransactionAddress.chain_name == Transaction.chain_name,
+                    TransactionAddress.tx_hash == Transaction.tx_hash,
+                ),
+            )
+            .where(and_(*filters))
+            .order_by(
+                TransactionAddress.block_height.desc(),
+                TransactionAddress.tx_hash.desc(),
+            )
+        )
@@ -0,0 +1,189 @@
+from datetime import timedelta
+from typing import Annotated, Dict, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import Select, Update, and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Transfer
+from app.core.database import get_session
+
+
+class TransferRepository:
+    """
+    Repository for transfers submitted for background signing and broadcast.
+    """
+
+    def __init__(self, session: Annotated[AsyncSession, Depends(get_session)]):
+        self.session = session
+
+    async def create(self, **values) -> Transfer:
+        instance = Transfer(**values)
+        self.session.add(instance)
+        await self.session.flush()
+        await self.session.refresh(instance)
+        return instance
+
+    async def get_single(self, **filters) -> Optional[Transfer]:
+        """
+        Get a single transfer by filters, always reloading its current state.
+        """
+        row = await self.session.execute(self._single_query(**filters))
+        return row.scalar_one_or_none()
+
+    async def claim(self, transfer_id: int) -> Optional[Transfer]:
+        """
+        Move a pending transfer to processing; None if it is not pending.
+
+        Makes redelivered tasks harmless: only one worker ever sends it.
+        """
+        row = await self.session.execute(self._claim_query(transfer_id))
+        return row.scalar_one_or_none()
+
+    async def finish(
+        self, transfer_id: int, status: str, error: Optional[str] = None, **values
+    ) -> None:
+        """
+        Record the outcome of a transfer; `values` may add its tx_hash and nonce.
+        """
+        await self.session.execute(
+            update(Transfer)
+            .where(Transfer.id == transfer_id)
+            .values(status=status, error=error, **values)
+        )
+
+    async def requeue_stale(self, stale_seconds: int, limit: int) -> List[int]:
+        """
+        Ids of single transfers left pending for over `stale_seconds`, which
+        are marked as requeued now; their task was lost or never enqueued.
+        """
+        stale = (
+            select(Transfer.id)
+            .where(
+                Transfer.batch_id.is_(None),
+                Transfer.status == "pending",
+                Transfer.updated_at < func.now() - timedelta(seconds=stale_seconds),
+            )
+            .order_by(Transfer.id)
+            .limit(limit)
+        )
+        result = await self.session.scalars(
+            update(Transfer)
+            .where(Transfer.id.in_(stale.scalar_subquery()))
+            .values(updated_at=func.now())
+            .returning(Transfer.id)
+        )
+        return result.all()
+
+    async def expire_stale(self, stale_seconds: int, error: str) -> List[int]:
+        """
+        Mark single transfers left processing for over `stale_seconds` by a
+        worker that never finished them as unknown; returns their ids.
+        """
+        result = await self.session.scalars(
+            update(Transfer)
+            .where(
+                Transfer.batch_id.is_(None),
+                Transfer.status == "processing",
+                Transfer.updated_at < func.now() - timedelta(seconds=stale_seconds),
+            )
+            .values(status="unknown", error=error)
+            .returning(Transfer.id)
+        )
+        return result.all()
+
+    async def create_batch(
+        self, user_id: int, batch_id: str, items: List[Dict]
+    ) -> List[Transfer]:
+        """
+        Store the items of a batch, keeping the ones stored by an earlier
+        attempt as they are; returns every transfer of the batch in order.
+        """
+        await self.session.execute(
+            pg_insert(Transfer)
+            .values(
+                [
+                    {
+                        **item,
+                        "user_id": user_id,
+                        "batch_id": batch_id,
+                        "batch_index": index,
+                    }
+                    for index, item in enumerate(items)
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    Transfer.user_id,
+                    Transfer.batch_id,
+                    Transfer.batch_index,
+                ]
+            )
+        )
+        return await self.get_batch(user_id, batch_id)
+
+    async def get_batch(self, user_id: int, batch_id: str) -> List[Transfer]:
+        result = await self.session.scalars(self._batch_query(user_id, batch_id))
+        return result.all()
+
+    async def claim_batch(
+        self, user_id: int, batch_id: str, stale_seconds: int
+    ) -> List[Transfer]:
+        """
+        Move the unfinished transfers of a batch to processing.
+
+        Pending, failed and unknown ones are claimed, and so are ones left
+        processing for over `stale_seconds` by an attempt that never finished.
+        """
+        result = await self.session.scalars(
+            update(Transfer)
+            .where(
+                Transfer.user_id == user_id,
+                Transfer.batch_id == batch_id,
+                or_(
+                    Transfer.status.in_(["pending", "failed", "unknown"]),
+                    and_(
+                        Transfer.status == "processing",
+                        Transfer.updated_at
+                        < func.now() - timedelta(seconds=stale_seconds),
+                    ),
+                ),
+            )
+            .values(status="processing")
+            .returning(Transfer)
+        )
+        return sorted(result.all(), key=lambda transfer: transfer.batch_index)
+
+    async def update_many(self, values: List[Dict]) -> None:
+        """
+        Update several transfers by id; each dict holds an id and its values.
+        """
+        if values:
+            await self.session.execute(update(Transfer), values)
+
+    @staticmethod
+    def _single_query(**filters) -> Select:
+        return (
+            select(Transfer)
+            .filter_by(**filters)
+            .execution_options(populate_existing=True)
+        )
+
+    @staticmethod
+    def _claim_query(transfer_id: int) -> Update:
+        return (
+            update(Transfer)
+            .where(Transfer.id == transfer_id, Transfer.status == "pending")
+            .values(status="processing")
+            .returning(Transfer)
+        )
+
+    @staticmethod
+    def _batch_query(user_id: int, batch_id: str) -> Select:
+        return (
+            select(Transfer)
+            .filter_by(user_id=user_id, batch_id=batch_id)
+            .order_by(Transfer.batch_index)
+            .execution_options(populate_existing=True)
+        )
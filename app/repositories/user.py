@@ -1,103 +1,188 @@
-from typing import Dict, List, Optional
+from typing import Annotated, Dict, List, Optional
 
-from sqlalchemy import select, update, delete, func
+from fastapi import Depends
+from sqlalchemy import Float, Select, Text, Update, cast, select, update, delete, func
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
 
 from app.models import User
-from app.core.database import async_session
-from app.utils.hashing import hash_password
+from app.core.cache import PrincipalCache, TokenVersions
+from app.core.database import get_read_session, get_session, on_commit
+from app.utils.hashing import hash_password_async
 
 from .base import AbstractRepository
 
+CLAIM_FIELDS = {"username", "password", "is_active", "is_verified", "is_admin"}
+
 
 class UserRepository(AbstractRepository):
     """
     Repository class for User model.
+
+    Works on the request-scoped session; changes are flushed here and
+    committed once by the unit of work that owns the session.
     """
 
+    def __init__(self, session: Annotated[AsyncSession, Depends(get_session)]):
+        self.session = session
+
     @classmethod
-    async def create(cls, instances: Dict) -> User:
+    def reader(
+        cls, session: Annotated[AsyncSession, Depends(get_read_session)]
+    ) -> "UserRepository":
+        """
+        Build the repository on a read replica, for read-only endpoints.
+        """
+        return cls(session)
+
+    async def create(self, instances: Dict) -> User:
         """
         Create a new user.
         """
-        async with async_session() as session:
-            try:
-                instance = User(**instances.model_dump())
-                instance.password = hash_password(instance.password)
-                session.add(instance)
-                await session.commit()
-                await session.refresh(instance)
-                return instance
-            except IntegrityError as e:
-                await session.rollback()
-                raise ValueError(f"Integrity error occurred: {e}")
+        try:
+            instance = User(**instances.model_dump())
+            instance.password = await hash_password_async(instance.password)
+            self.session.add(instance)
+            await self.session.flush()
+            await self.session.refresh(instance)
+            return instance
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise ValueError(f"Integrity error occurred: {e}")
 
-    @classmethod
-    async def update(cls, instances: Dict, **filters) -> User:
+    async def update(self, instances: Dict, **filters) -> User:
         """
         Update an existing user.
         """
-        async with async_session() as session:
-            query = (
-                update(User)
-                .values(**instances.model_dump(exclude_unset=True))
-                .filter_by(**filters)
-                .returning(User)
-            )
-            try:
-                result = await session.execute(query)
-                await session.commit()
-                return result.scalar_one()
-            except IntegrityError as e:
-                await session.rollback()
-                raise ValueError(f"Integrity error occurred: {e}")
+        values = instances.model_dump(exclude_unset=True)
+        query = self._update_query(values, **filters)
+        try:
+            stale_usernames = []
+            if "username" in values:
+                stale_usernames = (
+                    await self.session.scalars(
+                        select(User.username).filter_by(**filters)
+                    )
+                ).all()
 
-    @classmethod
-    async def update_chains(cls, instance: Dict, type: str, **filters) -> User:
+            result = await self.session.execute(query)
+            user = result.scalar_one()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise ValueError(f"Integrity error occurred: {e}")
+
+        async def invalidate():
+            await PrincipalCache.invalidate(user.username, *stale_usernames)
+            if CLAIM_FIELDS.intersection(values):
+                await TokenVersions.bump(user.id)
+
+        on_commit(self.session, invalidate)
+        return user
+
+    async def update_chains(self, instance: Dict, type: str, **filters) -> User:
         """
         Update user's blockchain chains information.
-        """
-        async with async_session() as session:
-            user_result_query = await session.execute(select(User).filter_by(**filters))
-            user = user_result_query.scalar_one()
 
-            if user.mainnet_dict is None:
-                user.mainnet_dict = {}
+        Adding and removing a chain are single atomic UPDATE statements on
+        the JSONB column, so concurrent changes cannot overwrite each other.
+        """
+        if type == "add":
+            mainnet_dict = func.coalesce(
+                User.mainnet_dict, func.jsonb_build_object()
+            ).op("||", return_type=JSONB)(
+                func.jsonb_build_object(
+                    cast(instance.mainnet, Text), cast(instance.gas, Float)
+                )
+            )
 
-            if type == "add":
-                user.mainnet_dict.update({instance.mainnet: instance.gas})
+        if type == "remove":
+            mainnet_dict = User.mainnet_dict.op("-", return_type=JSONB)(
+                cast(instance.mainnet, Text)
+            )
 
-            if type == "remove":
-                del user.mainnet_dict[instance.mainnet]
+        query = (
+            update(User)
+            .values(mainnet_dict=mainnet_dict)
+            .filter_by(**filters)
+            .returning(User)
+        )
+        try:
+            result = await self.session.execute(query)
+            user = result.scalar_one()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise ValueError(f"Integrity error occurred: {e}")
 
-            try:
-                session.add(user)
-                await session.commit()
-                await session.refresh(user)
-                return user
-            except IntegrityError as e:
-                await session.rollback()
-                raise ValueError(f"Integrity error occurred: {e}")
+        on_commit(self.session, lambda: PrincipalCache.invalidate(user.username))
+        return user
 
-    @classmethod
-    async def delete(cls, **filters) -> None:
+    async def delete(self, **filters) -> None:
         """
         Delete a user.
         """
-        async with async_session() as session:
-            try:
-                await session.execute(delete(User).filter_by(**filters))
-                await session.commit()
-            except IntegrityError as e:
-                await session.rollback()
-                raise ValueError(f"Integrity error occurred: {e}")
+        try:
+            result = await self.session.execute(
+                delete(User).filter_by(**filters).returning(User.id, User.username)
+            )
+            deleted = result.all()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise ValueError(f"Integrity error occurred: {e}")
 
-    @classmethod
-    async def get_single(cls, **filters) -> List[Optional[User]]:
+        async def invalidate():
+            await PrincipalCache.invalidate(*(username for _, username in deleted))
+            await TokenVersions.bump(*(user_id for user_id, _ in deleted))
+
+        on_commit(self.session, invalidate)
+
+    async def get_single(self, **filters) -> List[Optional[User]]:
         """
         Get a single user by filters.
         """
-        async with async_session() as session:
-            row = await session.execute(select(User).filter_by(**filters))
-            return row.scalar_one_or_none()
+        row = await self.session.execute(self._single_query(**filters))
+        return row.scalar_one_or_none()
+
+    async def get_single_with_wallets(self, **filters) -> Optional[User]:
+        """
+        Get a single user by filters together with their wallets.
+        """
+        row = await self.session.execute(
+            select(User).options(selectinload(User.wallets)).filter_by(**filters)
+        )
+        return row.scalar_one_or_none()
+
+    async def get_credentials(self, username: str) -> Optional[User]:
+        """
+        Get a user with only the columns needed to log in and issue tokens.
+
+        Served by an index-only scan on ix_users_username_credentials.
+        """
+        row = await self.session.execute(self._credentials_query(username))
+        return row.scalar_one_or_none()
+
+    @staticmethod
+    def _single_query(**filters) -> Select:
+        return select(User).filter_by(**filters)
+
+    @staticmethod
+    def _credentials_query(username: str) -> Select:
+        return (
+            select(User)
+            .options(
+                load_only(
+                    User.id,
+                    User.username,
+                    User.password,
+                    User.is_active,
+                    User.is_verified,
+                    User.is_admin,
+                )
+            )
+            .filter_by(username=username)
+        )
+
+    @staticmethod
+    def _update_query(values: Dict, **filters) -> Update:
+        return update(User).values(**values).filter_by(**filters).returning(User)
@@ -1,99 +1,271 @@
-from typing import Dict, List, Optional
+from typing import Annotated, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import select, update, delete
+from fastapi import Depends
+from sqlalchemy import Select, Update, func, insert, select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Wallet, User
-from app.core.database import async_session
-from app.external_services import WalletGeneratorService
+from app.models import HDAccount, Wallet, User
+from app.core.database import get_read_session, get_session
+from app.external_services import (
+    AccountDiscoveryService,
+    HDWalletService,
+    WalletGeneratorService,
+)
 
 from .base import AbsWalletRepository
+from .wallet_pool import WalletPoolRepository
 
 
 class WalletRepository(AbsWalletRepository):
     """
     Repository class for Wallet model.
+
+    Works on the request-scoped session; changes are flushed here and
+    committed once by the unit of work that owns the session.
     """
 
+    def __init__(self, session: Annotated[AsyncSession, Depends(get_session)]):
+        self.session = session
+
     @classmethod
-    async def create_from_user(cls, user: User) -> Wallet:
+    def reader(
+        cls, session: Annotated[AsyncSession, Depends(get_read_session)]
+    ) -> "WalletRepository":
+        """
+        Build the repository on a read replica, for read-only endpoints.
+        """
+        return cls(session)
+
+    async def create_from_user(self, user: User) -> Wallet:
         """
         Create a new wallet for a user.
+
+        Takes pre-generated secrets from the wallet pool and only derives a
+        new wallet inline when the pool is empty.
         """
-        async with async_session() as session:
-            try:
+        try:
+            secrets = await WalletPoolRepository(self.session).claim()
+            if secrets is None:
                 wallet_generator = await WalletGeneratorService.generate()
-                instance = Wallet(
-                    user=user,
-                    address=wallet_generator.secrets["evm"][0][0],
-                    private_key=wallet_generator.secrets["evm"][0][1],
-                    mnemonics=wallet_generator.mnemonics,
+                secrets = (
+                    wallet_generator.secrets["evm"][0][0],
+                    wallet_generator.secrets["evm"][0][1],
+                    wallet_generator.mnemonics,
                 )
-                session.add(instance)
-                await session.commit()
-                await session.refresh(instance)
-                return instance
-            except IntegrityError:
-                await session.rollback()
 
-    @classmethod
-    async def recover_wallet_from_mnemonics(cls, mnemonics: str, user: User) -> Wallet:
+            address, private_key, mnemonics = secrets
+            instance = Wallet(
+                user_id=user.id,
+                address=address,
+                private_key=private_key,
+                mnemonics=mnemonics,
+            )
+            self.session.add(instance)
+            await self.session.flush()
+            await self.session.refresh(instance)
+            return instance
+        except IntegrityError:
+            await self.session.rollback()
+
+    async def create_many_from_user(
+        self, user: User, count: int
+    ) -> List[Tuple[str, bool]]:
         """
-        Recover a wallet using mnemonics for a user.
+        Create `count` new wallets for a user in a single INSERT.
+
+        Secrets are generated in parallel on the crypto engine. Returns
+        (address, created) per generated wallet; rows that collide with an
+        existing wallet are skipped and reported with created=False.
+        """
+        generated = await WalletGeneratorService.generate_many(count)
+        rows = [
+            {
+                "user_id": user.id,
+                "address": wallet.secrets["evm"][0][0],
+                "private_key": wallet.secrets["evm"][0][1],
+                "mnemonics": wallet.mnemonics,
+            }
+            for wallet in generated
+        ]
+        result = await self.session.scalars(
+            pg_insert(Wallet)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(Wallet.address)
+        )
+        created = set(result.all())
+        return [(row["address"], row["address"] in created) for row in rows]
+
+    async def derive_from_user(self, user: User, count: int = 1) -> List[Wallet]:
+        """
+        Create wallets for the next `count` addresses of the user's HD account.
+
+        The account is created on first use. Child indexes are reserved with a
+        single UPDATE, so concurrent requests never derive the same address.
         """
-        async with async_session() as session:
-            try:
-                wallet_creds = await WalletGeneratorService.recover(mnemonics)
-                instance = Wallet(
-                    user=user,
-                    address=wallet_creds["evm"][0][0],
-                    private_key=wallet_creds["evm"][0][1],
-                    mnemonics=mnemonics,
-                    is_secure=False,
+        try:
+            reserved = await self._reserve_indexes(user.id, count)
+            if reserved is None:
+                mnemonics, extended_key = await WalletGeneratorService.create_account()
+                await self.session.execute(
+                    pg_insert(HDAccount)
+                    .values(
+                        user_id=user.id,
+                        mnemonics=mnemonics,
+                        extended_key=extended_key,
+                    )
+                    .on_conflict_do_nothing(index_elements=[HDAccount.user_id])
                 )
-                session.add(instance)
-                await session.commit()
-                await session.refresh(instance)
-                return instance
-            except IntegrityError:
-                await session.rollback()
+                reserved = await self._reserve_indexes(user.id, count)
 
-    @classmethod
-    async def update(cls, instances: Dict, **filters) -> Wallet:
+            extended_key, start = reserved
+            children = HDWalletService.derive_range(extended_key, start, count)
+            result = await self.session.scalars(
+                insert(Wallet).returning(Wallet),
+                [
+                    {
+                        "user_id": user.id,
+                        "address": address,
+                        "private_key": private_key,
+                        "derivation_index": start + offset,
+                    }
+                    for offset, (address, private_key) in enumerate(children)
+                ],
+            )
+            return result.all()
+        except IntegrityError:
+            await self.session.rollback()
+
+    async def _reserve_indexes(
+        self, user_id: int, count: int
+    ) -> Optional[Tuple[str, int]]:
         """
-        Update an existing wallet.
+        Return (extended_key, first reserved index), or None without an account.
         """
-        async with async_session() as session:
-            query = (
-                update(Wallet)
-                .values(**instances.model_dump())
-                .filter_by(**filters)
-                .returning(Wallet)
+        result = await self.session.execute(self._reserve_indexes_query(user_id, count))
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return row.extended_key, row.next_index - count
+
+    async def recover_wallet_from_mnemonics(self, mnemonics: str, user: User) -> Wallet:
+        """
+        Recover a wallet using mnemonics for a user.
+        """
+        try:
+            wallet_creds = await WalletGeneratorService.recover(mnemonics)
+            instance = Wallet(
+                user_id=user.id,
+                address=wallet_creds["evm"][0][0],
+                private_key=wallet_creds["evm"][0][1],
+                mnemonics=mnemonics,
+                is_secure=False,
             )
-            try:
-                result = await session.execute(query)
-                await session.commit()
-                return result.scalar_one()
-            except IntegrityError:
-                await session.rollback()
+            self.session.add(instance)
+            await self.session.flush()
+            await self.session.refresh(instance)
+            return instance
+        except IntegrityError:
+            await self.session.rollback()
 
-    @classmethod
-    async def delete(cls, **filters) -> None:
+    async def discover_wallets_from_mnemonics(
+        self, mnemonics: str, user: User, chains: Iterable[str]
+    ) -> List[Wallet]:
+        """
+        Recover every used address of an HD phrase for a user.
+
+        Walks the account with the BIP44 gap limit, then inserts all used
+        addresses at once; ones already stored are skipped. The phrase
+        becomes the user's HD account unless they have one already, so
+        derive_from_user continues after the recovered addresses. Wallets
+        of any other phrase are stored without a derivation index, since
+        theirs would point into a different account.
+        """
+        extended_key = await WalletGeneratorService.account_key(mnemonics)
+        used = await AccountDiscoveryService.discover(extended_key, chains)
+
+        next_index = max((index + 1 for index, _, _ in used), default=0)
+        await self.session.execute(
+            pg_insert(HDAccount)
+            .values(
+                user_id=user.id,
+                mnemonics=mnemonics,
+                extended_key=extended_key,
+                next_index=next_index,
+            )
+            .on_conflict_do_nothing()
+        )
+        own_account = await self.session.scalar(
+            update(HDAccount)
+            .where(HDAccount.user_id == user.id, HDAccount.extended_key == extended_key)
+            .values(next_index=func.greatest(HDAccount.next_index, next_index))
+            .returning(HDAccount.id)
+        )
+        if not used:
+            return []
+
+        result = await self.session.scalars(
+            pg_insert(Wallet)
+            .values(
+                [
+                    {
+                        "user_id": user.id,
+                        "address": address,
+                        "private_key": private_key,
+                        "derivation_index": index if own_account else None,
+                        "is_secure": False,
+                    }
+                    for index, address, private_key in used
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(Wallet)
+        )
+        return result.all()
+
+    async def update(self, instances: Dict, **filters) -> Wallet:
+        """
+        Update an existing wallet.
+        """
+        query = (
+            update(Wallet)
+            .values(**instances.model_dump())
+            .filter_by(**filters)
+            .returning(Wallet)
+        )
+        try:
+            result = await self.session.execute(query)
+            return result.scalar_one()
+        except IntegrityError:
+            await self.session.rollback()
+
+    async def delete(self, **filters) -> None:
         """
         Delete a wallet.
         """
-        async with async_session() as session:
-            try:
-                await session.execute(delete(Wallet).filter_by(**filters))
-                await session.commit()
-            except IntegrityError:
-                await session.rollback()
+        try:
+            await self.session.execute(delete(Wallet).filter_by(**filters))
+        except IntegrityError:
+            await self.session.rollback()
 
-    @classmethod
-    async def get_single_wallet(cls, **filters) -> Optional[Wallet]:
+    async def get_single_wallet(self, **filters) -> Optional[Wallet]:
         """
         Get a single wallet by filters.
         """
-        async with async_session() as session:
-            row = await session.execute(select(Wallet).filter_by(**filters))
-            return row.scalar_one_or_none()
+        row = await self.session.execute(self._single_wallet_query(**filters))
+        return row.scalar_one_or_none()
+
+    @staticmethod
+    def _reserve_indexes_query(user_id: int, count: int) -> Update:
+        return (
+            update(HDAccount)
+            .where(HDAccount.user_id == user_id)
+            .values(next_index=HDAccount.next_index + count)
+            .returning(HDAccount.extended_key, HDAccount.next_index)
+        )
+
+    @staticmethod
+    def _single_wallet_query(**filters) -> Select:
+        return select(Wallet).filter_by(**filters)
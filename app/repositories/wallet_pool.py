@@ -0,0 +1,75 @@
+import json
+from typing import Annotated, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PooledWallet
+from app.core.database import get_session
+from app.core.settings import settings
+from app.utils.encryption import decrypt, encrypt
+
+
+class WalletPoolRepository:
+    """
+    Repository for the pool of pre-generated, encrypted wallet secrets.
+    """
+
+    def __init__(self, session: Annotated[AsyncSession, Depends(get_session)]):
+        self.session = session
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return bool(settings.WALLET_POOL_ENCRYPTION_KEY)
+
+    async def count(self) -> int:
+        return await self.session.scalar(select(func.count(PooledWallet.id)))
+
+    async def add_many(self, secrets: List[Tuple[str, str, str]]) -> None:
+        """
+        Add (address, private_key, mnemonics) triples to the pool.
+        """
+        await self.session.execute(
+            insert(PooledWallet),
+            [
+                {
+                    "address": address,
+                    "encrypted_secrets": encrypt(
+                        json.dumps(
+                            {"private_key": private_key, "mnemonics": mnemonics}
+                        ).encode()
+                    ),
+                }
+                for address, private_key, mnemonics in secrets
+            ],
+        )
+
+    async def claim(self) -> Optional[Tuple[str, str, str]]:
+        """
+        Remove one entry from the pool and return its decrypted secrets.
+
+        Concurrent claims skip rows locked by each other instead of waiting.
+        Returns None when the pool is empty or disabled.
+        """
+        if not self.is_enabled():
+            return None
+
+        next_id = (
+            select(PooledWallet.id)
+            .order_by(PooledWallet.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            delete(PooledWallet)
+            .where(PooledWallet.id == next_id)
+            .returning(PooledWallet.address, PooledWallet.encrypted_secrets)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        secrets = json.loads(decrypt(row.encrypted_secrets))
+        return row.address, secrets["private_key"], secrets["mnemonics"]
@@ -8,6 +8,14 @@ class Token(Base):
     token_type: str = Field(default="Bearer")
 
 
+class Principal(Base):
+    id: int
+    username: str
+    is_active: bool = Field(default=True)
+    is_verified: bool = Field(default=False)
+    is_admin: bool = Field(default=False)
+
+
 class VerifyEmail(Base):
     verification_token: str
     is_verified: bool = Field(default=False)
@@ -4,6 +4,7 @@ from typing import Optional, List
 
 class ParsedDataItem(Base):
     logo_url: Optional[str]
+    contract_address: Optional[str] = None
     contract_display_name: Optional[str]
     quote: float = 0
     pretty_quote: Optional[str]
@@ -16,3 +17,27 @@ class CheckerParsedData(Base):
     chain_id: int = 0
     quote_currency: Optional[str]
     items: List[ParsedDataItem]
+
+
+class PortfolioTokenModel(Base):
+    chain_name: str
+    contract_address: Optional[str]
+    contract_display_name: Optional[str]
+    logo_url: Optional[str]
+    balance: int = 0
+    quote: float = 0
+
+
+class PortfolioEntryModel(Base):
+    address: str
+    chain_name: str
+    status: str
+    quote: float = 0
+    balances: Optional[CheckerParsedData] = None
+
+
+class PortfolioModel(Base):
+    total_quote: float = 0
+    complete: bool
+    tokens: List[PortfolioTokenModel]
+    entries: List[PortfolioEntryModel]
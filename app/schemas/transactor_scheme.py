@@ -1,7 +1,11 @@
 from .base import Base
 
-from typing import List, Optional, Any, Dict
-from pydantic import Field
+from typing import List, Literal, Optional, Any, Dict
+from fastapi import HTTPException, status
+from lqd_services import AvailableChainNodes
+from pydantic import Field, field_validator, model_validator
+
+from app.core.settings import settings
 
 
 class ParsedLogEventsDataItem(Base):
@@ -26,6 +30,7 @@ class TransactorParsedData(Base):
     chain_name: str
     chain_id: int
     items: List[ParsedDataItem] = []
+    next_cursor: Optional[str] = None
 
 
 class SendTransactionNativeModel(Base):
@@ -45,3 +50,77 @@ class SendTransactionModel(Base):
 
 class TransactionStatusModel(Base):
     status: bool
+
+
+class TransferCreateModel(Base):
+    kind: Literal["native", "erc20", "bep20"]
+    mainnet: str
+    contract_address: Optional[str] = None
+    from_address: str
+    to_address: str
+    amount: int = Field(gt=0)
+
+    @model_validator(mode="after")
+    def validate_contract_address(self):
+        if self.kind != "native" and not self.contract_address:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Contract Address Is Required For Token Transfers",
+            )
+        return self
+
+
+class TransferViewModel(Base):
+    id: int
+    kind: str
+    mainnet: str
+    contract_address: Optional[str]
+    from_address: str
+    to_address: str
+    amount: int
+    status: str
+    error: Optional[str]
+    tx_hash: Optional[str] = None
+
+
+class BatchTransferItemModel(Base):
+    to_address: str
+    amount: int = Field(gt=0)
+    contract_address: Optional[str] = None
+
+
+class BatchTransferCreateModel(Base):
+    batch_id: str = Field(min_length=1, max_length=64)
+    mainnet: str
+    from_address: str
+    items: List[BatchTransferItemModel] = Field(
+        min_length=1, max_length=settings.TRANSFER_BATCH_MAX_ITEMS
+    )
+
+    @field_validator("mainnet")
+    def validate_chains(cls, value):
+        if value not in AvailableChainNodes:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Unavailable Chain",
+            )
+        return value
+
+
+class BatchTransferItemViewModel(Base):
+    batch_index: int
+    to_address: str
+    amount: int
+    contract_address: Optional[str]
+    status: str
+    nonce: Optional[int]
+    tx_hash: Optional[str]
+    error: Optional[str]
+
+
+class BatchTransferViewModel(Base):
+    batch_id: str
+    sent: int
+    failed: int
+    unknown: int
+    items: List[BatchTransferItemViewModel]
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from .base import Base
 from pydantic import Field, field_validator
 from fastapi import HTTPException, status
@@ -9,7 +11,7 @@ class WalletViewModel(Base):
     address: str
     is_secure: bool
     private_key: str = Field(default=None)
-    mnemonics: str = Field(default=None)
+    mnemonics: Optional[str] = Field(default=None)
 
 
 class WalletSecuredViewModel(Base):
@@ -17,6 +19,17 @@ class WalletSecuredViewModel(Base):
     is_secure: bool
 
 
+class WalletBatchItemModel(Base):
+    address: str
+    created: bool
+
+
+class WalletBatchModel(Base):
+    created: int
+    conflicts: int
+    items: List[WalletBatchItemModel]
+
+
 class WalletUpdateModel(Base):
     is_secure: bool
 
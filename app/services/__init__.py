@@ -1,6 +1,17 @@
 from .actions import ActionService
 from .auth import AuthService
 from .permissions import PermissionService
+from .portfolio import PortfolioService
+from .transactions import TransactionSyncService
+from .transfers import BatchTransferService, TransferService
 
 
-__all__ = ["ActionService", "AuthService", "PermissionService"]
+__all__ = [
+    "ActionService",
+    "AuthService",
+    "BatchTransferService",
+    "PermissionService",
+    "PortfolioService",
+    "TransactionSyncService",
+    "TransferService",
+]
@@ -6,7 +6,7 @@ from fastapi import HTTPException, status
 from app.core.settings import settings
 from app.schemas.verify_scheme import UpdateVerifiedEmail
 from app.schemas.user_scheme import UserResetPassword
-from app.utils.hashing import verify_password, hash_password
+from app.utils.hashing import verify_password_async, hash_password_async
 
 from app.repositories import UserRepository
 from app.models import User
@@ -18,26 +18,31 @@ class ActionService:
     async def confirm_reset_password(
         token: str,
         user_instance: UserResetPassword,
+        user_service: UserRepository,
     ) -> bool:
         try:
             payload = jwt.decode(
                 token, settings.JWT_RESET_PASSWORD_SECRET_KEY, settings.ALGORITHM
             )
 
-            user_instance.password = hash_password(user_instance.password)
-            await UserRepository.update(user_instance, email=payload.get("email"))
+            user_instance.password = await hash_password_async(user_instance.password)
+            await user_service.update(user_instance, email=payload.get("email"))
 
             return True
 
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=403, detail="Token Has Been Expired")
 
+        except HTTPException:
+            raise
+
         except Exception as e:
             return False
 
     @staticmethod
     async def verify_email(
         token: str,
+        user_service: UserRepository,
     ) -> bool:
 
         try:
@@ -45,7 +50,7 @@ class ActionService:
                 token, settings.JWT_VERIFY_SECRET_KEY, settings.ALGORITHM
             )
             user_instance = UpdateVerifiedEmail(is_verified=True)
-            await UserRepository.update(user_instance, email=payload.get("email"))
+            await user_service.update(user_instance, email=payload.get("email"))
 
             return True
 
@@ -59,13 +64,14 @@ class ActionService:
     async def authenticate_user(
         username: str,
         password: str,
+        user_service: UserRepository,
     ) -> Optional[User]:
-        user = await UserRepository.get_single(username=username)
+        user = await user_service.get_credentials(username=username)
 
         if not user:
             return False
 
-        if not verify_password(password, user.password):
+        if not await verify_password_async(password, user.password):
             return False
 
         return user
@@ -1,14 +1,20 @@
+import logging
+import time
 from typing import Annotated, Optional
 
 from fastapi import Depends, HTTPException, status, Header, Security
 from fastapi.security import api_key
 
 from jose import jwt, ExpiredSignatureError, JWTError
+from redis.exceptions import RedisError
 
+from app.core.cache import PrincipalCache, TokenVersions
+from app.core.revocation import RevocationStore
 from app.core.settings import settings
 from app.utils.hashing import verify_password
 from app.repositories import UserRepository
 from app.models import User
+from app.schemas.auth_scheme import Principal
 
 
 api_key_header = api_key.APIKeyHeader(name="Authorization")
@@ -21,6 +27,12 @@ class AuthService:
         user_service: Annotated[UserRepository, Depends(UserRepository)],
         token: str = Security(api_key_header),
     ) -> Optional[User]:
+        """
+        Authorize a request by loading the user of the access token.
+
+        Like get_current_principal, rejects tokens whose `ver` claim no
+        longer matches the user's TokenVersions counter.
+        """
 
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,17 +57,97 @@ class AuthService:
         except JWTError:
             raise credentials_exception
 
-        user = await user_service.get_single(username=username)
-        if not user:
+        if await RevocationStore.is_revoked(payload.get("sid")):
             raise credentials_exception
 
+        version, expires_at = payload.get("ver"), payload.get("exp")
+        user = await PrincipalCache.get(username, version, expires_at)
+        if user is None:
+            user = await user_service.get_single(username=username)
+            if not user:
+                raise credentials_exception
+
+            await PrincipalCache.set(user, version, expires_at)
+
+        # Tokens issued while Redis was unavailable carry no version.
+        if "ver" in payload:
+            current = await TokenVersions.get(user.id)
+            if current is not None and version != current:
+                raise credentials_exception
+
         return user
 
+    @staticmethod
+    async def get_current_principal(
+        user_service: Annotated[UserRepository, Depends(UserRepository)],
+        token: str = Security(api_key_header),
+    ) -> Principal:
+        """
+        Authorize a request from the claims signed into the access token.
+
+        The token is only accepted while its `ver` claim matches the user's
+        TokenVersions counter. Tokens without claims, or requests made while
+        Redis is unavailable, fall back to get_current_user.
+        """
+
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could Not Validate Credentials",
+        )
+
+        try:
+            payload = jwt.decode(
+                token,
+                settings.JWT_USER_SECRET_KEY,
+                algorithms=[settings.ALGORITHM],
+            )
+            username = payload.get("sub")
+            user_id = payload.get("uid")
+            mode = payload.get("mode")
+
+            if username is None or mode != "access_token":
+                raise credentials_exception
+
+        except ExpiredSignatureError:
+            raise HTTPException(status_code=403, detail="Token Has Been Expired")
+
+        except JWTError:
+            raise credentials_exception
+
+        if await RevocationStore.is_revoked(payload.get("sid")):
+            raise credentials_exception
+
+        version = await TokenVersions.get(user_id) if user_id is not None else None
+        if version is None:
+            user = await AuthService.get_current_user(user_service, token)
+            return Principal.model_validate(user)
+
+        if payload.get("ver") != version:
+            raise credentials_exception
+
+        principal = Principal(
+            id=user_id,
+            username=username,
+            is_active=payload.get("is_active", True),
+            is_verified=payload.get("is_verified", False),
+            is_admin=payload.get("is_admin", False),
+        )
+        if not principal.is_active:
+            raise credentials_exception
+
+        return principal
+
     @staticmethod
     async def get_access_by_refresh_token(
         user_service: Annotated[UserRepository, Depends(UserRepository)],
         refresh_token: str = Security(api_key_header),
     ) -> Optional[User]:
+        """
+        Resolve the user of a refresh token and consume the token.
+
+        Refresh tokens are single use: presenting one twice revokes its whole
+        session, so a stolen token stops working once either party rotates.
+        """
 
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,9 +161,16 @@ class AuthService:
                 algorithms=[settings.ALGORITHM],
             )
             username = payload.get("sub")
+            session_id = payload.get("sid")
+            token_id = payload.get("jti")
             mode = payload.get("mode")
 
-            if username is None or mode != "refresh_token":
+            if (
+                username is None
+                or session_id is None
+                or token_id is None
+                or mode != "refresh_token"
+            ):
                 raise credentials_exception
 
         except ExpiredSignatureError:
@@ -80,6 +179,24 @@ class AuthService:
         except JWTError:
             raise credentials_exception
 
+        ttl = max(int(payload["exp"] - time.time()), 1)
+        try:
+            if await RevocationStore.is_revoked(session_id):
+                raise credentials_exception
+
+            if not await RevocationStore.consume(token_id, ttl=ttl):
+                await RevocationStore.revoke(
+                    session_id, ttl=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+                )
+                raise credentials_exception
+
+        except RedisError as e:
+            logging.error(e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Unable To Refresh Token",
+            )
+
         user = await user_service.get_single(username=username)
         if not user:
             raise credentials_exception
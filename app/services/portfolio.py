@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, Tuple
+
+from app.core.settings import settings
+from app.external_services import CheckerService
+from app.schemas.checker_scheme import (
+    CheckerParsedData,
+    PortfolioEntryModel,
+    PortfolioModel,
+    PortfolioTokenModel,
+)
+
+
+class PortfolioService:
+    """
+    Value a user's wallets across chains in one concurrent fan-out.
+
+    Balance lookups share a process-wide semaphore per chain so a large
+    portfolio cannot exhaust the chain's provider quota, and each lookup has
+    its own deadline; lookups that time out or fail are reported, not raised.
+    Tokens are totalled per contract address.
+    """
+
+    _semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def _semaphore(cls, chain_name: str) -> asyncio.Semaphore:
+        semaphore = cls._semaphores.get(chain_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.PORTFOLIO_PROVIDER_CONCURRENCY)
+            cls._semaphores[chain_name] = semaphore
+        return semaphore
+
+    @classmethod
+    async def _fetch(cls, address: str, chain_name: str) -> PortfolioEntryModel:
+        try:
+            # The deadline starts once the lookup holds a slot: time spent
+            # queued behind other lookups is not held against it.
+            async with cls._semaphore(chain_name):
+                data, *_ = await asyncio.wait_for(
+                    CheckerService.fetch_balances_cached(
+                        address=address, chain_name=chain_name
+                    ),
+                    timeout=settings.PORTFOLIO_CALL_TIMEOUT_SECONDS,
+                )
+            balances = CheckerParsedData.model_validate(data)
+        except asyncio.TimeoutError:
+            return PortfolioEntryModel(
+                address=address, chain_name=chain_name, status="timeout"
+            )
+        except Exception as e:
+            logging.warning(e)
+            return PortfolioEntryModel(
+                address=address, chain_name=chain_name, status="error"
+            )
+
+        return PortfolioEntryModel(
+            address=address,
+            chain_name=chain_name,
+            status="ok",
+            quote=sum(item.quote or 0 for item in balances.items),
+            balances=balances,
+        )
+
+    @classmethod
+    async def fetch(
+        cls, addresses: Iterable[str], chains: Iterable[str]
+    ) -> PortfolioModel:
+        chains = list(chains)
+        entries = await asyncio.gather(
+            *(cls._fetch(address, chain) for address in addresses for chain in chains)
+        )
+
+        tokens: Dict[Tuple[str, str], PortfolioTokenModel] = {}
+        for entry in entries:
+            if entry.balances is None:
+                continue
+            for item in entry.balances.items:
+                contract = (item.contract_address or "").lower()
+                key = (entry.chain_name, contract or item.contract_display_name)
+                token = tokens.get(key)
+                if token is None:
+                    token = tokens[key] = PortfolioTokenModel(
+                        chain_name=entry.chain_name,
+                        contract_address=item.contract_address,
+                        contract_display_name=item.contract_display_name,
+                        logo_url=item.logo_url,
+                    )
+                token.balance += item.balance or 0
+                token.quote += item.quote or 0
+
+        return PortfolioModel(
+            total_quote=sum(entry.quote for entry in entries),
+            complete=all(entry.status == "ok" for entry in entries),
+            tokens=sorted(tokens.values(), key=lambda token: -token.quote),
+            entries=entries,
+        )
@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.core.settings import settings
+from app.external_services import CheckerService
+from app.repositories import TransactionRepository
+from app.schemas.transactor_scheme import TransactorParsedData
+
+
+class TransactionSyncService:
+    """
+    Incremental sync of provider transaction history into the local store.
+
+    Each (address, chain) keeps a cursor at its highest final block: one at
+    least the chain's confirmation depth below the address's newest
+    transaction. Items at or below it are never written again; the tail
+    above it is upserted on every sync, and tail rows a reorg dropped are
+    deleted. Addresses whose history nobody requested for
+    TRANSACTION_SYNC_ACTIVE_SECONDS are no longer synced in the background
+    and are forgotten.
+
+    The provider takes no starting block, so every sync still fetches the
+    address's full history; the cursor only bounds what is written.
+    """
+
+    _confirmation_depths = settings.build_confirmation_depths()
+
+    @classmethod
+    def confirmation_depth(cls, chain_name: str) -> int:
+        return cls._confirmation_depths.get(
+            chain_name, settings.TRANSACTION_CONFIRMATION_DEPTH
+        )
+
+    @classmethod
+    async def sync(
+        cls,
+        transaction_service: TransactionRepository,
+        address: str,
+        chain_name: str,
+        max_age: Optional[float] = None,
+    ) -> Optional[int]:
+        """
+        Sync unless the cursor is younger than `max_age` seconds.
+
+        Returns the chain id, or None when the address was never synced and
+        the provider is unavailable.
+        """
+        cursor = await transaction_service.get_cursor(address, chain_name)
+        if (
+            cursor is not None
+            and max_age is not None
+            and datetime.utcnow() - cursor.synced_at < timedelta(seconds=max_age)
+        ):
+            return cursor.chain_id
+
+        try:
+            history = TransactorParsedData.model_validate(
+                await CheckerService.fetch_transactions(
+                    address=address, chain_name=chain_name
+                )
+            )
+        except Exception as e:
+            logging.warning(e)
+            return cursor.chain_id if cursor is not None else None
+
+        final_height = cursor.block_height if cursor is not None else -1
+        tail = [item for item in history.items if item.block_height > final_height]
+        newest = max((item.block_height for item in tail), default=final_height)
+
+        await transaction_service.upsert_many(address, chain_name, tail)
+        # An empty response is more likely a provider hiccup than a reorg
+        # that dropped the whole tail.
+        if cursor is not None and history.items:
+            await transaction_service.delete_dropped(
+                address,
+                chain_name,
+                above=final_height,
+                keep=[item.tx_hash for item in tail],
+            )
+        await transaction_service.set_cursor(
+            address,
+            chain_name,
+            chain_id=history.chain_id,
+            block_height=max(final_height, newest - cls.confirmation_depth(chain_name)),
+        )
+        return history.chain_id
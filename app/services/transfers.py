@@ -0,0 +1,491 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from app.core.database import async_session, unit_of_work
+from app.core.redis import redis_client
+from app.core.settings import settings
+from app.external_services import (
+    EvmTransactor,
+    RpcError,
+    TransactionService,
+    nonce_manager,
+)
+from app.external_services.crypto_engine import crypto_engine
+from app.external_services.evm import NATIVE_TRANSFER_GAS
+from app.models import Transfer
+from app.repositories import TransferRepository
+from app.schemas.transactor_scheme import BatchTransferCreateModel
+
+# "unknown": the broadcast got no answer, so the transfer may have been paid.
+FINAL_STATUSES = {"sent", "failed", "unknown"}
+# Database polling interval when Redis is unavailable.
+TRANSFER_POLL_SECONDS = 1
+
+
+class TransferService:
+    """
+    Background transfers: sending them, and waiting for their status.
+
+    Workers publish every status change on `transfers:{id}`, which lets
+    long-polling requests wake up as soon as a transfer moves on. Waiting
+    requests read through short sessions, so they hold no database
+    connection while idle.
+    """
+
+    @staticmethod
+    def _channel(transfer_id: int) -> str:
+        return f"transfers:{transfer_id}"
+
+    @staticmethod
+    async def send(transfer: Transfer, private_key: str) -> bool:
+        values = {
+            "mainnet": transfer.mainnet,
+            "from_private_key": private_key,
+            "from_address": transfer.from_address,
+            "to_address": transfer.to_address,
+            "amount": int(transfer.amount),
+        }
+        if transfer.kind == "native":
+            return await TransactionService.send_native(**values)
+        if transfer.kind == "erc20":
+            return await TransactionService.send_erc20(
+                contract_address=transfer.contract_address, **values
+            )
+        return await TransactionService.send_bep20(
+            contract_address=transfer.contract_address, **values
+        )
+
+    @classmethod
+    async def notify(cls, transfer_id: int, status: str) -> None:
+        try:
+            await redis_client.publish(cls._channel(transfer_id), status)
+        except RedisError as e:
+            logging.warning(e)
+
+    @staticmethod
+    async def _load(transfer_id: int, user_id: int) -> Optional[Transfer]:
+        async with async_session() as session:
+            return await TransferRepository(session).get_single(
+                id=transfer_id, user_id=user_id
+            )
+
+    @classmethod
+    async def wait(
+        cls, transfer_id: int, user_id: int, timeout: float
+    ) -> Optional[Transfer]:
+        """
+        Return the transfer once its status changes or `timeout` elapses.
+        """
+        transfer = await cls._load(transfer_id, user_id)
+        if transfer is None or transfer.status in FINAL_STATUSES or timeout <= 0:
+            return transfer
+
+        initial_status = transfer.status
+        deadline = time.monotonic() + timeout
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(cls._channel(transfer_id))
+                # Re-read after subscribing so a change in between is not missed.
+                transfer = await cls._load(transfer_id, user_id)
+                while transfer.status == initial_status:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=remaining
+                    )
+                    if message is not None:
+                        transfer = await cls._load(transfer_id, user_id)
+        except RedisError as e:
+            logging.warning(e)
+            while transfer.status == initial_status and time.monotonic() < deadline:
+                await asyncio.sleep(TRANSFER_POLL_SECONDS)
+                transfer = await cls._load(transfer_id, user_id)
+
+        return transfer
+
+
+class BatchTransferService:
+    """
+    Payouts from one wallet to many recipients in a single request.
+
+    Every item is a transfer keyed by (user, batch_id, index). Nonces for
+    the whole batch are reserved at once, signing runs on the crypto engine
+    and broadcasts go out as JSON-RPC batches.
+
+    Signed transactions are committed before they are broadcast, so a
+    resumed batch re-broadcasts them instead of paying twice; only items the
+    node rejected outright are signed again with a new nonce.
+
+    A rejected item leaves a gap in the wallet's nonces that later items
+    would queue behind, so the gap is closed before the run returns.
+    """
+
+    @staticmethod
+    def _matches(transfers: List[Transfer], items: List[Dict]) -> bool:
+        return len(transfers) == len(items) and all(
+            (
+                transfer.mainnet,
+                transfer.from_address,
+                transfer.to_address,
+                int(transfer.amount),
+                transfer.contract_address,
+            )
+            == (
+                item["mainnet"],
+                item["from_address"],
+                item["to_address"],
+                item["amount"],
+                item["contract_address"],
+            )
+            for transfer, item in zip(transfers, items)
+        )
+
+    @staticmethod
+    def _outcome(
+        transfer: Transfer,
+        status: str,
+        error: Optional[str] = None,
+        signed: bool = True,
+    ) -> Dict:
+        """
+        Record an outcome on `transfer`; returns the values to store.
+
+        With signed=False the signed transaction is dropped, so the next
+        attempt signs the item again.
+        """
+        transfer.status, transfer.error = status, error and error[:256]
+        values = {"id": transfer.id, "status": status, "error": transfer.error}
+        if not signed:
+            transfer.nonce = transfer.tx_hash = transfer.raw_transaction = None
+            values.update(nonce=None, tx_hash=None, raw_transaction=None)
+        return values
+
+    @staticmethod
+    async def _save(updates: List[Dict]) -> None:
+        if updates:
+            async with unit_of_work() as session:
+                await TransferRepository(session).update_many(updates)
+
+    @classmethod
+    async def run(
+        cls,
+        transactor: EvmTransactor,
+        user_id: int,
+        private_key: str,
+        form: BatchTransferCreateModel,
+    ) -> List[Transfer]:
+        """
+        Send the unfinished items of a batch; returns all of its transfers.
+        """
+        items = [
+            {
+                "kind": "native" if item.contract_address is None else "erc20",
+                "mainnet": form.mainnet,
+                "from_address": form.from_address,
+                **item.model_dump(),
+            }
+            for item in form.items
+        ]
+        async with unit_of_work() as session:
+            repository = TransferRepository(session)
+            transfers = await repository.create_batch(user_id, form.batch_id, items)
+            if not cls._matches(transfers, items):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Batch Id Already Used",
+                )
+            claimed = await repository.claim_batch(
+                user_id, form.batch_id, settings.TRANSFER_BATCH_STALE_SECONDS
+            )
+
+        gaps: List[int] = []
+        try:
+            signed = [transfer for transfer in claimed if transfer.raw_transaction]
+            unsigned = [
+                transfer for transfer in claimed if not transfer.raw_transaction
+            ]
+            for attempt in range(2):
+                if attempt:
+                    await nonce_manager.resync(
+                        transactor.chain_name,
+                        form.from_address,
+                        await transactor.pending_nonce(form.from_address),
+                        transactor.recover,
+                    )
+                signed += await cls._sign(
+                    transactor, private_key, form.from_address, unsigned
+                )
+                unsigned = await cls._broadcast(
+                    transactor, form.from_address, signed, gaps
+                )
+                signed = []
+                if not unsigned:
+                    break
+
+            await cls._save(
+                [
+                    cls._outcome(transfer, "failed", "Nonce Already Used")
+                    for transfer in unsigned
+                ]
+            )
+            await cls._fill_gaps(
+                transactor, private_key, form.from_address, gaps, claimed
+            )
+        except Exception:
+            for nonce in gaps:
+                await nonce_manager.release(
+                    transactor.chain_name, form.from_address, nonce
+                )
+            # Signed items may have reached the node in an earlier attempt.
+            await cls._save(
+                [
+                    cls._outcome(
+                        transfer,
+                        "unknown" if transfer.raw_transaction else "failed",
+                        "Batch Interrupted",
+                    )
+                    for transfer in claimed
+                    if transfer.status == "processing"
+                ]
+            )
+            raise
+
+        async with unit_of_work() as session:
+            return await TransferRepository(session).get_batch(user_id, form.batch_id)
+
+    @classmethod
+    async def _sign(
+        cls,
+        transactor: EvmTransactor,
+        private_key: str,
+        from_address: str,
+        transfers: List[Transfer],
+    ) -> List[Transfer]:
+        """
+        Sign transfers with fresh nonces and store them; returns the signed ones.
+        """
+        if not transfers:
+            return []
+
+        chain_id, gas_price = await asyncio.gather(
+            transactor.chain_id(), transactor.gas_price()
+        )
+        tokens = [transfer for transfer in transfers if transfer.contract_address]
+        estimates = await transactor.rpc.batch(
+            [
+                EvmTransactor.estimate_call(
+                    from_address,
+                    transfer.to_address,
+                    int(transfer.amount),
+                    transfer.contract_address,
+                )
+                for transfer in tokens
+            ]
+        )
+        estimates = dict(zip((transfer.id for transfer in tokens), estimates))
+
+        updates, ready, transactions = [], [], []
+        for transfer in transfers:
+            gas = NATIVE_TRANSFER_GAS
+            if transfer.contract_address:
+                estimate = estimates[transfer.id]
+                if isinstance(estimate, RpcError):
+                    updates.append(
+                        cls._outcome(transfer, "failed", estimate.message, False)
+                    )
+                    continue
+                gas = EvmTransactor.gas_limit(estimate)
+            ready.append(transfer)
+            transactions.append(
+                EvmTransactor.transaction(
+                    chain_id,
+                    gas_price,
+                    transfer.to_address,
+                    int(transfer.amount),
+                    transfer.contract_address,
+                    gas,
+                )
+            )
+
+        if ready:
+            nonces = await nonce_manager.reserve_many(
+                transactor.chain_name,
+                from_address,
+                len(ready),
+                lambda: transactor.pending_nonce(from_address),
+                transactor.recover,
+            )
+            try:
+                signatures = await crypto_engine.sign_many(
+                    private_key,
+                    [
+                        {**transaction, "nonce": nonce}
+                        for transaction, nonce in zip(transactions, nonces)
+                    ],
+                )
+            except Exception:
+                for nonce in nonces:
+                    await nonce_manager.release(
+                        transactor.chain_name, from_address, nonce
+                    )
+                raise
+
+            await nonce_manager.record(
+                transactor.chain_name,
+                from_address,
+                {nonce: raw for nonce, (raw, _) in zip(nonces, signatures)},
+            )
+            for transfer, nonce, (raw, tx_hash) in zip(ready, nonces, signatures):
+                transfer.nonce, transfer.tx_hash = nonce, tx_hash
+                transfer.raw_transaction = raw
+                updates.append(
+                    {
+                        "id": transfer.id,
+                        "nonce": nonce,
+                        "tx_hash": tx_hash,
+                        "raw_transaction": raw,
+                        "error": None,
+                    }
+                )
+
+        await cls._save(updates)
+        return ready
+
+    @classmethod
+    async def _broadcast(
+        cls,
+        transactor: EvmTransactor,
+        from_address: str,
+        transfers: List[Transfer],
+        gaps: List[int],
+    ) -> List[Transfer]:
+        """
+        Broadcast signed transfers and store the outcomes.
+
+        Returns the transfers whose nonce went to another transaction; they
+        have to be signed again. Nonces of rejected transfers are added to
+        `gaps`.
+        """
+        if not transfers:
+            return []
+
+        try:
+            results = await transactor.rpc.batch(
+                [
+                    ("eth_sendRawTransaction", [transfer.raw_transaction])
+                    for transfer in transfers
+                ]
+            )
+        except httpx.HTTPError as e:
+            # The node may have taken some; a resume re-broadcasts them all.
+            logging.error(e)
+            await cls._save(
+                [
+                    cls._outcome(transfer, "unknown", "Broadcast Outcome Unknown")
+                    for transfer in transfers
+                ]
+            )
+            return []
+
+        updates, taken = [], []
+        for transfer, result in zip(transfers, results):
+            if not isinstance(result, RpcError) or result.already_known:
+                updates.append(cls._outcome(transfer, "sent"))
+            elif result.unanswered:
+                updates.append(
+                    cls._outcome(transfer, "unknown", "Broadcast Outcome Unknown")
+                )
+            elif result.nonce_too_low:
+                taken.append(transfer)
+            else:
+                gaps.append(transfer.nonce)
+                updates.append(
+                    cls._outcome(transfer, "failed", result.message, signed=False)
+                )
+
+        # "nonce too low" also comes back for our own transaction once it is
+        # mined, which a re-broadcast after a crash runs into.
+        retry = []
+        found = await transactor.rpc.batch(
+            [("eth_getTransactionByHash", [transfer.tx_hash]) for transfer in taken]
+        )
+        for transfer, result in zip(taken, found):
+            if isinstance(result, RpcError):
+                updates.append(
+                    cls._outcome(transfer, "unknown", "Broadcast Outcome Unknown")
+                )
+            elif result is not None:
+                updates.append(cls._outcome(transfer, "sent"))
+            else:
+                updates.append(cls._outcome(transfer, "processing", signed=False))
+                retry.append(transfer)
+
+        await cls._save(updates)
+        return retry
+
+    @classmethod
+    async def _fill_gaps(
+        cls,
+        transactor: EvmTransactor,
+        private_key: str,
+        from_address: str,
+        gaps: List[int],
+        transfers: List[Transfer],
+    ) -> None:
+        """
+        Close the nonces of rejected transfers that sent ones queue behind.
+
+        Each such nonce gets a zero-value transfer to the wallet itself. If
+        that is rejected as well, the transfers above the nonce cannot be
+        mined yet and go back to pending; resuming the batch signs the
+        rejected items onto the free nonces and re-broadcasts the rest.
+        """
+        sent = [transfer.nonce for transfer in transfers if transfer.status == "sent"]
+        blocking = sorted(nonce for nonce in gaps if sent and nonce < max(sent))
+        for nonce in set(gaps) - set(blocking):
+            await nonce_manager.release(transactor.chain_name, from_address, nonce)
+        if not blocking:
+            return
+
+        chain_id, gas_price = await asyncio.gather(
+            transactor.chain_id(), transactor.gas_price()
+        )
+        filler = EvmTransactor.transaction(chain_id, gas_price, from_address, 0)
+        fillers = {
+            nonce: EvmTransactor.sign(private_key, {**filler, "nonce": nonce})[0]
+            for nonce in blocking
+        }
+        await nonce_manager.record(transactor.chain_name, from_address, fillers)
+        try:
+            results = await transactor.rpc.batch(
+                [("eth_sendRawTransaction", [fillers[nonce]]) for nonce in blocking]
+            )
+        except httpx.HTTPError as e:
+            logging.error(e)
+            results = [RpcError({"message": str(e)})] * len(blocking)
+
+        unfilled = [
+            nonce
+            for nonce, result in zip(blocking, results)
+            if isinstance(result, RpcError) and not result.already_known
+        ]
+        if not unfilled:
+            return
+
+        for nonce in unfilled:
+            await nonce_manager.release(transactor.chain_name, from_address, nonce)
+        lowest = min(unfilled)
+        await cls._save(
+            [
+                cls._outcome(transfer, "pending", f"Queued Behind Nonce {lowest}")
+                for transfer in transfers
+                if transfer.status == "sent" and transfer.nonce > lowest
+            ]
+        )
@@ -0,0 +1,28 @@
+from Crypto.Cipher import AES
+
+from app.core.settings import settings
+
+
+NONCE_SIZE = 16
+TAG_SIZE = 16
+
+
+def _key() -> bytes:
+    return bytes.fromhex(settings.WALLET_POOL_ENCRYPTION_KEY)
+
+
+def encrypt(plaintext: bytes) -> bytes:
+    """
+    Encrypt with AES-256-GCM, returning nonce + tag + ciphertext.
+    """
+    cipher = AES.new(_key(), AES.MODE_GCM)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+    return cipher.nonce + tag + ciphertext
+
+
+def decrypt(blob: bytes) -> bytes:
+    nonce = blob[:NONCE_SIZE]
+    tag = blob[NONCE_SIZE : NONCE_SIZE + TAG_SIZE]
+    ciphertext = blob[NONCE_SIZE + TAG_SIZE :]
+    cipher = AES.new(_key(), AES.MODE_GCM, nonce=nonce)
+    return cipher.decrypt_and_verify(ciphertext, tag)
@@ -1,8 +1,21 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from app.core.settings import settings
+from app.utils.metrics import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    thread_name_prefix="password-hashing",
+)
+_pending_jobs = 0
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -10,3 +23,44 @@ def hash_password(password: str) -> str:
 
 def verify_password(non_hashed_password: str, hashed_password: str) -> str:
     return pwd_context.verify(non_hashed_password, hashed_password)
+
+
+async def _run_in_hashing_pool(func, *args):
+    """
+    Run a bcrypt call on the hashing pool, failing fast when it is saturated.
+    """
+    global _pending_jobs
+
+    if _pending_jobs >= settings.PASSWORD_HASHING_MAX_PENDING:
+        metrics.increment("password_hashing.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server Is Busy, Try Again Later",
+        )
+
+    queued_at = time.perf_counter()
+
+    def job():
+        started_at = time.perf_counter()
+        metrics.observe("password_hashing.wait", started_at - queued_at)
+        try:
+            return func(*args)
+        finally:
+            metrics.observe("password_hashing.run", time.perf_counter() - started_at)
+
+    _pending_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hashing_executor, job)
+    finally:
+        _pending_jobs -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hashing_pool(hash_password, password)
+
+
+async def verify_password_async(non_hashed_password: str, hashed_password: str) -> bool:
+    return await _run_in_hashing_pool(
+        verify_password, non_hashed_password, hashed_password
+    )
@@ -1,30 +1,64 @@
 from datetime import timedelta, datetime
+from typing import Optional
+from uuid import uuid4
 from jose import JWTError, jwt
 from app.core.settings import settings
+from app.models import User
 
 
-def create_access_token(data: dict):
+def create_access_token(
+    data: dict, user: Optional[User] = None, version: Optional[int] = 0
+):
+    """
+    Create an access token, embedding the user's authorization claims if given.
+
+    The claims let AuthService.get_current_principal authorize requests
+    without loading the user; `version` must be the user's current
+    TokenVersions value. Without a known version (Redis is unavailable) the
+    claims are left out, and every request loads the user instead.
+    """
+    data = dict(data)
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     data["exp"] = expire
     data["mode"] = "access_token"
 
+    if user is not None and version is not None:
+        data.update(
+            uid=user.id,
+            is_active=user.is_active,
+            is_verified=user.is_verified,
+            is_admin=user.is_admin,
+            ver=version,
+        )
+
     encoded_jwt = jwt.encode(data, settings.JWT_USER_SECRET_KEY, settings.ALGORITHM)
 
     return encoded_jwt
 
 
 def create_refresh_token(data: dict):
+    """
+    Create a single-use refresh token with a fresh `jti`.
+
+    `data` should carry the `sid` of the session the token belongs to.
+    """
+    data = dict(data)
     expire = datetime.utcnow() + timedelta(
         minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
     )
     data["exp"] = expire
     data["mode"] = "refresh_token"
+    data["jti"] = uuid4().hex
 
     encoded_jwt = jwt.encode(data, settings.JWT_USER_SECRET_KEY, settings.ALGORITHM)
 
     return encoded_jwt
 
 
+def create_session_id() -> str:
+    return uuid4().hex
+
+
 def create_verification_token(data: dict) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     data["exp"] = expire
@@ -0,0 +1,61 @@
+import zlib
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+# Lines are buffered up to this size before a chunk is sent.
+CHUNK_SIZE = 64 * 1024
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip, honouring q-values.
+
+    An explicit gzip entry wins over "*"; q=0 refuses the coding.
+    """
+    wildcard = None
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding in ("gzip", "x-gzip"):
+            return quality > 0
+        if coding == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
+
+
+async def ndjson_stream(
+    items: AsyncIterator[BaseModel], gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Encode models as newline-delimited JSON, optionally gzip-compressed.
+
+    Only one chunk of output is held in memory at a time.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    buffer = bytearray()
+
+    async for item in items:
+        buffer += item.model_dump_json().encode()
+        buffer += b"\n"
+        if len(buffer) < CHUNK_SIZE:
+            continue
+
+        chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+        buffer.clear()
+        if chunk:
+            yield chunk
+
+    chunk = bytes(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
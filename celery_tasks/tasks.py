@@ -1,15 +1,48 @@
 import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 from celery import Celery, shared_task
 
+from app.core.cache import BalanceCache
+from app.core.database import unit_of_work
 from app.core.settings import settings
+from app.external_services import BroadcastUnknown, CheckerService, CryptoEngine
 from app.external_services.email import send_email_async, send_reset_password_async
+from app.repositories import (
+    TransactionRepository,
+    TransferRepository,
+    WalletPoolRepository,
+    WalletRepository,
+)
+from app.services import TransactionSyncService, TransferService
 
 
 redis_url = settings.build_redis_dsn()
 
 celery = Celery(__name__, broker=redis_url, backend=redis_url)
 
+celery.conf.beat_schedule = {
+    "refill-wallet-pool": {
+        "task": "celery_tasks.tasks.refill_wallet_pool",
+        "schedule": settings.WALLET_POOL_REFILL_SECONDS,
+    },
+    "sync-transactions": {
+        "task": "celery_tasks.tasks.sync_transactions",
+        "schedule": settings.TRANSACTION_SYNC_SECONDS,
+    },
+    "prewarm-balances": {
+        "task": "celery_tasks.tasks.prewarm_balances",
+        "schedule": settings.BALANCE_PREWARM_SECONDS,
+    },
+    "sweep-transfers": {
+        "task": "celery_tasks.tasks.sweep_transfers",
+        "schedule": settings.TRANSFER_SWEEP_SECONDS,
+    },
+}
+
 
 @shared_task
 def send_email_verification_link(link: str, email: str):
@@ -31,3 +64,204 @@ def send_reset_password_token(token: str, email: str):
     asyncio.get_event_loop().run_until_complete(
         send_reset_password_async("Hello", email, body)
     )
+
+
+# Prefork pool children are daemonic and cannot start the crypto engine's
+# process pool, so tasks generate wallets inline.
+inline_crypto_engine = CryptoEngine(
+    workers=0,
+    batch_size=settings.CRYPTO_ENGINE_BATCH_SIZE,
+    batch_window=settings.CRYPTO_ENGINE_BATCH_WINDOW_SECONDS,
+)
+
+
+async def refill_wallet_pool_async() -> int:
+    async with unit_of_work() as session:
+        pooled = await WalletPoolRepository(session).count()
+
+    if pooled >= settings.WALLET_POOL_LOW_WATER:
+        return 0
+
+    missing = settings.WALLET_POOL_HIGH_WATER - pooled
+    while missing > 0:
+        generated = await inline_crypto_engine.generate_many(
+            min(missing, settings.WALLET_POOL_BATCH_SIZE)
+        )
+        batch = [
+            (secrets["evm"][0][0], secrets["evm"][0][1], mnemonics)
+            for mnemonics, secrets in generated
+        ]
+
+        async with unit_of_work() as session:
+            await WalletPoolRepository(session).add_many(batch)
+        missing -= len(batch)
+
+    return settings.WALLET_POOL_HIGH_WATER - pooled
+
+
+@shared_task
+def refill_wallet_pool():
+    """
+    Top the wallet pool back up to the high-water mark once it drops below
+    the low-water mark.
+    """
+    if not WalletPoolRepository.is_enabled():
+        return 0
+
+    return asyncio.get_event_loop().run_until_complete(refill_wallet_pool_async())
+
+
+async def sync_transactions_async() -> int:
+    synced_before = datetime.utcnow() - timedelta(
+        seconds=settings.TRANSACTION_SYNC_SECONDS
+    )
+    requested_after = datetime.utcnow() - timedelta(
+        seconds=settings.TRANSACTION_SYNC_ACTIVE_SECONDS
+    )
+    async with unit_of_work() as session:
+        repository = TransactionRepository(session)
+        await repository.expire_cursors(
+            requested_after, limit=settings.TRANSACTION_SYNC_BATCH_SIZE
+        )
+        stale = await repository.list_stale_cursors(
+            synced_before, requested_after, limit=settings.TRANSACTION_SYNC_BATCH_SIZE
+        )
+
+    for address, chain_name in stale:
+        async with unit_of_work() as session:
+            await TransactionSyncService.sync(
+                TransactionRepository(session), address, chain_name
+            )
+
+    return len(stale)
+
+
+@shared_task
+def sync_transactions():
+    """
+    Pull new blocks for the addresses with the oldest stored history, and
+    forget the addresses nobody asked about lately.
+    """
+    return asyncio.get_event_loop().run_until_complete(sync_transactions_async())
+
+
+async def prewarm_balances_async() -> int:
+    started_at = time.monotonic()
+    watched = await BalanceCache.watched(
+        since=time.time() - settings.BALANCE_PREWARM_ACTIVE_SECONDS
+    )
+
+    addresses_by_chain = defaultdict(list)
+    for chain, address in watched:
+        addresses_by_chain[chain].append(address)
+
+    refreshed = 0
+    for chain, addresses in addresses_by_chain.items():
+        # Refresh whatever would expire before the next run.
+        due_age = BalanceCache.ttl(chain) - settings.BALANCE_PREWARM_SECONDS
+        cached = await asyncio.gather(
+            *(BalanceCache.get(chain, address, watch=False) for address in addresses)
+        )
+        due = [
+            address
+            for address, entry in zip(addresses, cached)
+            if entry is None or time.time() - entry[1] >= due_age
+        ]
+
+        for start in range(0, len(due), settings.BALANCE_PREWARM_CHUNK_SIZE):
+            if time.monotonic() - started_at >= settings.BALANCE_PREWARM_SECONDS:
+                return refreshed
+
+            chunk = due[start : start + settings.BALANCE_PREWARM_CHUNK_SIZE]
+            chunk_started_at = time.monotonic()
+            results = await asyncio.gather(
+                *(CheckerService.refresh_balances(address, chain) for address in chunk),
+                return_exceptions=True,
+            )
+            refreshed += sum(not isinstance(result, Exception) for result in results)
+
+            budget = len(chunk) / settings.BALANCE_PREWARM_RATE_PER_SECOND
+            await asyncio.sleep(
+                max(0.0, budget - (time.monotonic() - chunk_started_at))
+            )
+
+    return refreshed
+
+
+@shared_task
+def prewarm_balances():
+    """
+    Refresh cached balances that clients are watching before they expire.
+    """
+    return asyncio.get_event_loop().run_until_complete(prewarm_balances_async())
+
+
+async def process_transfer_async(transfer_id: int) -> str:
+    async with unit_of_work() as session:
+        transfer = await TransferRepository(session).claim(transfer_id)
+        if transfer is None:
+            return "skipped"
+        wallet = await WalletRepository(session).get_single_wallet(
+            address=transfer.from_address, user_id=transfer.user_id
+        )
+    await TransferService.notify(transfer_id, transfer.status)
+
+    error, broadcast = None, {}
+    try:
+        if wallet is None:
+            raise ValueError("This Wallet Not Exists In Your Account")
+        sent = await TransferService.send(transfer, wallet.private_key)
+        status = "sent" if sent else "failed"
+    except BroadcastUnknown as e:
+        # Possibly paid: reported apart from failures so nobody pays again.
+        logging.error(e)
+        status, error = "unknown", str(e)
+        broadcast = {"tx_hash": e.tx_hash, "nonce": e.nonce}
+    except Exception as e:
+        logging.error(e)
+        status, error = "failed", str(e)[:256]
+
+    async with unit_of_work() as session:
+        await TransferRepository(session).finish(
+            transfer_id, status, error, **broadcast
+        )
+    await TransferService.notify(transfer_id, status)
+    return status
+
+
+@shared_task
+def process_transfer(transfer_id: int):
+    """
+    Sign and broadcast a pending transfer, then record the outcome.
+    """
+    return asyncio.get_event_loop().run_until_complete(
+        process_transfer_async(transfer_id)
+    )
+
+
+async def sweep_transfers_async() -> int:
+    async with unit_of_work() as session:
+        repository = TransferRepository(session)
+        requeued = await repository.requeue_stale(
+            settings.TRANSFER_STALE_SECONDS, limit=settings.TRANSFER_SWEEP_BATCH_SIZE
+        )
+        # A worker died between claim and finish: the transfer may or may not
+        # have been broadcast, so it is neither sent again nor reported failed.
+        interrupted = await repository.expire_stale(
+            settings.TRANSFER_STALE_SECONDS, "Transfer Interrupted"
+        )
+
+    for transfer_id in requeued:
+        process_transfer.delay(transfer_id)
+    for transfer_id in interrupted:
+        await TransferService.notify(transfer_id, "unknown")
+    return len(requeued) + len(interrupted)
+
+
+@shared_task
+def sweep_transfers():
+    """
+    Requeue transfers whose task was lost and mark the ones a crashed worker
+    left processing as unknown.
+    """
+    return asyncio.get_event_loop().run_until_complete(sweep_transfers_async())
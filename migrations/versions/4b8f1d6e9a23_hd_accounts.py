@@ -0,0 +1,49 @@
+"""hd accounts
+
+Revision ID: 4b8f1d6e9a23
+Revises: e2a7b0c94d31
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8f1d6e9a23"
+down_revision: Union[str, None] = "e2a7b0c94d31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hd_accounts",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("mnemonics", sa.String(length=128), nullable=False),
+        sa.Column("extended_key", sa.String(length=128), nullable=False),
+        sa.Column("next_index", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+        sa.UniqueConstraint("mnemonics"),
+        sa.UniqueConstraint("extended_key"),
+    )
+    op.add_column("wallets", sa.Column("derivation_index", sa.Integer(), nullable=True))
+    op.alter_column(
+        "wallets", "mnemonics", existing_type=sa.String(length=128), nullable=True
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM wallets WHERE mnemonics IS NULL")
+    op.alter_column(
+        "wallets", "mnemonics", existing_type=sa.String(length=128), nullable=False
+    )
+    op.drop_column("wallets", "derivation_index")
+    op.drop_table("hd_accounts")
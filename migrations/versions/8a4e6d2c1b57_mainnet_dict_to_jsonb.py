@@ -0,0 +1,74 @@
+"""mainnet_dict to jsonb
+
+Revision ID: 8a4e6d2c1b57
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+import pickle
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4e6d2c1b57"
+down_revision: Union[str, None] = "3f1c2a9b7d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.Integer),
+    sa.column("mainnet_dict", sa.LargeBinary),
+    sa.column("mainnet_dict_jsonb", postgresql.JSONB),
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("mainnet_dict_jsonb", postgresql.JSONB(), nullable=True),
+    )
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(users.c.id, users.c.mainnet_dict).where(
+            users.c.mainnet_dict.isnot(None)
+        )
+    ).all()
+    for user_id, pickled in rows:
+        conn.execute(
+            users.update()
+            .where(users.c.id == user_id)
+            .values(mainnet_dict_jsonb=dict(pickle.loads(pickled)))
+        )
+
+    op.drop_column("users", "mainnet_dict")
+    op.alter_column("users", "mainnet_dict_jsonb", new_column_name="mainnet_dict")
+
+
+def downgrade() -> None:
+    op.alter_column("users", "mainnet_dict", new_column_name="mainnet_dict_jsonb")
+    op.add_column(
+        "users",
+        sa.Column("mainnet_dict", sa.LargeBinary(), nullable=True),
+    )
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(users.c.id, users.c.mainnet_dict_jsonb).where(
+            users.c.mainnet_dict_jsonb.isnot(None)
+        )
+    ).all()
+    for user_id, chains in rows:
+        conn.execute(
+            users.update()
+            .where(users.c.id == user_id)
+            .values(mainnet_dict=pickle.dumps(chains))
+        )
+
+    op.drop_column("users", "mainnet_dict_jsonb")
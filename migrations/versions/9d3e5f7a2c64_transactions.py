@@ -0,0 +1,71 @@
+"""transactions
+
+Revision ID: 9d3e5f7a2c64
+Revises: 4b8f1d6e9a23
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3e5f7a2c64"
+down_revision: Union[str, None] = "4b8f1d6e9a23"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transactions",
+        sa.Column("chain_name", sa.String(length=64), nullable=False),
+        sa.Column("tx_hash", sa.String(length=128), nullable=False),
+        sa.Column("block_height", sa.BigInteger(), nullable=False),
+        sa.Column("successful", sa.Boolean(), nullable=False),
+        sa.Column("from_address", sa.String(length=128), nullable=False),
+        sa.Column("to_address", sa.String(length=128), nullable=False),
+        sa.Column("value", sa.String(length=128), nullable=False),
+        sa.Column("pretty_value_quote", sa.String(length=64), nullable=False),
+        sa.Column("log_events", postgresql.JSONB(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("chain_name", "tx_hash"),
+    )
+    op.create_index("ix_transactions_block_height", "transactions", ["block_height"])
+    op.create_index(
+        "ix_transactions_chain_from_block",
+        "transactions",
+        ["chain_name", "from_address", "block_height"],
+    )
+    op.create_index(
+        "ix_transactions_chain_to_block",
+        "transactions",
+        ["chain_name", "to_address", "block_height"],
+    )
+    op.create_table(
+        "transaction_sync",
+        sa.Column("address", sa.String(length=128), nullable=False),
+        sa.Column("chain_name", sa.String(length=64), nullable=False),
+        sa.Column("chain_id", sa.BigInteger(), nullable=False),
+        sa.Column("block_height", sa.BigInteger(), nullable=False),
+        sa.Column("synced_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("address", "chain_name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("transaction_sync")
+    op.drop_index("ix_transactions_chain_to_block", table_name="transactions")
+    op.drop_index("ix_transactions_chain_from_block", table_name="transactions")
+    op.drop_index("ix_transactions_block_height", table_name="transactions")
+    op.drop_table("transactions")
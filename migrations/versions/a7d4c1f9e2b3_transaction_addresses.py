@@ -0,0 +1,75 @@
+"""transaction addresses
+
+Revision ID: a7d4c1f9e2b3
+Revises: f3a9c2d7e815
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d4c1f9e2b3"
+down_revision: Union[str, None] = "f3a9c2d7e815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transaction_addresses",
+        sa.Column("address", sa.String(length=128), nullable=False),
+        sa.Column("chain_name", sa.String(length=64), nullable=False),
+        sa.Column("tx_hash", sa.String(length=128), nullable=False),
+        sa.Column("block_height", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("address", "chain_name", "tx_hash"),
+    )
+    op.create_index(
+        "ix_transaction_addresses_address_chain_block",
+        "transaction_addresses",
+        ["address", "chain_name", "block_height"],
+    )
+    # Stored histories only knew the sender and the recipient; syncs add
+    # the transactions an address only appears in from now on.
+    op.execute("""
+        INSERT INTO transaction_addresses
+            (address, chain_name, tx_hash, block_height, created_at, updated_at)
+        SELECT address, chain_name, tx_hash, block_height, now(), now()
+        FROM (
+            SELECT from_address AS address, chain_name, tx_hash, block_height
+            FROM transactions
+            UNION
+            SELECT to_address, chain_name, tx_hash, block_height
+            FROM transactions
+        ) AS parties
+        """)
+
+    op.add_column(
+        "transaction_sync",
+        sa.Column(
+            "requested_at",
+            sa.DateTime(),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_transaction_sync_requested_at", "transaction_sync", ["requested_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transaction_sync_requested_at", table_name="transaction_sync")
+    op.drop_column("transaction_sync", "requested_at")
+    op.drop_index(
+        "ix_transaction_addresses_address_chain_block",
+        table_name="transaction_addresses",
+    )
+    op.drop_table("transaction_addresses")
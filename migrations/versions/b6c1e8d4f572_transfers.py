@@ -0,0 +1,44 @@
+"""transfers
+
+Revision ID: b6c1e8d4f572
+Revises: 9d3e5f7a2c64
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b6c1e8d4f572"
+down_revision: Union[str, None] = "9d3e5f7a2c64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transfers",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("mainnet", sa.String(length=64), nullable=False),
+        sa.Column("contract_address", sa.String(length=128), nullable=True),
+        sa.Column("from_address", sa.String(length=128), nullable=False),
+        sa.Column("to_address", sa.String(length=128), nullable=False),
+        sa.Column("amount", sa.Numeric(precision=78, scale=0), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("error", sa.String(length=256), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_transfers_user_id", "transfers", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transfers_user_id", table_name="transfers")
+    op.drop_table("transfers")
@@ -0,0 +1,38 @@
+"""hot path indexes
+
+Revision ID: c5d92e7f4a18
+Revises: 8a4e6d2c1b57
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d92e7f4a18"
+down_revision: Union[str, None] = "8a4e6d2c1b57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_username_credentials",
+        "users",
+        ["username"],
+        unique=False,
+        postgresql_include=["id", "password", "is_active", "is_verified", "is_admin"],
+    )
+    op.create_index(
+        "ix_wallets_user_id_address",
+        "wallets",
+        ["user_id", "address"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallets_user_id_address", table_name="wallets")
+    op.drop_index("ix_users_username_credentials", table_name="users")
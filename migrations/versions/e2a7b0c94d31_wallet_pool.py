@@ -0,0 +1,35 @@
+"""wallet pool
+
+Revision ID: e2a7b0c94d31
+Revises: c5d92e7f4a18
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7b0c94d31"
+down_revision: Union[str, None] = "c5d92e7f4a18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_pool",
+        sa.Column("address", sa.String(length=128), nullable=False),
+        sa.Column("encrypted_secrets", sa.LargeBinary(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("address"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("wallet_pool")
@@ -0,0 +1,42 @@
+"""transfer batches
+
+Revision ID: f3a9c2d7e815
+Revises: b6c1e8d4f572
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a9c2d7e815"
+down_revision: Union[str, None] = "b6c1e8d4f572"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("transfers", sa.Column("batch_id", sa.String(length=64)))
+    op.add_column("transfers", sa.Column("batch_index", sa.Integer()))
+    op.add_column("transfers", sa.Column("nonce", sa.Integer()))
+    op.add_column("transfers", sa.Column("tx_hash", sa.String(length=66)))
+    op.add_column("transfers", sa.Column("raw_transaction", sa.Text()))
+    op.create_unique_constraint(
+        "transfers_user_id_batch_id_batch_index_key",
+        "transfers",
+        ["user_id", "batch_id", "batch_index"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "transfers_user_id_batch_id_batch_index_key", "transfers", type_="unique"
+    )
+    op.drop_column("transfers", "raw_transaction")
+    op.drop_column("transfers", "tx_hash")
+    op.drop_column("transfers", "nonce")
+    op.drop_column("transfers", "batch_index")
+    op.drop_column("transfers", "batch_id")
@@ -0,0 +1,271 @@
+import asyncio
+import gzip
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from app.core.cache import BalanceCache
+from app.core.database import unit_of_work
+from app.core.settings import settings
+from app.external_services import CheckerService
+from app.main import app
+from app.models import TransactionSync
+from app.repositories import TransactionRepository
+from app.schemas.auth_scheme import Principal
+from app.schemas.transactor_scheme import ParsedDataItem
+from app.services import AuthService
+from app.utils.streaming import accepts_gzip
+from celery_tasks import tasks
+
+from .conftest import async_client
+
+HOLDER = "0x" + "c" * 40
+SENDER = "0x" + "d" * 40
+
+
+@pytest.fixture
+def principal():
+    app.dependency_overrides[AuthService.get_current_principal] = lambda: Principal(
+        id=1, username="checker"
+    )
+    yield
+    app.dependency_overrides.pop(AuthService.get_current_principal)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", True),
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, gzip;q=0.5", True),
+        ("GZIP; Q=0.1", True),
+        ("gzip;q=0", False),
+        ("gzip;q=0.0, *", False),
+        ("*", True),
+        ("*;q=0", False),
+        ("identity", False),
+        ("", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
+
+
+@pytest.mark.asyncio
+class TestTransactionsStream:
+    CHAIN = "stream-chain"
+    URL = f"/checker/{HOLDER}/{CHAIN}/transactions"
+
+    @pytest.fixture(autouse=True)
+    async def history(self, principal):
+        async with unit_of_work() as session:
+            repository = TransactionRepository(session)
+            await repository.upsert_many(
+                HOLDER,
+                self.CHAIN,
+                [
+                    ParsedDataItem(
+                        tx_hash=f"0xd{block_height}",
+                        successful=True,
+                        block_height=block_height,
+                        from_address=HOLDER,
+                        to_address=SENDER,
+                        value="0",
+                        pretty_value_quote="$0.00",
+                    )
+                    for block_height in (1, 2)
+                ],
+            )
+            await repository.set_cursor(HOLDER, self.CHAIN, chain_id=1, block_height=2)
+        yield
+        # Other tests list every stale cursor.
+        async with unit_of_work() as session:
+            await session.execute(delete(TransactionSync).filter_by(address=HOLDER))
+
+    @pytest.mark.parametrize(
+        "accept_encoding, compressed",
+        [("gzip", True), ("gzip;q=0", False), ("identity", False)],
+    )
+    async def test_streams_ndjson(
+        self, accept_encoding, compressed, async_client: AsyncClient
+    ):
+        headers = {
+            "Accept": "application/x-ndjson",
+            "Accept-Encoding": accept_encoding,
+        }
+        async with async_client.stream("GET", self.URL, headers=headers) as response:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+        assert ("content-encoding" in response.headers) is compressed
+        if compressed:
+            body = gzip.decompress(body)
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        assert [line["tx_hash"] for line in lines] == ["0xd2", "0xd1"]
+
+    async def test_page_varies_on_negotiated_headers(self, async_client: AsyncClient):
+        response = await async_client.get(self.URL)
+
+        assert response.status_code == 200
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+        assert [item["tx_hash"] for item in response.json()["items"]] == [
+            "0xd2",
+            "0xd1",
+        ]
+
+
+@pytest.mark.asyncio
+class TestBalanceCache:
+    CHAIN = "eth"
+
+    @pytest.fixture
+    def gate(self):
+        """
+        The provider answers while the gate is open.
+        """
+        gate = asyncio.Event()
+        gate.set()
+        return gate
+
+    @pytest.fixture
+    def provider(self, monkeypatch, gate, fake_redis, principal):
+        calls = []
+
+        async def fetch_balances(address, chain_name):
+            calls.append(address)
+            await gate.wait()
+            return {
+                "address": address,
+                "chain_name": chain_name,
+                "quote_currency": "USD",
+                "items": [],
+            }
+
+        monkeypatch.setattr(
+            "app.external_services.liquid.Checker.fetch_balances", fetch_balances
+        )
+        return calls
+
+    @staticmethod
+    async def store(fake_redis, address: str, age: float) -> None:
+        entry = {
+            "data": {
+                "address": address,
+                "chain_name": "eth",
+                "quote_currency": "USD",
+                "items": [],
+            },
+            "fetched_at": time.time() - age,
+        }
+        await fake_redis.set(BalanceCache._key("eth", address), json.dumps(entry))
+
+    async def test_miss_fetches_inline(self, provider, async_client: AsyncClient):
+        address = "0x" + "1" * 40
+
+        response = await async_client.get(f"/checker/{address}/{self.CHAIN}")
+
+        assert response.status_code == 200
+        assert (response.headers["x-cache"], response.headers["age"]) == ("MISS", "0")
+        assert provider == [address]
+
+        response = await async_client.get(f"/checker/{address}/{self.CHAIN}")
+        assert response.headers["x-cache"] == "HIT"
+        assert provider == [address]
+
+    async def test_fresh_hit_skips_provider(
+        self, provider, fake_redis, async_client: AsyncClient
+    ):
+        address = "0x" + "2" * 40
+        await self.store(fake_redis, address, age=5)
+
+        response = await async_client.get(f"/checker/{address}/{self.CHAIN}")
+
+        assert response.status_code == 200
+        assert (response.headers["x-cache"], response.headers["age"]) == ("HIT", "5")
+        assert response.json()["address"] == address
+        assert provider == []
+
+    async def test_stale_hit_refreshes_once_in_background(
+        self, provider, gate, fake_redis, async_client: AsyncClient
+    ):
+        address = "0x" + "3" * 40
+        age = BalanceCache.ttl(self.CHAIN) + 10
+        await self.store(fake_redis, address, age=age)
+        gate.clear()
+
+        responses = await asyncio.gather(
+            *(async_client.get(f"/checker/{address}/{self.CHAIN}") for _ in range(3))
+        )
+        gate.set()
+        await asyncio.gather(*CheckerService._refresh_tasks)
+
+        assert [response.headers["x-cache"] for response in responses] == ["STALE"] * 3
+        assert all(int(response.headers["age"]) >= age for response in responses)
+        assert provider == [address]
+
+        response = await async_client.get(f"/checker/{address}/{self.CHAIN}")
+        assert (response.headers["x-cache"], response.headers["age"]) == ("HIT", "0")
+
+
+@pytest.mark.asyncio
+class TestPrewarm:
+    CHAIN = "eth"
+
+    @pytest.fixture
+    async def provider(self, monkeypatch, fake_redis):
+        """
+        Records refreshed addresses; each refresh advances the clock by `step`.
+        """
+        await fake_redis.flushall()
+        BalanceCache._local.clear()
+        provider = SimpleNamespace(refreshed=[], now=0.0, step=0.0)
+
+        async def refresh_balances(address, chain_name):
+            provider.refreshed.append(address)
+            provider.now += provider.step
+
+        monkeypatch.setattr(CheckerService, "refresh_balances", refresh_balances)
+        monkeypatch.setattr(
+            tasks,
+            "time",
+            SimpleNamespace(time=time.time, monotonic=lambda: provider.now),
+        )
+        monkeypatch.setattr(settings, "BALANCE_PREWARM_RATE_PER_SECOND", 1000)
+        return provider
+
+    async def watch(self, fake_redis, address: str, age: float) -> None:
+        await fake_redis.zadd(
+            BalanceCache.WATCH_KEY, {f"{self.CHAIN}|{address}": time.time() - age}
+        )
+
+    async def test_refreshes_watched_entries_due_to_expire(self, provider, fake_redis):
+        due_age = BalanceCache.ttl(self.CHAIN) - settings.BALANCE_PREWARM_SECONDS
+        fresh, due, missing, forgotten = ("0x" + digit * 40 for digit in "4567")
+        for address in (fresh, due, missing):
+            await self.watch(fake_redis, address, age=60)
+        await self.watch(
+            fake_redis, forgotten, age=settings.BALANCE_PREWARM_ACTIVE_SECONDS + 60
+        )
+        await TestBalanceCache.store(fake_redis, fresh, age=due_age - 5)
+        await TestBalanceCache.store(fake_redis, due, age=due_age + 5)
+        await TestBalanceCache.store(fake_redis, forgotten, age=due_age + 5)
+
+        assert await tasks.prewarm_balances_async() == 2
+        assert sorted(provider.refreshed) == sorted([due, missing])
+        watching = await fake_redis.zrange(BalanceCache.WATCH_KEY, 0, -1)
+        assert f"{self.CHAIN}|{forgotten}" not in watching
+
+    async def test_stops_at_the_run_budget(self, provider, monkeypatch, fake_redis):
+        monkeypatch.setattr(settings, "BALANCE_PREWARM_CHUNK_SIZE", 1)
+        provider.step = settings.BALANCE_PREWARM_SECONDS / 2
+        for digit in "89a":
+            await self.watch(fake_redis, "0x" + digit * 40, age=60)
+
+        assert await tasks.prewarm_balances_async() == 2
+        assert len(provider.refreshed) == 2
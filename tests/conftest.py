@@ -1,24 +1,36 @@
 import pytest
 import asyncio
+from contextlib import contextmanager
+from pathlib import Path
 
+from alembic import command
+from alembic.config import Config
+from fakeredis import aioredis as fake_aioredis
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from app.main import app
-from app.models import Base
 from app.core.settings import settings
+from app.core.database import QueryCounter
 
 DATABASE_URL = settings.build_postgres_dsn()
 engine_test = create_async_engine(DATABASE_URL, echo=settings.DB_ECHO)
 
+ROOT = Path(__file__).resolve().parents[1]
+
 
 @pytest.fixture(autouse=True, scope="session")
 async def prepare_db():
-    async with engine_test.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """
+    Build the schema with the migrations, so tests see the indexes and
+    constraints a deployed database has.
+    """
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    # env.py runs the migrations in an event loop of its own.
+    await asyncio.to_thread(command.upgrade, config, "head")
     yield
-    async with engine_test.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+    await asyncio.to_thread(command.downgrade, config, "base")
 
 
 @pytest.fixture(scope="session")
@@ -32,3 +44,33 @@ def event_loop(request):
 async def async_client():
     async with AsyncClient(app=app, base_url="http://test") as cli:
         yield cli
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when the wrapped requests execute more than `limit` queries.
+    """
+
+    @contextmanager
+    def budget(limit: int):
+        with QueryCounter() as counter:
+            yield counter
+        assert (
+            counter.count <= limit
+        ), f"{counter.count} queries executed, budget is {limit}"
+
+    return budget
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    In-memory Redis with Lua scripting, patched in for the nonce manager,
+    single flights and caches.
+    """
+    client = fake_aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr("app.external_services.nonce.redis_client", client)
+    monkeypatch.setattr("app.external_services.single_flight.redis_client", client)
+    monkeypatch.setattr("app.core.cache.redis_client", client)
+    return client
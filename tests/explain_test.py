@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.repositories import (
+    TransactionRepository,
+    TransferRepository,
+    UserRepository,
+    WalletRepository,
+)
+from .conftest import engine_test
+
+
+def find_seq_scans(plan):
+    if isinstance(plan, list):
+        return [scan for node in plan for scan in find_seq_scans(node)]
+
+    scans = []
+    if plan.get("Node Type") == "Seq Scan":
+        scans.append(plan.get("Relation Name"))
+    for key in ("Plan", "Plans"):
+        if key in plan:
+            scans.extend(find_seq_scans(plan[key]))
+    return scans
+
+
+@pytest.mark.asyncio
+class TestQueryPlans:
+    """
+    Repository queries must be answerable from an index.
+
+    Sequential scans are disabled for the planner, so a Seq Scan in the
+    plan means no usable index exists for the query.
+    """
+
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            UserRepository._single_query(id=1),
+            UserRepository._single_query(username="testuser"),
+            UserRepository._credentials_query("testuser"),
+            UserRepository._update_query({"is_verified": True}, email="user@gmail.com"),
+            WalletRepository._single_wallet_query(user_id=1),
+            WalletRepository._single_wallet_query(address="0x0", user_id=1),
+            WalletRepository._single_wallet_query(address="0x0"),
+            WalletRepository._reserve_indexes_query(1, 1),
+            TransactionRepository._cursor_query("0x0", "eth-mainnet"),
+            TransactionRepository._history_query("0x0", "eth-mainnet").limit(50),
+            TransferRepository._single_query(id=1, user_id=1),
+            TransferRepository._claim_query(1),
+            TransferRepository._batch_query(1, "payouts"),
+        ],
+    )
+    async def test_no_sequential_scan(self, statement):
+        sql = statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+
+        async with engine_test.connect() as conn:
+            await conn.execute(text("SET LOCAL enable_seqscan = off"))
+            plan = await conn.scalar(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            await conn.rollback()
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        assert not find_seq_scans(plan), f"Sequential scan in plan of: {sql}"
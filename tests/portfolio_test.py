@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.services import PortfolioService
+
+
+def balances(chain_name: str, *items):
+    return {
+        "address": "0x0",
+        "chain_name": chain_name,
+        "quote_currency": "USD",
+        "items": [
+            {
+                "logo_url": None,
+                "contract_address": contract_address,
+                "contract_display_name": name,
+                "pretty_quote": None,
+                "quote": quote,
+                "balance": 1,
+            }
+            for contract_address, name, quote in items
+        ],
+    }
+
+
+@pytest.mark.asyncio
+class TestPortfolioService:
+
+    async def test_tokens_are_keyed_by_contract(self, monkeypatch):
+        async def fetch_balances_cached(address, chain_name):
+            return (
+                balances(
+                    chain_name,
+                    ("0xAAA", "Tether USD", 1.0),
+                    ("0xBBB", "Tether USD", 2.0),
+                ),
+                0.0,
+                "HIT",
+            )
+
+        monkeypatch.setattr(
+            "app.services.portfolio.CheckerService.fetch_balances_cached",
+            fetch_balances_cached,
+        )
+
+        portfolio = await PortfolioService.fetch(["0x1", "0x2"], ["eth"])
+
+        assert [
+            (token.contract_address, token.quote) for token in portfolio.tokens
+        ] == [
+            ("0xBBB", 4.0),
+            ("0xAAA", 2.0),
+        ]
+
+    async def test_waiting_for_a_slot_does_not_count_against_deadline(
+        self, monkeypatch
+    ):
+        monkeypatch.setattr(
+            "app.services.portfolio.settings.PORTFOLIO_PROVIDER_CONCURRENCY", 1
+        )
+        monkeypatch.setattr(
+            "app.services.portfolio.settings.PORTFOLIO_CALL_TIMEOUT_SECONDS", 0.1
+        )
+        monkeypatch.setattr(PortfolioService, "_semaphores", {})
+
+        async def fetch_balances_cached(address, chain_name):
+            await asyncio.sleep(0.06)
+            return balances(chain_name), 0.0, "MISS"
+
+        monkeypatch.setattr(
+            "app.services.portfolio.CheckerService.fetch_balances_cached",
+            fetch_balances_cached,
+        )
+
+        portfolio = await PortfolioService.fetch(["0x1", "0x2", "0x3"], ["eth"])
+
+        assert portfolio.complete
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.external_services.single_flight import SingleFlight
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+
+    async def test_leader_and_followers_get_the_same_shape(self, fake_redis):
+        # Two instances stand in for two workers sharing Redis.
+        leader, follower = SingleFlight("test"), SingleFlight("test")
+        started = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            started.set()
+            await asyncio.sleep(0.05)
+            return Balance(address="0x0", amount=1)
+
+        leading = asyncio.create_task(leader.do("0x0", fetch))
+        await started.wait()
+        followed = await follower.do("0x0", fetch)
+
+        assert await leading == followed == {"address": "0x0", "amount": 1}
+        assert len(calls) == 1
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.database import unit_of_work
+from app.models import Transaction, TransactionSync
+from app.repositories import TransactionRepository
+from app.services import TransactionSyncService
+from app.schemas.transactor_scheme import ParsedDataItem
+
+HOLDER = "0x9858effd232b4033e47d90003d41ec34ecaeda94"
+SENDER = "0x6fac4d18c912343bf86fa7049364dd4e424ab9c0"
+TOKEN = "0xdac17f958d2ee523a2206206994597c13d831ec7"
+
+
+def item(tx_hash: str, block_height: int, from_address: str, to_address: str):
+    return ParsedDataItem(
+        tx_hash=tx_hash,
+        successful=True,
+        block_height=block_height,
+        from_address=from_address,
+        to_address=to_address,
+        value="0",
+        pretty_value_quote="$0.00",
+    )
+
+
+async def history(address: str, chain_name: str, **filters):
+    async with unit_of_work() as session:
+        transactions = await TransactionRepository(session).get_page(
+            address, chain_name, limit=50, **filters
+        )
+        return [transaction.tx_hash for transaction in transactions]
+
+
+@pytest.mark.asyncio
+class TestTransactionRepository:
+
+    async def test_history_includes_token_transfers_from_log_events(self):
+        async with unit_of_work() as session:
+            await TransactionRepository(session).upsert_many(
+                HOLDER,
+                "history-chain",
+                [
+                    item("0xa1", 1, HOLDER, SENDER),
+                    # An incoming token transfer: the holder is only in its logs.
+                    item("0xa2", 2, SENDER, TOKEN),
+                ],
+            )
+
+        assert await history(HOLDER, "history-chain") == ["0xa2", "0xa1"]
+        assert await history(HOLDER, "history-chain", direction="in") == ["0xa2"]
+        assert await history(HOLDER, "history-chain", direction="out") == ["0xa1"]
+        assert await history(SENDER, "history-chain") == []
+
+    async def test_dropped_transaction_stays_listed_for_other_address(self):
+        shared = item("0xb1", 10, SENDER, HOLDER)
+        async with unit_of_work() as session:
+            repository = TransactionRepository(session)
+            await repository.upsert_many(HOLDER, "reorg-chain", [shared])
+            await repository.upsert_many(SENDER, "reorg-chain", [shared])
+            await repository.delete_dropped(HOLDER, "reorg-chain", above=5, keep=[])
+
+        assert await history(HOLDER, "reorg-chain") == []
+        assert await history(SENDER, "reorg-chain") == ["0xb1"]
+
+        async with unit_of_work() as session:
+            await TransactionRepository(session).delete_dropped(
+                SENDER, "reorg-chain", above=5, keep=[]
+            )
+            stored = await session.scalar(select(Transaction).filter_by(tx_hash="0xb1"))
+        assert stored is None
+
+    async def test_unrequested_addresses_expire(self):
+        async with unit_of_work() as session:
+            repository = TransactionRepository(session)
+            for address in (HOLDER, SENDER):
+                await repository.upsert_many(
+                    address, "expiring-chain", [item("0xc1", 1, SENDER, HOLDER)]
+                )
+                await repository.set_cursor(address, "expiring-chain", 1, 1)
+            await session.execute(
+                update(TransactionSync)
+                .filter_by(address=HOLDER)
+                .values(requested_at=datetime.utcnow() - timedelta(days=30))
+            )
+
+        requested_after = datetime.utcnow() - timedelta(days=7)
+        async with unit_of_work() as session:
+            repository = TransactionRepository(session)
+            assert await repository.expire_cursors(requested_after, limit=10) == 1
+            assert await repository.get_cursor(HOLDER, "expiring-chain") is None
+            assert await repository.list_stale_cursors(
+                datetime.utcnow(), requested_after, limit=10
+            ) == [(SENDER, "expiring-chain")]
+            transactions = await repository.get_page(SENDER, "expiring-chain", limit=50)
+        assert [transaction.tx_hash for transaction in transactions] == ["0xc1"]
+
+
+@pytest.mark.asyncio
+async def test_empty_provider_response_keeps_stored_tail(monkeypatch):
+    responses = [
+        [item("0xd1", 100, HOLDER, SENDER).model_dump()],
+        [],
+    ]
+
+    async def fetch_transactions(address, chain_name):
+        return {
+            "address": address,
+            "chain_name": chain_name,
+            "chain_id": 1,
+            "items": responses.pop(0),
+        }
+
+    monkeypatch.setattr(
+        "app.services.transactions.CheckerService.fetch_transactions",
+        fetch_transactions,
+    )
+    for _ in range(2):
+        async with unit_of_work() as session:
+            await TransactionSyncService.sync(
+                TransactionRepository(session), HOLDER, "flaky-chain"
+            )
+
+    assert await history(HOLDER, "flaky-chain") == ["0xd1"]
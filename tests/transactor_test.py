@@ -0,0 +1,557 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import rlp
+from sqlalchemy import select, update
+from fastapi import HTTPException
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+
+from app.core.database import unit_of_work
+from app.external_services import (
+    BroadcastUnknown,
+    EvmTransactor,
+    NonceManager,
+    RpcError,
+    TransactorRegistry,
+    nonce_manager,
+)
+from app.models import Transfer, User, Wallet
+from app.repositories import TransferRepository
+from app.schemas.transactor_scheme import BatchTransferCreateModel
+from app.services import BatchTransferService
+from app.utils.metrics import metrics
+from celery_tasks import tasks
+
+PRIVATE_KEY = "0x1ab42cc412b618bdea3a599e3c9bae199ebf030895b039e9db1e30dafb12b727"
+RECIPIENT = "0x6Fac4D18c912343BF86fa7049364Dd4E424Ab9C0"
+SENDER = "0x9858EfFD232B4033E47d90003D41EC34EcaEda94"
+
+
+class TestEvmTransactor:
+
+    def test_transfer_data(self):
+        assert EvmTransactor.transfer_data(RECIPIENT, 1000) == (
+            "0xa9059cbb"
+            "0000000000000000000000006fac4d18c912343bf86fa7049364dd4e424ab9c0"
+            "00000000000000000000000000000000000000000000000000000000000003e8"
+        )
+
+    def test_sign_depends_on_nonce(self):
+        transaction = {
+            "to": RECIPIENT,
+            "value": 1,
+            "gas": 21_000,
+            "gasPrice": 10**9,
+            "chainId": 1,
+        }
+        first = EvmTransactor.sign(PRIVATE_KEY, {**transaction, "nonce": 0})
+        second = EvmTransactor.sign(PRIVATE_KEY, {**transaction, "nonce": 1})
+
+        assert first[1] == (
+            "0x6b10bab70f0e5acd7e7c0d4d781c5572bd14656dedfda7e011fd4d414391159b"
+        )
+        assert first[1] != second[1]
+
+
+def chain_at(nonce: int):
+    async def chain_nonce() -> int:
+        return nonce
+
+    return chain_nonce
+
+
+class BrokenRedis:
+    async def eval(self, *args):
+        raise RedisError("Connection refused")
+
+
+@pytest.mark.asyncio
+class TestNonceManager:
+
+    async def test_seeds_from_chain_and_reserves_in_order(self, fake_redis):
+        manager = NonceManager()
+
+        assert await manager.reserve_many("eth", SENDER, 3, chain_at(7)) == [7, 8, 9]
+        assert await manager.reserve_many("eth", SENDER, 2, chain_at(7)) == [10, 11]
+
+    async def test_addresses_are_case_insensitive(self, fake_redis):
+        manager = NonceManager()
+
+        await manager.reserve_many("eth", SENDER, 1, chain_at(0))
+        assert await manager.reserve_many("eth", SENDER.lower(), 1, chain_at(0)) == [1]
+
+    async def test_concurrent_reservations_share_one_round_trip(self, fake_redis):
+        manager = NonceManager()
+        before = metrics.snapshot()["counters"].get("nonce.round_trips", 0)
+
+        nonces = await asyncio.gather(
+            *(manager.reserve("eth", SENDER, chain_at(0)) for _ in range(5))
+        )
+
+        assert sorted(nonces) == [0, 1, 2, 3, 4]
+        assert metrics.snapshot()["counters"]["nonce.round_trips"] == before + 1
+
+    async def test_cancelled_reservation_is_released(self, fake_redis):
+        manager = NonceManager()
+
+        task = asyncio.create_task(manager.reserve("eth", SENDER, chain_at(0)))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, *manager._flushing, return_exceptions=True)
+
+        assert await manager.reserve("eth", SENDER, chain_at(0)) == 0
+
+    async def test_released_nonce_is_reused_first(self, fake_redis):
+        manager = NonceManager()
+        await manager.reserve_many("eth", SENDER, 3, chain_at(0))
+
+        await manager.release("eth", SENDER, 1)
+
+        assert await manager.reserve_many("eth", SENDER, 2, chain_at(0)) == [1, 3]
+
+    async def test_resync_moves_counter_up_to_chain(self, fake_redis):
+        manager = NonceManager()
+        await manager.reserve_many("eth", SENDER, 2, chain_at(0))
+        await manager.release("eth", SENDER, 1)
+
+        assert await manager.resync("eth", SENDER, 10) == 0
+        assert await manager.reserve_many("eth", SENDER, 1, chain_at(10)) == [10]
+
+    async def test_busy_wallet_reuses_only_the_stuck_nonce(
+        self, fake_redis, monkeypatch
+    ):
+        manager = NonceManager()
+        await manager.reserve_many("eth", SENDER, 4, chain_at(0))
+        assert await manager.resync("eth", SENDER, 0) == 0
+
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        await manager.reserve_many("eth", SENDER, 1, chain_at(0))
+        assert await manager.resync("eth", SENDER, 0) == 1
+
+        assert await manager.reserve_many("eth", SENDER, 2, chain_at(0)) == [0, 5]
+
+    async def test_idle_wallet_keeps_queued_nonces(self, fake_redis, monkeypatch):
+        manager = NonceManager()
+        await manager.reserve_many("eth", SENDER, 4, chain_at(0))
+
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        assert await manager.resync("eth", SENDER, 2) == 1
+        assert await manager.resync("eth", SENDER, 2) == 0
+
+        assert await manager.reserve_many("eth", SENDER, 2, chain_at(2)) == [2, 4]
+
+    @pytest.mark.parametrize("accepted, reused", [(True, 0), (False, 1)])
+    async def test_stuck_signed_nonce_is_broadcast_again(
+        self, fake_redis, monkeypatch, accepted, reused
+    ):
+        manager = NonceManager()
+        await manager.reserve_many("eth", SENDER, 2, chain_at(0))
+        await manager.record("eth", SENDER, {0: "0xraw0", 1: "0xraw1"})
+        assert await manager.resync("eth", SENDER, 0) == 0
+        broadcast = []
+
+        async def recover(raw):
+            broadcast.append(raw)
+            return accepted
+
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        assert await manager.resync("eth", SENDER, 0, recover) == reused
+        assert broadcast == ["0xraw0"]
+
+        expected = [0] if reused else [2]
+        assert await manager.reserve_many("eth", SENDER, 1, chain_at(0)) == expected
+
+    async def test_stuck_signed_nonce_is_kept_without_recover(
+        self, fake_redis, monkeypatch
+    ):
+        manager = NonceManager()
+        await manager.reserve_many("eth", SENDER, 2, chain_at(0))
+        await manager.record("eth", SENDER, {0: "0xraw0"})
+        assert await manager.resync("eth", SENDER, 0) == 0
+
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        assert await manager.resync("eth", SENDER, 0) == 0
+
+        assert await manager.reserve_many("eth", SENDER, 1, chain_at(0)) == [2]
+
+    async def test_falls_back_to_chain_without_redis(self, monkeypatch):
+        monkeypatch.setattr("app.external_services.nonce.redis_client", BrokenRedis())
+        manager = NonceManager()
+
+        assert await manager.reserve_many("eth", SENDER, 3, chain_at(4)) == [4, 5, 6]
+
+
+class FakeRpc:
+    """
+    Stands in for a node: `handlers` map a method to a function of its params,
+    which returns the result, an RpcError, or an httpx error to raise.
+    """
+
+    def __init__(self, **handlers):
+        self.handlers = {
+            "eth_chainId": lambda params: "0x1",
+            "eth_gasPrice": lambda params: hex(10**9),
+            "eth_getTransactionCount": lambda params: "0x0",
+            "eth_sendRawTransaction": lambda params: "0x",
+            "eth_getTransactionByHash": lambda params: None,
+            **handlers,
+        }
+        self.calls = []
+
+    async def call(self, method, *params):
+        (result,) = await self.batch([(method, list(params))])
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    async def batch(self, calls):
+        results = []
+        for method, params in calls:
+            self.calls.append((method, params))
+            result = self.handlers[method](params)
+            if isinstance(result, httpx.HTTPError):
+                raise result
+            results.append(result)
+        return results
+
+    def sent(self):
+        return [
+            params[0]
+            for method, params in self.calls
+            if method == "eth_sendRawTransaction"
+        ]
+
+
+def transport_error(params):
+    return httpx.ConnectError("Connection reset")
+
+
+@pytest.mark.asyncio
+class TestEvmTransactorSend:
+
+    @staticmethod
+    def transactor(rpc: FakeRpc) -> EvmTransactor:
+        transactor = EvmTransactor("eth", "http://node.invalid")
+        transactor.rpc = rpc
+        return transactor
+
+    @pytest.mark.parametrize(
+        "outcome",
+        [
+            lambda params: RpcError({"message": "Missing Response"}),
+            transport_error,
+        ],
+    )
+    async def test_unanswered_broadcast_keeps_its_nonce(self, fake_redis, outcome):
+        transactor = self.transactor(FakeRpc(eth_sendRawTransaction=outcome))
+
+        with pytest.raises(BroadcastUnknown) as error:
+            await transactor.send(PRIVATE_KEY, SENDER, RECIPIENT, 1)
+
+        assert error.value.nonce == 0
+        assert await nonce_manager.reserve("eth", SENDER, chain_at(0)) == 1
+
+    async def test_rejected_broadcast_releases_its_nonce(self, fake_redis):
+        transactor = self.transactor(
+            FakeRpc(
+                eth_sendRawTransaction=lambda params: RpcError(
+                    {"code": -32000, "message": "insufficient funds"}
+                )
+            )
+        )
+
+        with pytest.raises(RpcError):
+            await transactor.send(PRIVATE_KEY, SENDER, RECIPIENT, 1)
+
+        assert await nonce_manager.reserve("eth", SENDER, chain_at(0)) == 0
+
+    @pytest.mark.parametrize(
+        "outcome, kept",
+        [
+            (lambda params: "0x", True),
+            (
+                lambda params: RpcError({"code": -32000, "message": "already known"}),
+                True,
+            ),
+            (lambda params: RpcError({"message": "Missing Response"}), True),
+            (transport_error, True),
+            (
+                lambda params: RpcError(
+                    {"code": -32000, "message": "replacement transaction underpriced"}
+                ),
+                True,
+            ),
+            (
+                lambda params: RpcError(
+                    {"code": -32000, "message": "insufficient funds"}
+                ),
+                False,
+            ),
+        ],
+    )
+    async def test_recover_keeps_the_nonce_unless_rejected(self, outcome, kept):
+        rpc = FakeRpc(eth_sendRawTransaction=outcome)
+
+        assert await self.transactor(rpc).recover("0xraw") is kept
+        assert rpc.sent() == ["0xraw"]
+
+
+@pytest.fixture
+async def batch_user():
+    async with unit_of_work() as session:
+        user = User(username=f"payouts-{uuid.uuid4().hex}", password="x")
+        session.add(user)
+        await session.flush()
+        return user.id
+
+
+def batch_form(batch_id: str, count: int = 3, **overrides):
+    return BatchTransferCreateModel(
+        batch_id=batch_id,
+        mainnet="eth",
+        from_address=SENDER,
+        items=[
+            {"to_address": RECIPIENT, "amount": 1000 + index, **overrides}
+            for index in range(count)
+        ],
+    )
+
+
+@pytest.mark.parametrize("amount", [0, -1])
+def test_batch_items_need_a_positive_amount(amount):
+    with pytest.raises(ValidationError):
+        batch_form("negative", count=1, amount=amount)
+
+
+def test_registry_rejects_unavailable_chains():
+    with pytest.raises(ValueError):
+        TransactorRegistry.get("no-such-chain")
+
+    assert "no-such-chain" not in TransactorRegistry._clients
+
+
+def test_batch_needs_an_available_mainnet():
+    with pytest.raises(HTTPException) as error:
+        BatchTransferCreateModel(
+            batch_id="unavailable",
+            mainnet="no-such-chain",
+            from_address=SENDER,
+            items=[{"to_address": RECIPIENT, "amount": 1}],
+        )
+
+    assert error.value.status_code == 422
+
+
+@pytest.mark.asyncio
+class TestBatchTransferService:
+
+    @staticmethod
+    def transactor(rpc: FakeRpc) -> EvmTransactor:
+        transactor = EvmTransactor("eth", "http://node.invalid")
+        transactor.rpc = rpc
+        return transactor
+
+    async def test_sends_every_item(self, fake_redis, batch_user):
+        rpc = FakeRpc()
+
+        transfers = await BatchTransferService.run(
+            self.transactor(rpc), batch_user, PRIVATE_KEY, batch_form("all")
+        )
+
+        assert [transfer.status for transfer in transfers] == ["sent"] * 3
+        assert [transfer.nonce for transfer in transfers] == [0, 1, 2]
+        assert len(rpc.sent()) == 3
+
+    async def test_resume_skips_sent_items(self, fake_redis, batch_user):
+        form = batch_form("resume")
+        await BatchTransferService.run(
+            self.transactor(FakeRpc()), batch_user, PRIVATE_KEY, form
+        )
+        rpc = FakeRpc()
+
+        transfers = await BatchTransferService.run(
+            self.transactor(rpc), batch_user, PRIVATE_KEY, form
+        )
+
+        assert [transfer.status for transfer in transfers] == ["sent"] * 3
+        assert rpc.sent() == []
+
+    async def test_resume_rebroadcasts_signed_items(self, fake_redis, batch_user):
+        form = batch_form("rebroadcast")
+        first = await BatchTransferService.run(
+            self.transactor(FakeRpc(eth_sendRawTransaction=transport_error)),
+            batch_user,
+            PRIVATE_KEY,
+            form,
+        )
+        assert [transfer.status for transfer in first] == ["unknown"] * 3
+        rpc = FakeRpc()
+
+        transfers = await BatchTransferService.run(
+            self.transactor(rpc), batch_user, PRIVATE_KEY, form
+        )
+
+        assert [transfer.status for transfer in transfers] == ["sent"] * 3
+        assert rpc.sent() == [transfer.raw_transaction for transfer in first]
+        assert [transfer.tx_hash for transfer in transfers] == [
+            transfer.tx_hash for transfer in first
+        ]
+
+    async def test_mined_transaction_behind_nonce_too_low_is_sent(
+        self, fake_redis, batch_user
+    ):
+        form = batch_form("mined", count=1)
+        (first,) = await BatchTransferService.run(
+            self.transactor(FakeRpc(eth_sendRawTransaction=transport_error)),
+            batch_user,
+            PRIVATE_KEY,
+            form,
+        )
+        rpc = FakeRpc(
+            eth_sendRawTransaction=lambda params: RpcError(
+                {"code": -32000, "message": "nonce too low"}
+            ),
+            eth_getTransactionByHash=lambda params: {"hash": params[0]},
+        )
+
+        (transfer,) = await BatchTransferService.run(
+            self.transactor(rpc), batch_user, PRIVATE_KEY, form
+        )
+
+        assert (transfer.status, transfer.error) == ("sent", None)
+        assert transfer.tx_hash == first.tx_hash
+        assert rpc.sent() == [first.raw_transaction]
+
+    async def test_rejected_item_gap_is_filled(self, fake_redis, batch_user):
+        sent = []
+
+        def send(params):
+            sent.append(params[0])
+            if len(sent) == 2:
+                return RpcError({"code": -32000, "message": "insufficient funds"})
+            return "0x"
+
+        rpc = FakeRpc(eth_sendRawTransaction=send)
+
+        transfers = await BatchTransferService.run(
+            self.transactor(rpc), batch_user, PRIVATE_KEY, batch_form("gap")
+        )
+
+        assert [transfer.status for transfer in transfers] == [
+            "sent",
+            "failed",
+            "sent",
+        ]
+        nonce, _, _, to, value, *_ = rlp.decode(bytes.fromhex(sent[-1][2:]))
+        assert (int.from_bytes(nonce, "big"), to.hex(), value) == (
+            1,
+            SENDER[2:].lower(),
+            b"",
+        )
+        assert len(sent) == 4
+
+    async def test_reused_batch_id_with_other_items_conflicts(
+        self, fake_redis, batch_user
+    ):
+        transactor = self.transactor(FakeRpc())
+        await BatchTransferService.run(
+            transactor, batch_user, PRIVATE_KEY, batch_form("conflict")
+        )
+
+        with pytest.raises(HTTPException) as error:
+            await BatchTransferService.run(
+                transactor, batch_user, PRIVATE_KEY, batch_form("conflict", count=2)
+            )
+
+        assert error.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_sweep_requeues_lost_and_expires_interrupted_transfers(
+    batch_user, monkeypatch
+):
+    transfers = {}
+    async with unit_of_work() as session:
+        repository = TransferRepository(session)
+        for name, status, age in [
+            ("lost", "pending", 3600),
+            ("queued", "pending", 0),
+            ("crashed", "processing", 3600),
+            ("sending", "processing", 0),
+        ]:
+            transfer = await repository.create(
+                user_id=batch_user,
+                kind="native",
+                mainnet="eth",
+                from_address=SENDER,
+                to_address=RECIPIENT,
+                amount=1,
+                status=status,
+            )
+            await session.execute(
+                update(Transfer)
+                .where(Transfer.id == transfer.id)
+                .values(updated_at=datetime.utcnow() - timedelta(seconds=age))
+            )
+            transfers[name] = transfer.id
+    enqueued, notified = [], []
+    monkeypatch.setattr(tasks.process_transfer, "delay", enqueued.append)
+
+    async def notify(transfer_id, status):
+        notified.append((transfer_id, status))
+
+    monkeypatch.setattr(tasks.TransferService, "notify", notify)
+
+    assert await tasks.sweep_transfers_async() == 2
+    assert await tasks.sweep_transfers_async() == 0
+
+    assert enqueued == [transfers["lost"]]
+    assert notified == [(transfers["crashed"], "unknown")]
+    async with unit_of_work() as session:
+        repository = TransferRepository(session)
+        crashed = await repository.get_single(id=transfers["crashed"])
+        sending = await repository.get_single(id=transfers["sending"])
+    assert (crashed.status, crashed.error) == ("unknown", "Transfer Interrupted")
+    assert sending.status == "processing"
+
+
+@pytest.mark.asyncio
+async def test_unanswered_transfer_is_reported_unknown(batch_user, monkeypatch):
+    async with unit_of_work() as session:
+        session.add(
+            Wallet(
+                user_id=batch_user,
+                address=f"0x{uuid.uuid4().hex}",
+                private_key=uuid.uuid4().hex,
+            )
+        )
+        await session.flush()
+        wallet = await session.scalar(select(Wallet).filter_by(user_id=batch_user))
+        transfer = await TransferRepository(session).create(
+            user_id=batch_user,
+            kind="native",
+            mainnet="eth",
+            from_address=wallet.address,
+            to_address=RECIPIENT,
+            amount=1,
+        )
+
+    async def send(transfer, private_key):
+        raise BroadcastUnknown("0xabc", 7)
+
+    async def notify(transfer_id, status):
+        pass
+
+    monkeypatch.setattr(tasks.TransferService, "send", send)
+    monkeypatch.setattr(tasks.TransferService, "notify", notify)
+
+    assert await tasks.process_transfer_async(transfer.id) == "unknown"
+
+    async with unit_of_work() as session:
+        stored = await TransferRepository(session).get_single(id=transfer.id)
+    assert (stored.status, stored.tx_hash, stored.nonce) == ("unknown", "0xabc", 7)
@@ -1,8 +1,24 @@
+import asyncio
+import threading
+import time
+
 import pytest
+from fastapi import HTTPException
+from jose import jwt
 
 from .conftest import async_client
 from httpx import AsyncClient
 
+from app.core.cache import PrincipalCache, TokenVersions
+from app.core.database import async_session, unit_of_work
+from app.core.settings import settings
+from app.models import User
+from app.repositories import UserRepository
+from app.schemas.user_scheme import UserSetChainModel
+from app.services import AuthService
+from app.utils import hashing
+from app.utils.security import create_access_token
+
 
 @pytest.mark.asyncio
 class TestAuth:
@@ -75,6 +91,31 @@ class TestAuth:
             with pytest.raises(Exception) as exc_info:
                 raise Exception(exc_info)
 
+    @pytest.mark.parametrize(
+        "username, password",
+        [
+            ("testuser", "testpassword"),
+        ],
+    )
+    async def test_logout(self, username, password, async_client: AsyncClient):
+        data = await self.test_login(username, password, 200, async_client)
+
+        headers = {
+            "Authorization": data.get("access_token"),
+        }
+
+        response = await async_client.post("/users/auth/logout", headers=headers)
+        assert response.status_code == 200
+
+        response = await async_client.get("/users/profile/", headers=headers)
+        assert response.status_code == 401
+
+        response = await async_client.post(
+            "/users/auth/login/refresh",
+            headers={"Authorization": data.get("refresh_token")},
+        )
+        assert response.status_code == 401
+
 
 @pytest.mark.asyncio
 class TestProfile:
@@ -138,3 +179,209 @@ class TestProfile:
                 assert response.json()["username"] == username
                 assert response.json()["is_verified"] == False
                 assert response.json()["email"] == email
+
+    @pytest.mark.parametrize(
+        "username, password, email",
+        [
+            ("testuser", "testpassword", "cachedemail@email.com"),
+        ],
+    )
+    async def test_profile_reflects_edit(
+        self, username, password, email, async_client: AsyncClient
+    ):
+        data = await TestAuth().test_login(username, password, 200, async_client)
+
+        headers = {
+            "Authorization": data.get("access_token"),
+        }
+
+        response = await async_client.get(f"/users/profile/", headers=headers)
+        assert response.status_code == 200
+
+        response = await async_client.patch(
+            f"/users/profile/edit",
+            headers=headers,
+            json={"email": email},
+        )
+        assert response.status_code == 200
+
+        # The edit reset is_verified, which revokes tokens carrying the old one.
+        response = await async_client.get(f"/users/profile/", headers=headers)
+        assert response.status_code == 401
+
+        data = await TestAuth().test_login(username, password, 200, async_client)
+        headers = {
+            "Authorization": data.get("access_token"),
+        }
+        response = await async_client.get(f"/users/profile/", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == email
+
+    @pytest.mark.parametrize(
+        "username, password, path, budget",
+        [
+            ("testuser", "testpassword", "/users/profile/", 1),
+            ("testuser", "testpassword", "/users/profile/chains", 1),
+            ("testuser", "testpassword", "/users/profile/wallets", 3),
+        ],
+    )
+    async def test_profile_query_budget(
+        self, username, password, path, budget, async_client: AsyncClient, query_budget
+    ):
+        data = await TestAuth().test_login(username, password, 200, async_client)
+
+        headers = {
+            "Authorization": data.get("access_token"),
+        }
+
+        with query_budget(budget):
+            response = await async_client.get(path, headers=headers)
+
+        assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+class TestTokenVersion:
+
+    @staticmethod
+    def claims(token: str) -> dict:
+        return jwt.decode(
+            token, settings.JWT_USER_SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+
+    async def test_unknown_version_leaves_claims_out(self):
+        user = User(id=1, username="versionless", is_active=True)
+
+        claims = self.claims(
+            create_access_token({"sub": user.username}, user=user, version=None)
+        )
+
+        assert "uid" not in claims and "ver" not in claims
+
+    @pytest.mark.parametrize("current, accepted", [(3, True), (4, False)])
+    async def test_user_token_must_match_version(self, current, accepted, monkeypatch):
+        async with unit_of_work() as session:
+            user = User(username=f"versioned{current}", password="x")
+            session.add(user)
+            await session.flush()
+            token = create_access_token({"sub": user.username}, user=user, version=3)
+
+            async def version(user_id):
+                return current
+
+            monkeypatch.setattr(TokenVersions, "get", version)
+
+            if accepted:
+                current_user = await AuthService.get_current_user(
+                    UserRepository(session), token
+                )
+                assert current_user.id == user.id
+            else:
+                with pytest.raises(HTTPException) as error:
+                    await AuthService.get_current_user(UserRepository(session), token)
+                assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+class TestHashingPool:
+
+    async def test_saturated_pool_fails_fast(self, monkeypatch, async_client):
+        monkeypatch.setattr(settings, "PASSWORD_HASHING_MAX_PENDING", 1)
+        async with unit_of_work() as session:
+            session.add(User(username="busy", password="x"))
+
+        release = threading.Event()
+        holder = asyncio.create_task(hashing._run_in_hashing_pool(release.wait))
+        await asyncio.sleep(0)  # the holder takes the only pending slot
+        try:
+            response = await asyncio.wait_for(
+                async_client.post(
+                    "/users/auth/login",
+                    json={"username": "busy", "password": "testpassword"},
+                ),
+                timeout=5,
+            )
+        finally:
+            release.set()
+            await holder
+
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Server Is Busy, Try Again Later"
+
+
+@pytest.mark.asyncio
+class TestChains:
+
+    @staticmethod
+    def add(mainnet: str) -> UserSetChainModel:
+        return UserSetChainModel.model_construct(mainnet=mainnet, gas=2.0)
+
+    async def test_concurrent_adds_keep_both_chains(self):
+        add = self.add
+        async with unit_of_work() as session:
+            user = User(username="chains", password="x", mainnet_dict={"eth": 1.0})
+            session.add(user)
+
+        async with async_session() as first, async_session() as second:
+            await UserRepository(first).update_chains(add("bsc"), "add", id=user.id)
+            # The second update waits on the row lock of the first one.
+            pending = asyncio.create_task(
+                UserRepository(second).update_chains(add("polygon"), "add", id=user.id)
+            )
+            await asyncio.sleep(0.2)
+            assert not pending.done()
+            await first.commit()
+            await pending
+            await second.commit()
+
+        async with unit_of_work() as session:
+            stored = await session.get(User, user.id)
+            assert stored.mainnet_dict == {"eth": 1.0, "bsc": 2.0, "polygon": 2.0}
+            await session.delete(stored)
+
+
+@pytest.mark.asyncio
+class TestPrincipalCache:
+
+    @pytest.fixture(autouse=True)
+    def local(self, fake_redis):
+        PrincipalCache._local.clear()
+        yield PrincipalCache._local
+        PrincipalCache._local.clear()
+
+    @staticmethod
+    def user() -> User:
+        return User(
+            id=7,
+            username="cached",
+            email=None,
+            is_active=True,
+            is_verified=True,
+            is_admin=False,
+            mainnet_dict={"eth": 1.0},
+        )
+
+    async def test_entries_are_tied_to_the_token_version(self, local):
+        await PrincipalCache.set(self.user(), version=3)
+
+        assert (await PrincipalCache.get("cached", version=3)).id == 7
+        local.clear()
+        assert await PrincipalCache.get("cached", version=4) is None
+        assert await PrincipalCache.get("cached") is None
+
+    async def test_entries_never_outlive_the_token(self, local, fake_redis):
+        await PrincipalCache.set(self.user(), version=3, expires_at=time.time() - 1)
+        assert await fake_redis.exists(PrincipalCache._key("cached")) == 0
+
+        await PrincipalCache.set(self.user(), version=3, expires_at=time.time() + 5)
+        assert 0 < await fake_redis.ttl(PrincipalCache._key("cached")) <= 5
+
+    async def test_reads_are_capped_to_the_reading_token(self, local, monkeypatch):
+        monkeypatch.setattr(local, "ttl", 60)
+        await PrincipalCache.set(self.user(), version=3)
+        local.clear()
+
+        await PrincipalCache.get("cached", version=3, expires_at=time.time() + 5)
+
+        _, expires_at = local._data["cached"]
+        assert expires_at - time.monotonic() <= 5
@@ -1,5 +1,18 @@
+import asyncio
+from types import SimpleNamespace
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import delete, select
+
+from app.core.database import async_session, unit_of_work
+from app.external_services import AccountDiscoveryService, HDWalletService
+from app.main import app
+from app.models import HDAccount, PooledWallet, User, Wallet
+from app.repositories import WalletPoolRepository, WalletRepository
+from app.schemas.auth_scheme import Principal
+from app.services import AuthService
+from app.utils.encryption import decrypt, encrypt
 
 from .conftest import async_client
 
@@ -17,3 +30,319 @@ class TestWallet:
     async def test_create_wallet(
         self, username, password, status, wallet_status, async_client: AsyncClient
     ): ...
+
+
+class FakeGenerator:
+    """
+    Generator stand-in: hands out the given addresses, one wallet each.
+    """
+
+    def __init__(self, addresses):
+        self.addresses = list(addresses)
+
+    async def generate(self):
+        (wallet,) = await self.generate_many(1)
+        self.addresses.pop(0)
+        return wallet
+
+    async def generate_many(self, count):
+        return [
+            SimpleNamespace(
+                mnemonics=f"phrase of {address}",
+                secrets={"evm": [(address, f"key of {address}")]},
+            )
+            for address in self.addresses[:count]
+        ]
+
+
+@pytest.mark.asyncio
+class TestWalletBatch:
+    TAKEN = "0x" + "e" * 40
+    FRESH = "0x" + "f" * 40
+
+    @pytest.fixture
+    async def user(self, monkeypatch):
+        monkeypatch.setattr(
+            "app.repositories.wallet.WalletGeneratorService",
+            FakeGenerator([self.TAKEN, self.FRESH]),
+        )
+        async with unit_of_work() as session:
+            user = User(username="batching", password="x")
+            session.add(user)
+            await session.flush()
+            session.add(
+                Wallet(
+                    user_id=user.id,
+                    address=self.TAKEN,
+                    private_key="existing key",
+                    mnemonics="existing phrase",
+                )
+            )
+        app.dependency_overrides[AuthService.get_current_principal] = lambda: Principal(
+            id=user.id, username=user.username, is_verified=True
+        )
+        yield user
+        app.dependency_overrides.pop(AuthService.get_current_principal)
+        async with unit_of_work() as session:
+            await session.execute(delete(User).filter_by(id=user.id))
+
+    async def test_conflicts_are_reported_not_created(self, user):
+        async with unit_of_work() as session:
+            results = await WalletRepository(session).create_many_from_user(user, 2)
+            wallets = await session.scalars(
+                select(Wallet).filter_by(user_id=user.id).order_by(Wallet.address)
+            )
+            keys = [(wallet.address, wallet.private_key) for wallet in wallets]
+
+        assert results == [(self.TAKEN, False), (self.FRESH, True)]
+        assert keys == [
+            (self.TAKEN, "existing key"),
+            (self.FRESH, f"key of {self.FRESH}"),
+        ]
+
+    async def test_batch_counts_conflicts(self, user, async_client: AsyncClient):
+        response = await async_client.post("/wallets/batch", params={"count": 2})
+
+        assert response.status_code == 201
+        assert response.json() == {
+            "created": 1,
+            "conflicts": 1,
+            "items": [
+                {"address": self.TAKEN, "created": False},
+                {"address": self.FRESH, "created": True},
+            ],
+        }
+
+    @pytest.mark.parametrize(
+        "count, status", [(0, 422), (1, 201), (500, 201), (501, 422)]
+    )
+    async def test_count_bounds(
+        self, count, status, user, monkeypatch, async_client: AsyncClient
+    ):
+        monkeypatch.setattr(
+            "app.repositories.wallet.WalletGeneratorService",
+            FakeGenerator(f"0x{index:040x}" for index in range(count)),
+        )
+
+        response = await async_client.post("/wallets/batch", params={"count": count})
+
+        assert response.status_code == status
+
+
+@pytest.fixture
+def pool_key(monkeypatch):
+    monkeypatch.setattr(
+        "app.core.settings.settings.WALLET_POOL_ENCRYPTION_KEY", "ab" * 32
+    )
+
+
+@pytest.mark.usefixtures("pool_key")
+class TestEncryption:
+    def test_round_trip(self):
+        blob = encrypt(b"secret")
+
+        assert blob != encrypt(b"secret")
+        assert decrypt(blob) == b"secret"
+
+    @pytest.mark.parametrize("position", [0, 16, -1])
+    def test_tampering_is_rejected(self, position):
+        blob = bytearray(encrypt(b"secret"))
+        blob[position] ^= 1
+
+        with pytest.raises(ValueError):
+            decrypt(bytes(blob))
+
+
+@pytest.mark.asyncio
+class TestWalletPool:
+    SECRETS = [
+        ("0x" + "a1" * 20, "key 1", "phrase 1"),
+        ("0x" + "a2" * 20, "key 2", "phrase 2"),
+    ]
+
+    @pytest.fixture(autouse=True)
+    async def pool(self, pool_key):
+        async with unit_of_work() as session:
+            await WalletPoolRepository(session).add_many(self.SECRETS)
+        yield
+        async with unit_of_work() as session:
+            await session.execute(delete(PooledWallet))
+
+    async def test_concurrent_claims_skip_locked_rows(self):
+        async with async_session() as first, async_session() as second:
+            claimed = await WalletPoolRepository(first).claim()
+            # The first claim is still uncommitted and keeps its row locked.
+            skipped = await asyncio.wait_for(
+                WalletPoolRepository(second).claim(), timeout=5
+            )
+            await first.commit()
+            await second.commit()
+
+        assert [claimed, skipped] == self.SECRETS
+
+    async def test_empty_pool_falls_back_to_the_generator(self, monkeypatch):
+        monkeypatch.setattr(
+            "app.repositories.wallet.WalletGeneratorService",
+            FakeGenerator(["0x" + "a3" * 20]),
+        )
+        async with unit_of_work() as session:
+            user = User(username="pooling", password="x")
+            session.add(user)
+            await session.flush()
+            repository = WalletRepository(session)
+
+            wallets = [await repository.create_from_user(user) for _ in range(3)]
+            remaining = await WalletPoolRepository(session).count()
+            await session.execute(delete(User).filter_by(id=user.id))
+
+        assert [wallet.address for wallet in wallets] == [
+            "0x" + "a1" * 20,
+            "0x" + "a2" * 20,
+            "0x" + "a3" * 20,
+        ]
+        assert wallets[0].private_key == "key 1"
+        assert remaining == 0
+
+    async def test_disabled_pool_claims_nothing(self, monkeypatch):
+        monkeypatch.setattr("app.core.settings.settings.WALLET_POOL_ENCRYPTION_KEY", "")
+        async with unit_of_work() as session:
+            assert await WalletPoolRepository(session).claim() is None
+            assert await WalletPoolRepository(session).count() == 2
+
+
+class TestHDWallet:
+    MNEMONICS = " ".join(["abandon"] * 11 + ["about"])
+
+    @pytest.mark.parametrize(
+        "index, address",
+        [
+            (0, "0x9858EfFD232B4033E47d90003D41EC34EcaEda94"),
+            (1, "0x6Fac4D18c912343BF86fa7049364Dd4E424Ab9C0"),
+        ],
+    )
+    def test_derive(self, index, address):
+        extended_key = HDWalletService.account_key(self.MNEMONICS)
+        assert HDWalletService.derive(extended_key, index)[0] == address
+
+    def test_derive_range(self):
+        extended_key = HDWalletService.account_key(self.MNEMONICS)
+        derived = HDWalletService.derive_range(extended_key, 0, 3)
+        assert derived == [HDWalletService.derive(extended_key, i) for i in range(3)]
+
+
+class FlakyHistory:
+    """
+    Provider stand-in: `used` addresses have history, and the first probe
+    of each address in `flaky` fails.
+    """
+
+    def __init__(self, used, flaky=()):
+        self.used = {address.lower() for address in used}
+        self.flaky = {address.lower() for address in flaky}
+
+    async def fetch_transactions(self, address, chain_name):
+        if address.lower() in self.flaky:
+            self.flaky.discard(address.lower())
+            raise ConnectionError("Provider Unavailable")
+        items = []
+        if address.lower() in self.used:
+            items.append(
+                {
+                    "tx_hash": "0x1",
+                    "successful": True,
+                    "block_height": 1,
+                    "from_address": address,
+                    "to_address": address,
+                    "value": "0",
+                    "pretty_value_quote": "$0.00",
+                }
+            )
+        return {
+            "address": address,
+            "chain_name": chain_name,
+            "chain_id": 1,
+            "items": items,
+        }
+
+
+@pytest.mark.asyncio
+class TestAccountDiscovery:
+    MNEMONICS = TestHDWallet.MNEMONICS
+
+    @pytest.fixture
+    def provider(self, monkeypatch):
+        extended_key = HDWalletService.account_key(self.MNEMONICS)
+        used = [HDWalletService.derive(extended_key, index)[0] for index in (0, 2)]
+        provider = FlakyHistory(used, flaky=used)
+        monkeypatch.setattr(
+            "app.external_services.discovery.CheckerService.fetch_transactions",
+            provider.fetch_transactions,
+        )
+        return provider
+
+    async def test_failed_probes_are_retried(self, provider):
+        extended_key = HDWalletService.account_key(self.MNEMONICS)
+
+        used = await AccountDiscoveryService.discover(extended_key, ["eth"])
+
+        assert [index for index, _, _ in used] == [0, 2]
+
+    async def test_failing_probes_stop_the_scan(self, provider, monkeypatch):
+        monkeypatch.setattr(
+            "app.external_services.discovery.settings.DISCOVERY_PROBE_ATTEMPTS", 1
+        )
+        extended_key = HDWalletService.account_key(self.MNEMONICS)
+
+        with pytest.raises(RuntimeError):
+            await AccountDiscoveryService.discover(extended_key, ["eth"])
+
+    async def test_recovered_phrase_becomes_the_hd_account(self, provider):
+        async with unit_of_work() as session:
+            user = User(username="recovering", password="x")
+            session.add(user)
+            await session.flush()
+            repository = WalletRepository(session)
+
+            recovered = await repository.discover_wallets_from_mnemonics(
+                self.MNEMONICS, user, ["eth"]
+            )
+            derived = await repository.derive_from_user(user)
+            account = await session.scalar(select(HDAccount).filter_by(user_id=user.id))
+
+        assert [wallet.derivation_index for wallet in recovered] == [0, 2]
+        assert [wallet.derivation_index for wallet in derived] == [3]
+        assert account.mnemonics == self.MNEMONICS
+
+    async def test_other_phrase_keeps_the_hd_account(self, monkeypatch):
+        mnemonics = (
+            "legal winner thank year wave sausage "
+            "worth useful legal winner thank yellow"
+        )
+        extended_key = HDWalletService.account_key(mnemonics)
+        used = [HDWalletService.derive(extended_key, index)[0] for index in (0, 1)]
+        monkeypatch.setattr(
+            "app.external_services.discovery.CheckerService.fetch_transactions",
+            FlakyHistory(used).fetch_transactions,
+        )
+
+        async with unit_of_work() as session:
+            user = User(username="importing", password="x")
+            session.add(user)
+            await session.flush()
+            session.add(
+                HDAccount(
+                    user_id=user.id,
+                    mnemonics="other phrase",
+                    extended_key="other key",
+                    next_index=5,
+                )
+            )
+            await session.flush()
+
+            recovered = await WalletRepository(session).discover_wallets_from_mnemonics(
+                mnemonics, user, ["eth"]
+            )
+            account = await session.scalar(select(HDAccount).filter_by(user_id=user.id))
+
+        assert [wallet.derivation_index for wallet in recovered] == [None, None]
+        assert (account.mnemonics, account.next_index) == ("other phrase", 5)